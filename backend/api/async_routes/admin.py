@@ -0,0 +1,34 @@
+"""Async counterparts of the admin routes for ASGI serving."""
+
+import asyncio
+
+try:  # Prefer Quart, the asyncio implementation of the Flask API.
+    from quart import Blueprint, current_app, jsonify, request
+except ModuleNotFoundError:  # pragma: no cover - fallback for local stub usage
+    from flask_stub import Blueprint, current_app, jsonify, request
+
+from ...bootstrap import resolve_service
+from ..routes.common import get_query_profiler, get_sync_manager, query_stats, require_token
+
+router = Blueprint("async_admin", __name__, url_prefix="/api/admin")
+
+
+@router.post("/sync")
+async def trigger_sync():
+    require_token(current_app.config, request.headers)
+    sync_manager = get_sync_manager(current_app.config)
+    # Publishing a catalog snapshot writes a file, so it runs off the loop.
+    status = await asyncio.to_thread(sync_manager.trigger, resolve_service(current_app.config, "DATABASE"))
+    return jsonify(status), 202
+
+
+@router.get("/sync")
+async def get_sync_status():
+    require_token(current_app.config, request.headers)
+    return jsonify(get_sync_manager(current_app.config).status())
+
+
+@router.get("/queries")
+async def get_query_stats():
+    require_token(current_app.config, request.headers)
+    return jsonify(query_stats(get_query_profiler(current_app.config)))
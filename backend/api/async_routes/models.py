@@ -0,0 +1,194 @@
+"""Async routes mirroring :mod:`backend.api.routes.models` for ASGI serving.
+
+Downloads are streamed from async generators, so a slow client only parks a
+coroutine instead of holding a worker thread for the whole transfer. Anything
+that may touch the filesystem or a slow backend, and archive compression,
+runs on the default executor rather than on the event loop. Admission
+control matches the WSGI routes; a streamed body keeps its admission until
+the last chunk has been sent.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, TypeVar
+
+try:  # Prefer Quart, the asyncio implementation of the Flask API.
+    from quart import Blueprint, Response, abort, current_app, jsonify, request
+except ModuleNotFoundError:  # pragma: no cover - fallback for local stub usage
+    from flask_stub import Blueprint, Response, abort, current_app, jsonify, request
+
+from ...bootstrap import resolve_service
+from ...services import InMemoryDatabase
+from ...services.admission import DOWNLOAD_LANE, METADATA_LANE, AdmissionRejected, Ticket
+from ...services.archive import stream_zip
+from ...services.streaming import aiter_chunks
+from ..routes.common import (
+    ARCHIVE_HEADERS,
+    AttachmentStorage,
+    admit_request,
+    attachment_headers,
+    facet_filters,
+    iter_json_array,
+    parse_requested_ids,
+    popular_models,
+    record_downloads,
+    rejection,
+    require_database,
+    require_popularity,
+    require_storage,
+    resolve_batch,
+    select_archive_ids,
+)
+
+router = Blueprint("async_models", __name__, url_prefix="/api/models")
+
+T = TypeVar("T")
+
+# The current request's admission ticket, until a streamed body takes it over.
+_admission: ContextVar[Optional[List[Optional[Ticket]]]] = ContextVar("admission", default=None)
+
+
+def _get_database() -> InMemoryDatabase:
+    return require_database(resolve_service(current_app.config, "DATABASE"))
+
+
+def _get_storage() -> AttachmentStorage:
+    return require_storage(resolve_service(current_app.config, "STORAGE"))
+
+
+def admitted(lane: str) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+    """Admit the request into ``lane`` or answer 429/503 with ``Retry-After``.
+
+    Bodies built with :func:`_body` take the admission over and release it
+    when the stream finishes; otherwise it is released when the handler returns.
+    """
+
+    def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            try:
+                ticket = admit_request(current_app.config, request.remote_addr, request.headers, lane)
+            except AdmissionRejected as exc:
+                payload, status, headers = rejection(exc)
+                return jsonify(payload), status, headers
+            holder = [ticket]
+            token = _admission.set(holder)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _admission.reset(token)
+                if holder[0] is not None:
+                    holder[0].release()
+
+        return wrapper
+
+    return decorator
+
+
+def _body(chunks: Iterable[Any], *, blocking: bool) -> AsyncIterator[bytes]:
+    """Stream ``chunks``, holding the request's admission until they have been sent."""
+
+    holder = _admission.get()
+    on_close = None
+    if holder is not None and holder[0] is not None:
+        on_close, holder[0] = holder[0].release, None
+    return aiter_chunks(chunks, blocking=blocking, on_close=on_close)
+
+
+def _stream(chunks: Iterable[bytes], storage: AttachmentStorage) -> AsyncIterator[bytes]:
+    return _body(chunks, blocking=storage.blocking_reads)
+
+
+async def _off_loop(storage: AttachmentStorage, func: Callable[..., T], *args: Any) -> T:
+    """Run ``func`` on the executor when ``storage`` may block, inline otherwise."""
+
+    if storage.blocking_reads:
+        return await asyncio.to_thread(func, *args)
+    return func(*args)
+
+
+@router.get("")
+@admitted(METADATA_LANE)
+async def list_models():
+    """Return the list of available models, or a batch when ``ids`` is given."""
+
+    database = _get_database()
+    requested_ids = parse_requested_ids(request.args)
+    if requested_ids is not None:
+        return jsonify(resolve_batch(database, requested_ids))
+
+    body = _body(iter_json_array(database.list_models()), blocking=False)
+    return Response(body, mimetype="application/json")
+
+
+@router.get("/facets")
+@admitted(METADATA_LANE)
+async def get_facets():
+    """Return per-value counts for category, owner, tag and visibility."""
+
+    database = _get_database()
+    total, facets = database.catalog.facets(**facet_filters(request.args))
+    return jsonify({"total": total, "facets": facets})
+
+
+@router.get("/popular")
+@admitted(METADATA_LANE)
+async def get_popular():
+    """Return the most downloaded models for ``window`` (24h, 7d or 30d), best first.
+
+    Rankings come from precomputed rolling-window counters; ``limit``
+    defaults to 20.
+    """
+
+    database = _get_database()
+    tracker = require_popularity(resolve_service(current_app.config, "POPULARITY"))
+    # The tracker's lock is also held while a shared tracker's background sync
+    # rebuilds its windows, so ranking and counting stay off the event loop.
+    return jsonify(await asyncio.to_thread(popular_models, database, tracker, request.args))
+
+
+@router.get("/archive")
+@admitted(DOWNLOAD_LANE)
+async def download_archive():
+    """Stream a ZIP of the attachments for ``ids`` or for every model in ``category``."""
+
+    database = _get_database()
+    storage = _get_storage()
+    model_ids = await _off_loop(storage, select_archive_ids, database, storage, request.args)
+    await asyncio.to_thread(record_downloads, resolve_service(current_app.config, "POPULARITY"), model_ids)
+    # Deflate is CPU work even for resident attachments, so every chunk is
+    # produced on the executor.
+    body = _body(stream_zip(storage, model_ids), blocking=True)
+    return Response(body, mimetype="application/zip", headers=dict(ARCHIVE_HEADERS))
+
+
+@router.get("/<model_id>")
+@admitted(METADATA_LANE)
+async def get_model(model_id: str):
+    """Return metadata for a single model or a 404 when missing."""
+
+    database = _get_database()
+    try:
+        model: Dict[str, Any] = database.get_model(model_id)
+    except KeyError:
+        abort(404, description="Model not found.")
+    return jsonify(model)
+
+
+@router.get("/<model_id>/attachment")
+@admitted(DOWNLOAD_LANE)
+async def download_attachment(model_id: str):
+    """Stream the attachment associated with a model as a download."""
+
+    storage = _get_storage()
+    try:
+        filename, size, mimetype, chunks = await _off_loop(storage, storage.stream_attachment, model_id)
+    except KeyError:
+        abort(404, description="Attachment not found.")
+
+    await asyncio.to_thread(record_downloads, resolve_service(current_app.config, "POPULARITY"), [model_id])
+    body = _stream(chunks, storage)
+    return Response(body, mimetype=mimetype, headers=attachment_headers(filename, size))
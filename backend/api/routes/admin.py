@@ -1,45 +1,31 @@
 try:  # Prefer the real Flask package when available.
-    from flask import Blueprint, abort, current_app, jsonify, request
+    from flask import Blueprint, current_app, jsonify, request
 except ModuleNotFoundError:  # pragma: no cover - fallback for local stub usage
-    from flask_stub import Blueprint, abort, current_app, jsonify, request
+    from flask_stub import Blueprint, current_app, jsonify, request
 
-from ...services import SyncManager
+from ...bootstrap import resolve_service
+from .common import get_query_profiler, get_sync_manager, query_stats, require_token
 
 router = Blueprint("admin", __name__, url_prefix="/api/admin")
 
 
-def get_sync_manager() -> SyncManager:
-    manager = current_app.config.get("SYNC_MANAGER")
-    if manager is None:
-        abort(500, description="Sync manager not configured.")
-    return manager
-
-
-def get_expected_token() -> str:
-    token = current_app.config.get("ADMIN_TOKEN")
-    if token is None:
-        abort(500, description="Admin token not configured.")
-    return token
-
-
-def require_token() -> None:
-    expected_token = get_expected_token()
-    provided_token = request.headers.get("X-Admin-Token")
-    if expected_token != provided_token:
-        abort(401, description="Invalid or missing admin token.")
-
-
 @router.post("/sync")
 def trigger_sync():
-    require_token()
-    sync_manager = get_sync_manager()
-    status = sync_manager.trigger()
+    require_token(current_app.config, request.headers)
+    sync_manager = get_sync_manager(current_app.config)
+    status = sync_manager.trigger(resolve_service(current_app.config, "DATABASE"))
     return jsonify(status), 202
 
 
 @router.get("/sync")
 def get_sync_status():
-    require_token()
-    sync_manager = get_sync_manager()
+    require_token(current_app.config, request.headers)
+    sync_manager = get_sync_manager(current_app.config)
     status = sync_manager.status()
     return jsonify(status)
+
+
+@router.get("/queries")
+def get_query_stats():
+    require_token(current_app.config, request.headers)
+    return jsonify(query_stats(get_query_profiler(current_app.config)))
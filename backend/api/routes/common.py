@@ -0,0 +1,252 @@
+"""Request helpers shared by the WSGI and ASGI routes.
+
+Nothing here touches the request or application proxies, so the same code
+serves both the Flask blueprints and their async counterparts; callers pass
+in ``current_app.config``, ``request.args`` or ``request.headers``.
+"""
+
+from __future__ import annotations
+
+import json
+import unicodedata
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Mapping, MutableMapping, Optional, Tuple, Union
+from urllib.parse import quote
+
+try:  # Prefer the real Flask package when available.
+    from flask import abort
+except ModuleNotFoundError:  # pragma: no cover - fallback for local stub usage
+    from flask_stub import abort
+
+from ...bootstrap import resolve_service
+from ...services import InMemoryDatabase, InMemoryStorage, MmapStorage, TieredStorage
+from ...services.admission import AdmissionController, AdmissionRejected, Ticket, client_address
+from ...services.popularity import PopularityTracker
+
+if TYPE_CHECKING:  # only needed for annotations; keeps sqlite3 off the import path
+    from ...repositories.query_profiler import QueryProfiler
+    from ...services import SyncManager
+
+MAX_BATCH_IDS = 100
+JSON_BATCH_ROWS = 512
+DEFAULT_POPULAR_LIMIT = 20
+
+AttachmentStorage = Union[InMemoryStorage, MmapStorage, TieredStorage]
+
+
+def require_database(database: object) -> InMemoryDatabase:
+    """Validate the configured database service or fail with a 500 error."""
+
+    if not isinstance(database, InMemoryDatabase):
+        abort(500, description="Database service not configured.")
+    return database
+
+
+def require_storage(storage: object) -> AttachmentStorage:
+    """Validate the configured storage service or fail with a 500 error."""
+
+    if not isinstance(storage, (InMemoryStorage, MmapStorage, TieredStorage)):
+        abort(500, description="Storage service not configured.")
+    return storage
+
+
+def admit_request(
+    config: Mapping[str, Any], remote_addr: Optional[str], headers: Mapping[str, str], lane: str
+) -> Optional[Ticket]:
+    """Admit a request into ``lane``; ``None`` when admission control is disabled.
+
+    Raises :class:`AdmissionRejected` when the request may not start now.
+    """
+
+    controller = resolve_service(config, "ADMISSION")
+    if not isinstance(controller, AdmissionController):
+        return None
+    client = client_address(remote_addr, headers.get("X-Forwarded-For"), config.get("TRUSTED_PROXIES", ()))
+    return controller.admit(client, lane)
+
+
+def rejection(exc: AdmissionRejected) -> Tuple[Dict[str, str], int, Dict[str, str]]:
+    """Return ``(payload, status, headers)`` for a rejected request."""
+
+    return {"message": exc.reason}, exc.status_code, {"Retry-After": str(exc.retry_after)}
+
+
+def iter_json_array(rows: Iterable[Mapping[str, Any]]) -> Iterator[bytes]:
+    """Encode ``rows`` as a JSON array in batches so the catalog is never copied whole."""
+
+    yield b"["
+    batch: List[str] = []
+    first = True
+    for row in rows:
+        batch.append(json.dumps(row))
+        if len(batch) >= JSON_BATCH_ROWS:
+            yield (("" if first else ",") + ",".join(batch)).encode("utf-8")
+            batch.clear()
+            first = False
+    if batch:
+        yield (("" if first else ",") + ",".join(batch)).encode("utf-8")
+    yield b"]"
+
+
+def parse_requested_ids(args: Any) -> Optional[List[str]]:
+    """Read ``ids`` from the query string as repeated or comma-separated values."""
+
+    raw_values = args.getlist("ids")
+    if not raw_values:
+        return None
+    ids = [value.strip() for raw in raw_values for value in raw.split(",") if value.strip()]
+    if not ids:
+        abort(400, description="At least one model id is required.")
+    if len(ids) > MAX_BATCH_IDS:
+        abort(400, description=f"At most {MAX_BATCH_IDS} model ids may be requested at once.")
+    return ids
+
+
+def resolve_batch(database: InMemoryDatabase, model_ids: List[str]) -> List[Dict[str, Any]]:
+    """Resolve ``model_ids`` in order, marking unknown ids with ``not_found``."""
+
+    resolved = database.get_models(model_ids)
+    return [
+        model if model is not None else {"id": model_id, "not_found": True}
+        for model_id, model in zip(model_ids, resolved)
+    ]
+
+
+def facet_filters(args: Any) -> Dict[str, Any]:
+    """Translate query arguments into ``CompactCatalog.facets`` keyword arguments."""
+
+    return {
+        "category": args.get("category"),
+        "owner": args.get("owner"),
+        "visibility": args.get("visibility"),
+        "tags": args.getlist("tag"),
+    }
+
+
+def select_archive_ids(database: InMemoryDatabase, storage: AttachmentStorage, args: Any) -> List[str]:
+    """Pick the models to archive from ``ids`` or ``category`` and check their attachments.
+
+    Every attachment is checked before the response starts so a missing one
+    still yields a 404 rather than a truncated archive.
+    """
+
+    model_ids = parse_requested_ids(args)
+    if model_ids is None:
+        category = args.get("category")
+        if not category:
+            abort(400, description="Provide model ids or a category to archive.")
+        catalog = database.catalog
+        model_ids = [catalog.id_at(offset) for offset in catalog.offsets_where(category=category)]
+        if not model_ids:
+            abort(404, description="No models match the requested category.")
+
+    model_ids = list(dict.fromkeys(model_ids))
+    for model_id in model_ids:
+        try:
+            storage.describe_attachment(model_id)
+        except KeyError:
+            abort(404, description=f"Attachment not found for model {model_id}.")
+    return model_ids
+
+
+def require_popularity(tracker: object) -> PopularityTracker:
+    """Validate the configured popularity tracker or fail with a 500 error."""
+
+    if not isinstance(tracker, PopularityTracker):
+        abort(500, description="Popularity tracker not configured.")
+    return tracker
+
+
+def record_downloads(tracker: object, model_ids: Iterable[str]) -> None:
+    """Count downloads of ``model_ids`` when a popularity tracker is configured."""
+
+    if isinstance(tracker, PopularityTracker):
+        for model_id in model_ids:
+            tracker.record(model_id)
+
+
+def popular_models(database: InMemoryDatabase, tracker: PopularityTracker, args: Any) -> Dict[str, Any]:
+    """Build the ``/popular`` payload for the ``window`` and ``limit`` query arguments."""
+
+    window = args.get("window", "7d")
+    if window not in tracker.windows:
+        abort(400, description=f"window must be one of {', '.join(tracker.windows)}.")
+    limit = args.get("limit", DEFAULT_POPULAR_LIMIT, type=int)
+    if limit is None or not 1 <= limit <= tracker.top_k:
+        abort(400, description=f"limit must be between 1 and {tracker.top_k}.")
+
+    # Rank the whole top-K so models missing from the catalog do not shrink the page.
+    ranking = tracker.rankings(window, tracker.top_k)
+    models = database.get_models([model_id for model_id, _ in ranking])
+    entries = [
+        dict(model, downloads=downloads)
+        for (_, downloads), model in zip(ranking, models)
+        if model is not None
+    ]
+    return {"window": window, "models": entries[:limit]}
+
+
+def content_disposition(filename: str) -> str:
+    """Build an ``attachment`` disposition that survives any file name.
+
+    The plain ``filename`` parameter is always quoted and limited to
+    printable ASCII; names that need more also get an RFC 5987
+    ``filename*=UTF-8''...`` form, which clients prefer when present.
+    """
+
+    ascii_name = unicodedata.normalize("NFKD", filename).encode("ascii", "ignore").decode("ascii")
+    ascii_name = "".join(char for char in ascii_name if char.isprintable()) or "download"
+    escaped = ascii_name.replace("\\", "\\\\").replace('"', '\\"')
+    value = f'attachment; filename="{escaped}"'
+    if ascii_name != filename:
+        value += "; filename*=UTF-8''" + quote(filename, safe="!#$&+-.^_`|~")
+    return value
+
+
+def attachment_headers(filename: str, size: int) -> Dict[str, str]:
+    """Build download headers for a single attachment of a known size."""
+
+    return {
+        "Content-Disposition": content_disposition(filename),
+        "Content-Length": str(size),
+    }
+
+
+ARCHIVE_HEADERS = {"Content-Disposition": content_disposition("models.zip")}
+
+
+def get_sync_manager(config: MutableMapping[str, Any]) -> "SyncManager":
+    """Return the configured sync manager or fail with a 500 error."""
+
+    manager = resolve_service(config, "SYNC_MANAGER")
+    if manager is None:
+        abort(500, description="Sync manager not configured.")
+    return manager
+
+
+def get_query_profiler(config: MutableMapping[str, Any]) -> "QueryProfiler":
+    """Return the query profiler, or 404 when profiling is not enabled."""
+
+    profiler = resolve_service(config, "QUERY_PROFILER")
+    if profiler is None:
+        abort(404, description="Query profiling is not enabled.")
+    return profiler
+
+
+def require_token(config: Mapping[str, Any], headers: Mapping[str, str]) -> None:
+    """Reject the request unless ``X-Admin-Token`` matches ``ADMIN_TOKEN``."""
+
+    expected_token = config.get("ADMIN_TOKEN")
+    if expected_token is None:
+        abort(500, description="Admin token not configured.")
+    if expected_token != headers.get("X-Admin-Token"):
+        abort(401, description="Invalid or missing admin token.")
+
+
+def query_stats(profiler: "QueryProfiler") -> Dict[str, Any]:
+    """Build the ``/api/admin/queries`` payload."""
+
+    return {
+        "slow_threshold_ms": profiler.slow_threshold_ms,
+        "queries": profiler.snapshot(),
+        "slow_queries": profiler.slow_queries(),
+    }
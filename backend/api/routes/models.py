@@ -2,15 +2,43 @@
 
 from __future__ import annotations
 
-from io import BytesIO
-from typing import Any, Dict, List
+import functools
+from typing import Any, Callable, Dict, Iterable, Iterator, Union
 
 try:  # Prefer the real Flask package when available.
-    from flask import Blueprint, abort, current_app, jsonify, send_file
+    from flask import Blueprint, Response, abort, current_app, jsonify, request, stream_with_context
 except ModuleNotFoundError:  # pragma: no cover - fallback for local stub usage
-    from flask_stub import Blueprint, abort, current_app, jsonify, send_file
-
-from ...services import InMemoryDatabase, InMemoryStorage
+    from flask_stub import (
+        Blueprint,
+        Response,
+        abort,
+        current_app,
+        jsonify,
+        request,
+        stream_with_context,
+    )
+
+from ...bootstrap import resolve_service
+from ...services import InMemoryDatabase
+from ...services.admission import DOWNLOAD_LANE, METADATA_LANE, AdmissionRejected
+from ...services.archive import stream_zip
+from .common import (
+    ARCHIVE_HEADERS,
+    AttachmentStorage,
+    admit_request,
+    attachment_headers,
+    facet_filters,
+    iter_json_array,
+    parse_requested_ids,
+    popular_models,
+    record_downloads,
+    rejection,
+    require_database,
+    require_popularity,
+    require_storage,
+    resolve_batch,
+    select_archive_ids,
+)
 
 router = Blueprint("models", __name__, url_prefix="/api/models")
 
@@ -18,31 +46,120 @@ router = Blueprint("models", __name__, url_prefix="/api/models")
 def _get_database() -> InMemoryDatabase:
     """Retrieve the configured database service or fail with a 500 error."""
 
-    database = current_app.config.get("DATABASE")
-    if not isinstance(database, InMemoryDatabase):
-        abort(500, description="Database service not configured.")
-    return database
+    return require_database(resolve_service(current_app.config, "DATABASE"))
 
 
-def _get_storage() -> InMemoryStorage:
+def _get_storage() -> AttachmentStorage:
     """Retrieve the configured storage service or fail with a 500 error."""
 
-    storage = current_app.config.get("STORAGE")
-    if not isinstance(storage, InMemoryStorage):
-        abort(500, description="Storage service not configured.")
-    return storage
+    return require_storage(resolve_service(current_app.config, "STORAGE"))
+
+
+def admitted(lane: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Admit the request into ``lane`` or answer 429/503 with ``Retry-After``.
+
+    The admission is held until a streamed body has been sent, so a download
+    counts against the limits for as long as it occupies the worker.
+    """
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            try:
+                ticket = admit_request(current_app.config, request.remote_addr, request.headers, lane)
+            except AdmissionRejected as exc:
+                payload, status, headers = rejection(exc)
+                return jsonify(payload), status, headers
+            if ticket is None:
+                return func(*args, **kwargs)
+            try:
+                response = func(*args, **kwargs)
+            except BaseException:
+                ticket.release()
+                raise
+            if isinstance(response, Response) and response.is_streamed:
+                response.call_on_close(ticket.release)
+            else:
+                ticket.release()
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def _as_wsgi_chunks(chunks: Iterable[Union[bytes, memoryview]]) -> Iterator[bytes]:
+    """Hand storage slices to the server one bounded chunk at a time.
+
+    WSGI servers only accept ``bytes``, so each zero-copy slice is
+    materialised just before it is written instead of copying the whole file.
+    """
+
+    for chunk in chunks:
+        yield bytes(chunk)
 
 
 @router.get("")
+@admitted(METADATA_LANE)
 def list_models():
-    """Return the list of available models."""
+    """Return the list of available models, or a batch when ``ids`` is given.
+
+    Batch results follow the requested order; unknown ids are reported as
+    ``{"id": ..., "not_found": true}`` in place of the model.
+    """
+
+    database = _get_database()
+    requested_ids = parse_requested_ids(request.args)
+    if requested_ids is not None:
+        return jsonify(resolve_batch(database, requested_ids))
+
+    body = iter_json_array(database.list_models())
+    return Response(stream_with_context(body), mimetype="application/json")
+
+
+@router.get("/facets")
+@admitted(METADATA_LANE)
+def get_facets():
+    """Return per-value counts for category, owner, tag and visibility.
+
+    Accepts the same facet names as filters; ``tag`` may be repeated and a
+    model must carry every requested tag.
+    """
+
+    database = _get_database()
+    total, facets = database.catalog.facets(**facet_filters(request.args))
+    return jsonify({"total": total, "facets": facets})
+
+
+@router.get("/popular")
+@admitted(METADATA_LANE)
+def get_popular():
+    """Return the most downloaded models for ``window`` (24h, 7d or 30d), best first.
+
+    Rankings come from precomputed rolling-window counters; ``limit``
+    defaults to 20.
+    """
 
     database = _get_database()
-    models: List[Dict[str, Any]] = database.list_models()
-    return jsonify(models)
+    tracker = require_popularity(resolve_service(current_app.config, "POPULARITY"))
+    return jsonify(popular_models(database, tracker, request.args))
+
+
+@router.get("/archive")
+@admitted(DOWNLOAD_LANE)
+def download_archive():
+    """Stream a ZIP of the attachments for ``ids`` or for every model in ``category``."""
+
+    database = _get_database()
+    storage = _get_storage()
+    model_ids = select_archive_ids(database, storage, request.args)
+    record_downloads(resolve_service(current_app.config, "POPULARITY"), model_ids)
+    body = stream_zip(storage, model_ids)
+    return Response(stream_with_context(body), mimetype="application/zip", headers=dict(ARCHIVE_HEADERS))
 
 
 @router.get("/<model_id>")
+@admitted(METADATA_LANE)
 def get_model(model_id: str):
     """Return metadata for a single model or a 404 when missing."""
 
@@ -55,15 +172,16 @@ def get_model(model_id: str):
 
 
 @router.get("/<model_id>/attachment")
+@admitted(DOWNLOAD_LANE)
 def download_attachment(model_id: str):
     """Return the attachment associated with a model as a download."""
 
     storage = _get_storage()
     try:
-        filename, payload, mimetype = storage.get_attachment(model_id)
+        filename, size, mimetype, chunks = storage.stream_attachment(model_id)
     except KeyError:
         abort(404, description="Attachment not found.")
 
-    buffer = BytesIO(payload)
-    buffer.seek(0)
-    return send_file(buffer, mimetype=mimetype, as_attachment=True, download_name=filename)
+    record_downloads(resolve_service(current_app.config, "POPULARITY"), [model_id])
+    body = _as_wsgi_chunks(chunks)
+    return Response(stream_with_context(body), mimetype=mimetype, headers=attachment_headers(filename, size))
@@ -0,0 +1,112 @@
+"""Flask routes for resumable, chunked model file uploads."""
+
+from __future__ import annotations
+
+try:  # Prefer the real Flask package when available.
+    from flask import Blueprint, abort, current_app, jsonify, request
+except ModuleNotFoundError:  # pragma: no cover - fallback for local stub usage
+    from flask_stub import Blueprint, abort, current_app, jsonify, request
+
+from ...bootstrap import resolve_service
+from ...services.uploads import IncompleteUploadError, SessionClosedError, UploadSessionManager
+from .common import require_token
+
+router = Blueprint("uploads", __name__, url_prefix="/api/uploads")
+
+
+def _get_upload_manager() -> UploadSessionManager:
+    """Retrieve the configured upload manager or fail with a 500 error."""
+
+    manager = resolve_service(current_app.config, "UPLOAD_MANAGER")
+    if not isinstance(manager, UploadSessionManager):
+        abort(500, description="Upload manager not configured.")
+    return manager
+
+
+@router.post("")
+def create_session():
+    """Open a session for ``{"filename": ..., "total_size": ...}``."""
+
+    require_token(current_app.config, request.headers)
+    payload = request.get_json(silent=True) or {}
+    filename = payload.get("filename")
+    total_size = payload.get("total_size")
+    if not isinstance(filename, str) or not isinstance(total_size, int):
+        abort(400, description="filename and integer total_size are required.")
+    try:
+        status = _get_upload_manager().create_session(filename, total_size)
+    except ValueError as exc:
+        abort(400, description=str(exc))
+    return jsonify(status), 201
+
+
+@router.get("/<session_id>")
+def get_session(session_id: str):
+    """Report progress, including the chunk indexes still missing."""
+
+    require_token(current_app.config, request.headers)
+    try:
+        status = _get_upload_manager().status(session_id)
+    except KeyError:
+        abort(404, description="Upload session not found.")
+    return jsonify(status)
+
+
+@router.put("/<session_id>/chunks/<index>")
+def put_chunk(session_id: str, index: str):
+    """Store one chunk from the raw request body."""
+
+    require_token(current_app.config, request.headers)
+    if not index.isdigit():
+        abort(400, description="Chunk index must be a non-negative integer.")
+    manager = _get_upload_manager()
+    try:
+        status = manager.write_chunk(session_id, int(index), request.get_data(cache=False))
+    except KeyError:
+        abort(404, description="Upload session not found.")
+    except SessionClosedError as exc:
+        abort(409, description=str(exc))
+    except ValueError as exc:
+        abort(400, description=str(exc))
+    return jsonify(status)
+
+
+@router.post("/<session_id>/commit")
+def commit_session(session_id: str):
+    """Assemble the upload and return metadata for the ``attachments`` row."""
+
+    require_token(current_app.config, request.headers)
+    try:
+        committed = _get_upload_manager().commit(session_id)
+    except KeyError:
+        abort(404, description="Upload session not found.")
+    except IncompleteUploadError as exc:
+        return jsonify({"message": str(exc), "missing": exc.missing}), 409
+    except SessionClosedError as exc:
+        abort(409, description=str(exc))
+    return (
+        jsonify(
+            {
+                "file_name": committed.path.name,
+                "file_path": str(committed.path),
+                "file_size": committed.size,
+                "checksum_md5": committed.md5,
+                "checksum_sha256": committed.sha256,
+                "checksum_algorithm": committed.checksum_algorithm,
+                "checksum": committed.checksum,
+            }
+        ),
+        201,
+    )
+
+
+@router.delete("/<session_id>")
+def abort_session(session_id: str):
+    """Discard a session and its staged chunks."""
+
+    require_token(current_app.config, request.headers)
+    try:
+        _get_upload_manager().abort(session_id)
+    except KeyError:
+        abort(404, description="Upload session not found.")
+    return jsonify({"session_id": session_id, "state": "aborted"})
@@ -0,0 +1,37 @@
+"""Application entrypoint for serving the async blueprints with an ASGI server.
+
+Run with ``hypercorn backend.asgi:app`` (installed alongside Quart) to serve
+download-heavy traffic from a few event loops instead of one thread per
+connection.
+"""
+
+from __future__ import annotations
+
+try:  # Prefer Quart, the asyncio implementation of the Flask API.
+    from quart import Quart
+except ModuleNotFoundError:  # pragma: no cover - fallback for local stub usage
+    from flask_stub import Flask as Quart
+
+from .api.async_routes import admin, models
+from .bootstrap import configure_services, seed_popularity, warm_up
+
+
+def create_asgi_app() -> Quart:
+    app = Quart(__name__)
+    configure_services(app.config)
+
+    app.register_blueprint(models.router)
+    app.register_blueprint(admin.router)
+
+    @app.route("/health")
+    async def healthcheck() -> dict[str, str]:
+        """Simple healthcheck endpoint used by infrastructure checks."""
+
+        return {"status": "ok"}
+
+    return app
+
+
+app = create_asgi_app()
+warm_up(app.config)
+seed_popularity(app.config)
@@ -0,0 +1,235 @@
+"""Service wiring shared by the WSGI and ASGI application factories.
+
+This module deliberately avoids importing any web framework so both app
+factories, and tooling that only needs the services, can use it cheaply.
+"""
+
+from __future__ import annotations
+
+import gc
+import logging
+import os
+import tempfile
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Generic, MutableMapping, TypeVar
+
+from .services import (
+    InMemoryDatabase,
+    InMemoryStorage,
+    MmapStorage,
+    SharedCatalogDatabase,
+    SyncManager,
+    TieredStorage,
+)
+from .services.admission import DEFAULT_WORKER_THREADS, AdmissionController, lanes_for_threads, parse_networks
+from .services.popularity import PopularityTracker, SharedPopularityTracker
+from .services.storage.tiered import DEFAULT_CACHE_BYTES, LocalDirectoryBackend
+from .services.uploads import UploadSessionManager
+
+if TYPE_CHECKING:  # the repositories import sqlite3; keep it off the import path
+    import sqlite3
+
+    from .repositories.favorite_repository import FavoriteRepository
+    from .repositories.model_repository import ModelRepository
+    from .repositories.query_profiler import QueryProfiler
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+SERVICE_KEYS = ("DATABASE", "STORAGE", "SYNC_MANAGER", "UPLOAD_MANAGER", "ADMISSION", "POPULARITY")
+
+
+class LazyService(Generic[T]):
+    """Build a service on first use; later calls return the same instance."""
+
+    def __init__(self, factory: Callable[[], T]) -> None:
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._instance: T | None = None
+        self._built = False
+
+    @property
+    def built(self) -> bool:
+        return self._built
+
+    def get(self) -> T:
+        if not self._built:
+            with self._lock:
+                if not self._built:
+                    self._instance = self._factory()
+                    self._built = True
+        return self._instance  # type: ignore[return-value]
+
+
+def _build_database() -> InMemoryDatabase:
+    # CATALOG_SNAPSHOT names a memory-mapped catalog file shared by all
+    # workers; without it every process keeps its own in-memory catalog.
+    snapshot_path = os.environ.get("CATALOG_SNAPSHOT")
+    return SharedCatalogDatabase(snapshot_path) if snapshot_path else InMemoryDatabase()
+
+
+def _build_storage() -> InMemoryStorage | MmapStorage | TieredStorage:
+    # ATTACHMENT_BACKEND_ROOT points at slow (network-mounted) storage fronted
+    # by a local cache in ATTACHMENT_CACHE_ROOT capped at ATTACHMENT_CACHE_BYTES.
+    backend_root = os.environ.get("ATTACHMENT_BACKEND_ROOT")
+    cache_root = os.environ.get("ATTACHMENT_CACHE_ROOT")
+    if backend_root and cache_root:
+        return TieredStorage(
+            LocalDirectoryBackend(backend_root),
+            cache_root,
+            max_bytes=int(os.environ.get("ATTACHMENT_CACHE_BYTES") or DEFAULT_CACHE_BYTES),
+            policy=os.environ.get("ATTACHMENT_CACHE_POLICY") or "lru",
+        )
+    # ATTACHMENT_ROOT switches to file-backed storage whose mappings are
+    # shared between worker processes through the page cache.
+    attachment_root = os.environ.get("ATTACHMENT_ROOT")
+    return MmapStorage(attachment_root) if attachment_root else InMemoryStorage()
+
+
+def _build_upload_manager() -> UploadSessionManager:
+    upload_root = os.environ.get("UPLOAD_ROOT") or os.path.join(tempfile.gettempdir(), "bambu-uploads")
+    return UploadSessionManager(upload_root)
+
+
+def _load_popularity(tracker: PopularityTracker) -> None:
+    # The backfill reads download_records through SQLAlchemy; deployments
+    # without it, or without that database, start with empty rankings.
+    try:
+        from sqlalchemy.exc import SQLAlchemyError
+
+        from .tasks.popularity import seed_from_database
+    except ModuleNotFoundError:
+        logger.info("SQLAlchemy is not installed; popularity rankings start empty")
+        return
+    try:
+        seed_from_database(tracker)
+    except SQLAlchemyError:
+        logger.warning("Could not backfill popularity rankings", exc_info=True)
+
+
+def _build_popularity() -> PopularityTracker:
+    # POPULARITY_STATE names an SQLite file through which all workers share
+    # their download counts; without it every process ranks on its own.
+    state_path = os.environ.get("POPULARITY_STATE")
+    if state_path:
+        return SharedPopularityTracker(state_path)
+    return PopularityTracker()
+
+
+def _build_admission() -> AdmissionController:
+    # WORKER_THREADS must match the server's threads per worker (gunicorn.conf.py
+    # reads the same variable) so the download lane leaves threads for browsing.
+    threads = int(os.environ.get("WORKER_THREADS") or DEFAULT_WORKER_THREADS)
+    return AdmissionController(lanes_for_threads(threads))
+
+
+def _build_query_profiler() -> QueryProfiler:
+    # Statements slower than QUERY_PROFILE_SLOW_MS milliseconds are explained.
+    from .repositories.query_profiler import QueryProfiler
+
+    return QueryProfiler(slow_threshold_ms=float(os.environ["QUERY_PROFILE_SLOW_MS"]))
+
+
+def configure_services(config: MutableMapping[str, Any]) -> None:
+    """Register lazily built services in ``config``; nothing is constructed yet."""
+
+    config["DATABASE"] = LazyService(_build_database)
+    config["STORAGE"] = LazyService(_build_storage)
+    config["SYNC_MANAGER"] = LazyService(SyncManager)
+    config["UPLOAD_MANAGER"] = LazyService(_build_upload_manager)
+    # Per-client limits for the models blueprint; set to None to disable.
+    config["ADMISSION"] = LazyService(_build_admission)
+    # Proxies whose X-Forwarded-For is believed when keying admission by client.
+    config["TRUSTED_PROXIES"] = parse_networks(os.environ.get("TRUSTED_PROXIES", ""))
+    # Rolling download counts behind /api/models/popular, seeded from the
+    # download records by seed_popularity().
+    config["POPULARITY"] = LazyService(_build_popularity)
+    config["ADMIN_TOKEN"] = "secret-token"
+    # Opt-in through QUERY_PROFILE_SLOW_MS; repositories built with
+    # model_repository() / favorite_repository() report to it.
+    config["QUERY_PROFILER"] = (
+        LazyService(_build_query_profiler) if os.environ.get("QUERY_PROFILE_SLOW_MS") else None
+    )
+
+
+def resolve_service(config: MutableMapping[str, Any], key: str) -> Any:
+    """Return the service stored under ``key``, building it on first access."""
+
+    value = config.get(key)
+    if isinstance(value, LazyService):
+        return value.get()
+    return value
+
+
+def warm_up(config: MutableMapping[str, Any]) -> None:
+    """Build every service and let it preload caches before traffic arrives.
+
+    Call this before the server starts accepting requests. Under gunicorn
+    ``--preload`` it runs once in the master and forked workers inherit the
+    warmed state; see :func:`freeze_before_fork`.
+    """
+
+    for key in SERVICE_KEYS:
+        service = resolve_service(config, key)
+        hook = getattr(service, "warm_up", None)
+        if callable(hook):
+            hook()
+
+
+def model_repository(config: MutableMapping[str, Any], connection: sqlite3.Connection) -> ModelRepository:
+    """Build a :class:`ModelRepository` that reports to the query profiler, if enabled."""
+
+    from .repositories.model_repository import ModelRepository
+
+    return ModelRepository(connection, profiler=resolve_service(config, "QUERY_PROFILER"))
+
+
+def favorite_repository(config: MutableMapping[str, Any], connection: sqlite3.Connection) -> FavoriteRepository:
+    """Build a :class:`FavoriteRepository` that reports to the query profiler, if enabled."""
+
+    from .repositories.favorite_repository import FavoriteRepository
+
+    return FavoriteRepository(connection, profiler=resolve_service(config, "QUERY_PROFILER"))
+
+
+def seed_popularity(
+    config: MutableMapping[str, Any], loader: Callable[[PopularityTracker], object] | None = None
+) -> bool:
+    """Backfill empty popularity rankings from ``download_records``; return whether it ran.
+
+    Kept out of :func:`warm_up` because it loads the database layer, which
+    the app otherwise never imports. ``gunicorn.conf.py`` calls it in the
+    master before forking (or in each worker without ``preload_app``); the
+    backfill disposes of its pooled connections, so none is inherited.
+    """
+
+    tracker = resolve_service(config, "POPULARITY")
+    if not isinstance(tracker, PopularityTracker):
+        return False
+    return tracker.seed(loader or _load_popularity)
+
+
+def freeze_before_fork() -> None:
+    """Move every object alive now out of the garbage collector's reach.
+
+    Only useful in a process that is about to fork workers (the gunicorn
+    master with ``preload_app``): the collector then never writes to those
+    objects in the children, so their pages stay shared copy-on-write. In a
+    process that does not fork, frozen objects are simply never collected.
+    """
+
+    gc.freeze()
+
+
+__all__ = [
+    "LazyService",
+    "SERVICE_KEYS",
+    "configure_services",
+    "favorite_repository",
+    "freeze_before_fork",
+    "model_repository",
+    "resolve_service",
+    "seed_popularity",
+    "warm_up",
+]
@@ -0,0 +1,46 @@
+"""Apply ``schema.sql`` and the numbered migrations to a SQLite connection."""
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+from typing import List, Tuple
+
+DB_DIRECTORY = Path(__file__).resolve().parent
+SCHEMA_PATH = DB_DIRECTORY / "schema.sql"
+MIGRATIONS_DIRECTORY = DB_DIRECTORY / "migrations"
+
+
+def _pending_migrations(current_version: int) -> List[Tuple[int, Path]]:
+    migrations = []
+    for path in sorted(MIGRATIONS_DIRECTORY.glob("*.sql")):
+        version = int(path.name.split("_", 1)[0])
+        if version > current_version:
+            migrations.append((version, path))
+    return migrations
+
+
+def apply_migrations(connection: sqlite3.Connection) -> int:
+    """Run migrations newer than ``PRAGMA user_version`` and return the final version.
+
+    Each migration runs in its own transaction together with the version bump,
+    so a failed migration leaves the database at the previous version.
+    """
+    version = connection.execute("PRAGMA user_version").fetchone()[0]
+    for version, path in _pending_migrations(version):
+        script = path.read_text()
+        try:
+            connection.executescript(f"BEGIN;\n{script}\nPRAGMA user_version = {version};\nCOMMIT;")
+        except sqlite3.Error:
+            if connection.in_transaction:
+                connection.rollback()
+            raise
+    return version
+
+
+def initialize_database(connection: sqlite3.Connection) -> int:
+    """Create the base schema and bring it up to the latest migration."""
+    connection.executescript(SCHEMA_PATH.read_text())
+    return apply_migrations(connection)
+
+
+__all__ = ["apply_migrations", "initialize_database"]
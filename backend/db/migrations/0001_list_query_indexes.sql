@@ -0,0 +1,60 @@
+-- Indexes and denormalized tag names for the model list query
+
+-- Tag filters go from tag to model, which the (model_id, tag_id) primary key cannot serve.
+CREATE INDEX IF NOT EXISTS idx_model_tag_tag_model ON model_tag(tag_id, model_id);
+
+-- Visibility-filtered listings ordered by recency, resolved from the index alone.
+CREATE INDEX IF NOT EXISTS idx_models_visibility_updated ON models(visibility, updated_at, id);
+
+-- Author pages ordered by recency without a temporary sort.
+CREATE INDEX IF NOT EXISTS idx_models_author_updated ON models(author_id, updated_at);
+
+-- Comma-separated, alphabetically ordered tag names so cards need no joins.
+ALTER TABLE models ADD COLUMN tag_names TEXT NOT NULL DEFAULT '';
+
+UPDATE models SET tag_names = COALESCE(
+    (SELECT group_concat(name, ',') FROM (
+        SELECT t.name FROM model_tag mt JOIN tags t ON t.id = mt.tag_id
+        WHERE mt.model_id = models.id ORDER BY t.name
+    )),
+    ''
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_model_tag_insert_tag_names
+AFTER INSERT ON model_tag
+BEGIN
+    UPDATE models SET tag_names = COALESCE(
+        (SELECT group_concat(name, ',') FROM (
+            SELECT t.name FROM model_tag mt JOIN tags t ON t.id = mt.tag_id
+            WHERE mt.model_id = NEW.model_id ORDER BY t.name
+        )),
+        ''
+    )
+    WHERE id = NEW.model_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_model_tag_delete_tag_names
+AFTER DELETE ON model_tag
+BEGIN
+    UPDATE models SET tag_names = COALESCE(
+        (SELECT group_concat(name, ',') FROM (
+            SELECT t.name FROM model_tag mt JOIN tags t ON t.id = mt.tag_id
+            WHERE mt.model_id = OLD.model_id ORDER BY t.name
+        )),
+        ''
+    )
+    WHERE id = OLD.model_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tags_rename_tag_names
+AFTER UPDATE OF name ON tags
+BEGIN
+    UPDATE models SET tag_names = COALESCE(
+        (SELECT group_concat(name, ',') FROM (
+            SELECT t.name FROM model_tag mt JOIN tags t ON t.id = mt.tag_id
+            WHERE mt.model_id = models.id ORDER BY t.name
+        )),
+        ''
+    )
+    WHERE id IN (SELECT model_id FROM model_tag WHERE tag_id = NEW.id);
+END;
@@ -0,0 +1,9 @@
+-- Record which algorithm produced each attachment digest
+
+-- e.g. 'sha256', 'blake2b' or a tree hash such as 'tree-blake2b:8388608'.
+ALTER TABLE attachments ADD COLUMN checksum_algorithm TEXT;
+ALTER TABLE attachments ADD COLUMN checksum TEXT;
+
+UPDATE attachments
+SET checksum_algorithm = 'sha256', checksum = checksum_sha256
+WHERE checksum_sha256 IS NOT NULL;
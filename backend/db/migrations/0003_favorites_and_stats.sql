@@ -0,0 +1,40 @@
+-- Favorites and per-model counters, with favorite counts maintained by triggers
+
+CREATE TABLE IF NOT EXISTS favorites (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    model_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (model_id) REFERENCES models(id),
+    CONSTRAINT uix_model_user UNIQUE (model_id, user_id)
+);
+
+-- A user's favorites, and batched "which of these ids" lookups, from the index alone.
+CREATE INDEX IF NOT EXISTS idx_favorites_user_model ON favorites(user_id, model_id);
+
+CREATE TABLE IF NOT EXISTS model_stats (
+    model_id INTEGER PRIMARY KEY,
+    downloads INTEGER NOT NULL DEFAULT 0,
+    favorites INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Triggers only fire for rows actually inserted or deleted, so repeated
+-- favorite/unfavorite requests leave the counter unchanged.
+CREATE TRIGGER IF NOT EXISTS trg_favorites_insert_stats
+AFTER INSERT ON favorites
+BEGIN
+    INSERT INTO model_stats (model_id, favorites) VALUES (NEW.model_id, 1)
+    ON CONFLICT (model_id) DO UPDATE SET
+        favorites = favorites + 1,
+        updated_at = CURRENT_TIMESTAMP;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_favorites_delete_stats
+AFTER DELETE ON favorites
+BEGIN
+    UPDATE model_stats SET
+        favorites = MAX(favorites - 1, 0),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE model_id = OLD.model_id;
+END;
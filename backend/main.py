@@ -3,8 +3,12 @@
 from __future__ import annotations
 
 from .app import create_app
+from .bootstrap import warm_up
 
+# The only place the WSGI app is built. With ``gunicorn --preload`` this runs
+# once in the master and the warmed services are shared by forked workers.
 app = create_app()
+warm_up(app.config)
 
 
 @app.route("/health")
@@ -1,9 +1,10 @@
 """Application database models."""
 from .base import Base
-from .model import Model, ModelStats
+from .model import Attachment, Model, ModelStats
 from .records import DownloadRecord, Favorite
 
 __all__ = [
+    "Attachment",
     "Base",
     "Model",
     "ModelStats",
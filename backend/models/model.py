@@ -3,7 +3,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Integer, String
 
 from .base import Base
 
@@ -21,6 +21,24 @@ class Model(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
 
+class Attachment(Base):
+    """A stored file belonging to a model, with the digest recorded at upload."""
+
+    __tablename__ = "attachments"
+
+    id = Column(Integer, primary_key=True)
+    model_id = Column(Integer, ForeignKey("models.id"), nullable=False, index=True)
+    file_name = Column(String(255), nullable=False)
+    file_path = Column(String(512), nullable=False)
+    file_size = Column(BigInteger, nullable=True)
+    checksum_md5 = Column(String(32), nullable=True)
+    checksum_sha256 = Column(String(64), nullable=True)
+    # Added by migration 0002; rows from before it were backfilled as sha256.
+    checksum_algorithm = Column(String(64), nullable=True)
+    checksum = Column(String(128), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
 class ModelStats(Base):
     """Aggregated statistics for downloads and favorites."""
 
@@ -0,0 +1,67 @@
+"""Repository helpers for the ``favorites`` table."""
+from __future__ import annotations
+
+import sqlite3
+from typing import List, Optional, Sequence, Set, Union
+
+from .query_profiler import ProfiledCursor, QueryProfiler
+
+
+class FavoriteRepository:
+    """Read and write favorites; ``model_stats.favorites`` follows via triggers."""
+
+    def __init__(self, connection: sqlite3.Connection, profiler: Optional[QueryProfiler] = None):
+        self._connection = connection
+        self._profiler = profiler
+
+    def _execute(self, sql: str, parameters: Sequence[object]) -> Union[sqlite3.Cursor, ProfiledCursor]:
+        """Run a statement, routing it through the profiler when one is attached."""
+        if self._profiler is not None:
+            return self._profiler.execute(self._connection, sql, parameters)
+        return self._connection.execute(sql, parameters)
+
+    def favorited_among(self, user_id: int, model_ids: Sequence[int]) -> Set[int]:
+        """Return which of ``model_ids`` the user has favorited, with one ``IN`` query."""
+        if not model_ids:
+            return set()
+        unique_ids = list(dict.fromkeys(model_ids))
+        placeholders = ",".join(["?"] * len(unique_ids))
+        sql = f"SELECT model_id FROM favorites WHERE user_id = ? AND model_id IN ({placeholders})"
+        cursor = self._execute(sql, [user_id, *unique_ids])
+        return {row[0] for row in cursor.fetchall()}
+
+    def list_favorite_ids(self, user_id: int, limit: Optional[int] = None) -> List[int]:
+        """Return the ids of the user's favorites, at most ``limit`` of them."""
+        sql = "SELECT model_id FROM favorites WHERE user_id = ?"
+        parameters: List[object] = [user_id]
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+        cursor = self._execute(sql, parameters)
+        return [row[0] for row in cursor.fetchall()]
+
+    def add_favorite(self, user_id: int, model_id: int) -> bool:
+        """Favorite a model; return ``False`` when it already was.
+
+        A single ``INSERT ... ON CONFLICT DO NOTHING`` is idempotent, and the
+        insert trigger bumps ``model_stats.favorites`` only for new rows.
+        """
+        with self._connection:
+            cursor = self._execute(
+                "INSERT INTO favorites (model_id, user_id) VALUES (?, ?) "
+                "ON CONFLICT (model_id, user_id) DO NOTHING",
+                [model_id, user_id],
+            )
+        return cursor.rowcount == 1
+
+    def remove_favorite(self, user_id: int, model_id: int) -> bool:
+        """Unfavorite a model; return ``False`` when it was not favorited."""
+        with self._connection:
+            cursor = self._execute(
+                "DELETE FROM favorites WHERE model_id = ? AND user_id = ?",
+                [model_id, user_id],
+            )
+        return cursor.rowcount == 1
+
+
+__all__ = ["FavoriteRepository"]
@@ -2,114 +2,134 @@
 from __future__ import annotations
 
 import sqlite3
-from typing import List, Optional, Sequence
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from .query_profiler import ProfiledCursor, QueryProfiler
 
 
 class ModelRepository:
     """High level query helpers for the ``models`` table."""
 
-    def __init__(self, connection: sqlite3.Connection):
+    def __init__(self, connection: sqlite3.Connection, profiler: Optional[QueryProfiler] = None):
         self._connection = connection
         self._connection.row_factory = sqlite3.Row
+        self._profiler = profiler
 
-    def list_models(
-        self,
+    def _execute(self, sql: str, parameters: Sequence[object]) -> Union[sqlite3.Cursor, ProfiledCursor]:
+        """Run a statement, routing it through the profiler when one is attached."""
+        if self._profiler is not None:
+            return self._profiler.execute(self._connection, sql, parameters)
+        return self._connection.execute(sql, parameters)
+
+    @staticmethod
+    def _filters(
         *,
-        page: int = 1,
-        page_size: int = 20,
-        keywords: Optional[str] = None,
-        tags: Optional[Sequence[str]] = None,
-        author_ids: Optional[Sequence[int]] = None,
-    ) -> List[sqlite3.Row]:
-        """Fetch paginated models with optional keyword search and tag filtering."""
-        query = [
-            "SELECT m.* FROM models m",
-        ]
+        keywords: Optional[str],
+        tags: Optional[Sequence[str]],
+        author_ids: Optional[Sequence[int]],
+        visibility: Optional[str],
+    ) -> Tuple[List[str], List[object]]:
+        """Build the WHERE conditions shared by listing and counting."""
         parameters: List[object] = []
-        joins: List[str] = []
         wheres: List[str] = []
 
+        if visibility is not None:
+            wheres.append("m.visibility = ?")
+            parameters.append(visibility)
+
+        if author_ids:
+            if len(author_ids) == 1:
+                # Equality lets the (author_id, updated_at) index also serve the ordering.
+                wheres.append("m.author_id = ?")
+            else:
+                placeholders = ",".join(["?"] * len(author_ids))
+                wheres.append(f"m.author_id IN ({placeholders})")
+            parameters.extend(author_ids)
+
         if tags:
-            joins.append(
-                "JOIN model_tag mt ON mt.model_id = m.id "
-                "JOIN tags t ON t.id = mt.tag_id"
-            )
+            # Resolve tags to model ids through model_tag(tag_id, model_id) and
+            # require every requested tag, instead of joining and grouping the
+            # whole listing.
             placeholders = ",".join(["?"] * len(tags))
-            wheres.append(f"t.name IN ({placeholders})")
+            wheres.append(
+                "m.id IN (SELECT mt.model_id FROM tags t "
+                "JOIN model_tag mt ON mt.tag_id = t.id "
+                f"WHERE t.name IN ({placeholders}) "
+                "GROUP BY mt.model_id HAVING COUNT(DISTINCT t.id) = ?)"
+            )
             parameters.extend(tags)
+            parameters.append(len(set(tags)))
 
         if keywords:
             wheres.append("(m.name LIKE ? OR m.description LIKE ?)")
             pattern = f"%{keywords}%"
             parameters.extend([pattern, pattern])
 
-        if author_ids:
-            placeholders = ",".join(["?"] * len(author_ids))
-            wheres.append(f"m.author_id IN ({placeholders})")
-            parameters.extend(author_ids)
-
-        if joins:
-            query.extend(joins)
+        return wheres, parameters
 
+    def list_models(
+        self,
+        *,
+        page: int = 1,
+        page_size: int = 20,
+        keywords: Optional[str] = None,
+        tags: Optional[Sequence[str]] = None,
+        author_ids: Optional[Sequence[int]] = None,
+        visibility: Optional[str] = None,
+    ) -> List[sqlite3.Row]:
+        """Fetch paginated models with optional keyword search and tag filtering.
+
+        Once the list-query migration is applied, each row carries ``tag_names``
+        so cards can be rendered without joining the tag tables.
+        """
+        wheres, parameters = self._filters(
+            keywords=keywords, tags=tags, author_ids=author_ids, visibility=visibility
+        )
+        query = ["SELECT m.* FROM models m"]
         if wheres:
             query.append("WHERE " + " AND ".join(wheres))
-
-        query.append("GROUP BY m.id")
-
-        if tags:
-            # ensure all tags matched by counting tag occurrences
-            query.append("HAVING COUNT(DISTINCT t.name) = ?")
-            parameters.append(len(tags))
-
         query.append("ORDER BY m.updated_at DESC")
         query.append("LIMIT ? OFFSET ?")
         parameters.extend([page_size, (page - 1) * page_size])
 
         sql = " ".join(query)
-        cursor = self._connection.execute(sql, parameters)
+        cursor = self._execute(sql, parameters)
         return cursor.fetchall()
 
+    def get_models_by_ids(self, model_ids: Sequence[int]) -> List[Optional[sqlite3.Row]]:
+        """Fetch several models with one ``IN`` query, preserving the requested order.
+
+        Ids without a matching row are returned as ``None``.
+        """
+        if not model_ids:
+            return []
+        unique_ids = list(dict.fromkeys(model_ids))
+        placeholders = ",".join(["?"] * len(unique_ids))
+        sql = f"SELECT m.* FROM models m WHERE m.id IN ({placeholders})"
+        cursor = self._execute(sql, unique_ids)
+        rows: Dict[int, sqlite3.Row] = {row["id"]: row for row in cursor.fetchall()}
+        return [rows.get(model_id) for model_id in model_ids]
+
     def count_models(
         self,
         *,
         keywords: Optional[str] = None,
         tags: Optional[Sequence[str]] = None,
         author_ids: Optional[Sequence[int]] = None,
+        visibility: Optional[str] = None,
     ) -> int:
         """Return the total number of models that match the filters."""
-        query = ["SELECT COUNT(DISTINCT m.id) FROM models m"]
-        parameters: List[object] = []
-        joins: List[str] = []
-        wheres: List[str] = []
-
-        if tags:
-            joins.append(
-                "JOIN model_tag mt ON mt.model_id = m.id "
-                "JOIN tags t ON t.id = mt.tag_id"
-            )
-            placeholders = ",".join(["?"] * len(tags))
-            wheres.append(f"t.name IN ({placeholders})")
-            parameters.extend(tags)
-
-        if keywords:
-            wheres.append("(m.name LIKE ? OR m.description LIKE ?)")
-            pattern = f"%{keywords}%"
-            parameters.extend([pattern, pattern])
-
-        if author_ids:
-            placeholders = ",".join(["?"] * len(author_ids))
-            wheres.append(f"m.author_id IN ({placeholders})")
-            parameters.extend(author_ids)
-
-        if joins:
-            query.extend(joins)
-
+        wheres, parameters = self._filters(
+            keywords=keywords, tags=tags, author_ids=author_ids, visibility=visibility
+        )
+        query = ["SELECT COUNT(*) FROM models m"]
         if wheres:
             query.append("WHERE " + " AND ".join(wheres))
 
         sql = " ".join(query)
-        cursor = self._connection.execute(sql, parameters)
+        cursor = self._execute(sql, parameters)
         result = cursor.fetchone()
+        cursor.close()  # only one row is read, so the rows never run out
         return int(result[0]) if result else 0
 
 
@@ -0,0 +1,217 @@
+"""Opt-in profiling of SQL statements issued by the repository layer."""
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence
+
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and variable-length ``IN (?, ?, ...)`` lists.
+
+    Queries that only differ in the number of filter values share a single
+    aggregation bucket this way.
+    """
+    collapsed = _WHITESPACE.sub(" ", sql).strip()
+    return _PLACEHOLDER_LIST.sub("?...", collapsed)
+
+
+def parameter_shape(parameters: Sequence[object]) -> str:
+    """Describe the parameters by type only so no user values are retained."""
+    return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+
+
+def _is_full_scan(detail: str) -> bool:
+    # SQLite reports index lookups as "SEARCH ..." and visits of every row as
+    # "SCAN ...", including walks over a whole index in ORDER BY order.
+    return detail.startswith("SCAN ") and detail != "SCAN CONSTANT ROW"
+
+
+class QueryProfiler:
+    """Record timings for executed statements and explain the slow ones."""
+
+    def __init__(self, *, slow_threshold_ms: float = 100.0, max_slow_samples: int = 50) -> None:
+        self.slow_threshold_ms = slow_threshold_ms
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, object]] = {}
+        self._slow_samples: Deque[Dict[str, object]] = deque(maxlen=max_slow_samples)
+
+    def execute(
+        self,
+        connection: sqlite3.Connection,
+        sql: str,
+        parameters: Sequence[object] = (),
+    ) -> "ProfiledCursor":
+        """Execute ``sql`` on ``connection`` and record how long it took.
+
+        SQLite produces most rows lazily while they are fetched, so the
+        returned cursor keeps timing through ``fetch*`` and iteration and the
+        statement is recorded once its rows are exhausted or it is closed, so
+        callers that stop reading early must close it. Statements without a
+        result set are recorded immediately.
+        """
+        started = time.perf_counter()
+        cursor = connection.execute(sql, parameters)
+        elapsed = time.perf_counter() - started
+        profiled = ProfiledCursor(self, connection, cursor, sql, parameters, elapsed)
+        if cursor.description is None:
+            profiled.close()
+        return profiled
+
+    def _finish(
+        self,
+        connection: sqlite3.Connection,
+        sql: str,
+        parameters: Sequence[object],
+        elapsed: float,
+    ) -> None:
+        duration_ms = elapsed * 1000.0
+        plan: Optional[List[str]] = None
+        if duration_ms >= self.slow_threshold_ms:
+            plan = self._explain(connection, sql, parameters)
+        self._record(sql, parameters, duration_ms, plan)
+
+    def snapshot(self) -> List[Dict[str, object]]:
+        """Return aggregated statistics ordered by total time spent."""
+        with self._lock:
+            entries = [dict(entry, param_shapes=sorted(entry["param_shapes"])) for entry in self._stats.values()]
+        for entry in entries:
+            entry["avg_ms"] = entry["total_ms"] / entry["count"]
+        entries.sort(key=lambda entry: entry["total_ms"], reverse=True)
+        return entries
+
+    def slow_queries(self) -> List[Dict[str, object]]:
+        """Return the most recent slow statements, newest last."""
+        with self._lock:
+            return [dict(sample) for sample in self._slow_samples]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._slow_samples.clear()
+
+    @staticmethod
+    def _explain(connection: sqlite3.Connection, sql: str, parameters: Sequence[object]) -> List[str]:
+        rows = connection.execute(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+        # Each row is (id, parent, notused, detail); only the detail is useful.
+        return [row[3] for row in rows]
+
+    def _record(
+        self,
+        sql: str,
+        parameters: Sequence[object],
+        duration_ms: float,
+        plan: Optional[List[str]],
+    ) -> None:
+        normalized = normalize_sql(sql)
+        shape = parameter_shape(parameters)
+        full_scan = bool(plan) and any(_is_full_scan(detail) for detail in plan)
+
+        with self._lock:
+            entry = self._stats.get(normalized)
+            if entry is None:
+                entry = {
+                    "sql": normalized,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "slow_count": 0,
+                    "full_scan": False,
+                    "plan": None,
+                    "param_shapes": set(),
+                }
+                self._stats[normalized] = entry
+            entry["count"] += 1
+            entry["total_ms"] += duration_ms
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+            entry["param_shapes"].add(shape)
+            if plan is not None:
+                entry["slow_count"] += 1
+                entry["plan"] = plan
+                entry["full_scan"] = entry["full_scan"] or full_scan
+                self._slow_samples.append(
+                    {
+                        "sql": normalized,
+                        "param_shape": shape,
+                        "duration_ms": duration_ms,
+                        "plan": plan,
+                        "full_scan": full_scan,
+                    }
+                )
+
+
+class ProfiledCursor:
+    """Cursor wrapper that adds fetch time to the statement's recorded duration.
+
+    The timing is recorded when the rows run out or on :meth:`close`,
+    whichever happens first. A cursor dropped without either is not recorded.
+    """
+
+    def __init__(
+        self,
+        profiler: QueryProfiler,
+        connection: sqlite3.Connection,
+        cursor: sqlite3.Cursor,
+        sql: str,
+        parameters: Sequence[object],
+        elapsed: float,
+    ) -> None:
+        self._profiler = profiler
+        self._connection = connection
+        self._cursor = cursor
+        self._sql = sql
+        self._parameters = parameters
+        self._elapsed = elapsed
+        self._finished = False
+
+    def fetchone(self) -> Any:
+        started = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._elapsed += time.perf_counter() - started
+        if row is None:
+            self.close()
+        return row
+
+    def fetchmany(self, size: Optional[int] = None) -> List[Any]:
+        size = self._cursor.arraysize if size is None else size
+        started = time.perf_counter()
+        rows = self._cursor.fetchmany(size)
+        self._elapsed += time.perf_counter() - started
+        if len(rows) < size:
+            self.close()
+        return rows
+
+    def fetchall(self) -> List[Any]:
+        started = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._elapsed += time.perf_counter() - started
+        self.close()
+        return rows
+
+    def __iter__(self) -> Iterator[Any]:
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def close(self) -> None:
+        if self._finished:
+            return
+        self._finished = True
+        # Reset the statement before a slow one is explained on the same connection.
+        self._cursor.close()
+        self._profiler._finish(self._connection, self._sql, self._parameters, self._elapsed)
+
+    def __getattr__(self, name: str) -> Any:
+        # rowcount, lastrowid, description, ... come from the real cursor.
+        return getattr(self._cursor, name)
+
+
+__all__ = ["ProfiledCursor", "QueryProfiler", "normalize_sql", "parameter_shape"]
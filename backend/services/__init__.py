@@ -0,0 +1,200 @@
+import os
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+from .catalog import CatalogView, CompactCatalog
+from .catalog_snapshot import CatalogSnapshot, SharedCatalog
+from .mmap_storage import MmapStorage
+from .storage.tiered import TieredStorage
+from .streaming import iter_slices
+
+ATTACHMENT_CHUNK_SIZE = 64 * 1024
+
+
+def _seed_models() -> List[Dict[str, object]]:
+    seed_models: Dict[str, Dict[str, object]] = {
+            "mdl-1": {
+                "id": "mdl-1",
+                "name": "Alpha",
+                "description": "Primary production model.",
+                "category": "production",
+                "owner": "core-team",
+                "visibility": "public",
+                "tags": ["vision", "stable"],
+            },
+            "mdl-2": {
+                "id": "mdl-2",
+                "name": "Beta",
+                "description": "Experimental beta model.",
+                "category": "experiment",
+                "owner": "labs",
+                "visibility": "public",
+                "tags": ["vision", "experimental"],
+            },
+            "mdl-3": {
+                "id": "mdl-3",
+                "name": "Gamma",
+                "description": "Regional recommendation model tuned for APAC.",
+                "category": "regional",
+                "owner": "growth",
+                "visibility": "public",
+                "tags": ["recommendation", "apac"],
+            },
+            "mdl-4": {
+                "id": "mdl-4",
+                "name": "Delta",
+                "description": "Legacy fallback model kept for compatibility.",
+                "category": "legacy",
+                "owner": "platform",
+                "visibility": "private",
+                "tags": ["stable", "deprecated"],
+            },
+            "mdl-5": {
+                "id": "mdl-5",
+                "name": "Epsilon",
+                "description": "Offline batch scoring pipeline.",
+                "category": "batch",
+                "owner": "data-engineering",
+                "visibility": "private",
+                "tags": ["batch"],
+            },
+        }
+    return list(seed_models.values())
+
+
+class InMemoryDatabase:
+    """Simple database abstraction for demo purposes."""
+
+    def __init__(self) -> None:
+        self._catalog = CompactCatalog(_seed_models())
+
+    @property
+    def catalog(self) -> Union[CompactCatalog, CatalogSnapshot]:
+        return self._catalog
+
+    def list_models(self) -> CatalogView:
+        """Return a lazy view over the catalog instead of copying every model."""
+        return self.catalog.view()
+
+    def get_model(self, model_id: str):
+        return self.catalog.get(model_id)
+
+    def get_models(self, model_ids: Iterable[str]) -> List[Optional[Dict[str, object]]]:
+        """Resolve several ids at once, keeping request order and ``None`` for misses."""
+        catalog = self.catalog
+        return [catalog.get(model_id) if model_id in catalog else None for model_id in model_ids]
+
+
+class SharedCatalogDatabase(InMemoryDatabase):
+    """Serve the catalog from a shared, memory-mapped snapshot file.
+
+    Every worker maps the same file read-only instead of building its own
+    catalog, and follows new generations written by :meth:`publish` (call it
+    once per sync). The demo seed becomes generation 1 when no snapshot
+    exists yet.
+    """
+
+    def __init__(self, path: os.PathLike[str] | str) -> None:
+        self._shared = SharedCatalog(path, initial=_seed_models)
+
+    @property
+    def catalog(self) -> CatalogSnapshot:
+        return self._shared.current()
+
+    def publish(self, models: Iterable[Mapping[str, object]]) -> int:
+        """Write ``models`` as the next snapshot generation for every worker."""
+        return self._shared.publish(models)
+
+    def warm_up(self) -> None:
+        # Attach before forking so workers inherit the mapping.
+        self._shared.current()
+
+
+class InMemoryStorage:
+    """Storage abstraction holding static attachments."""
+
+    # Slicing resident bytes never blocks, so async callers can read inline.
+    blocking_reads = False
+
+    def __init__(self) -> None:
+        self._attachments: Dict[str, Tuple[str, bytes, str]] = {
+            "mdl-1": (
+                "alpha.txt",
+                b"Alpha model attachment contents",
+                "text/plain",
+            ),
+            "mdl-2": (
+                "beta.txt",
+                b"Beta model attachment contents",
+                "text/plain",
+            ),
+            "mdl-3": (
+                "gamma.csv",
+                b"id,score\nuser-1,0.87\nuser-2,0.91\n",
+                "text/csv",
+            ),
+            "mdl-4": (
+                "delta.json",
+                b"{\"status\": \"deprecated\", \"sunset_at\": \"2025-03-01\"}",
+                "application/json",
+            ),
+            "mdl-5": (
+                "epsilon.log",
+                b"2024-04-01T00:00:00Z pipeline completed successfully",
+                "text/plain",
+            ),
+        }
+
+    def get_attachment(self, model_id: str) -> Tuple[str, bytes, str]:
+        if model_id not in self._attachments:
+            raise KeyError(model_id)
+        return self._attachments[model_id]
+
+    def describe_attachment(self, model_id: str) -> Tuple[str, int, str]:
+        """Return ``(filename, size, mimetype)`` without touching the payload."""
+        filename, payload, mimetype = self.get_attachment(model_id)
+        return filename, len(payload), mimetype
+
+    def iter_attachment(self, model_id: str, chunk_size: int = ATTACHMENT_CHUNK_SIZE) -> Iterator[memoryview]:
+        """Yield the attachment payload as zero-copy slices of ``chunk_size`` bytes."""
+        return self.stream_attachment(model_id, chunk_size)[3]
+
+    def stream_attachment(
+        self, model_id: str, chunk_size: int = ATTACHMENT_CHUNK_SIZE
+    ) -> Tuple[str, int, str, Iterator[memoryview]]:
+        """Return ``(filename, size, mimetype, chunks)`` from a single lookup."""
+        filename, payload, mimetype = self.get_attachment(model_id)
+        return filename, len(payload), mimetype, iter_slices(memoryview(payload), chunk_size)
+
+
+class SyncManager:
+    """Tracks sync status lifecycle.
+
+    With a :class:`SharedCatalogDatabase` a run publishes the models from
+    ``source`` as the next snapshot generation, so every worker switches to
+    them, and completes right away.
+    """
+
+    def __init__(self, source: Callable[[], Iterable[Mapping[str, object]]] = _seed_models) -> None:
+        self._source = source
+        self._status: Dict[str, object] = {
+            "state": "idle",
+            "runs": 0,
+            "last_triggered_at": None,
+        }
+
+    def trigger(self, database: Optional[InMemoryDatabase] = None):
+        self._status["state"] = "running"
+        self._status["runs"] = int(self._status.get("runs", 0)) + 1
+        self._status["last_triggered_at"] = datetime.utcnow().isoformat()
+        if isinstance(database, SharedCatalogDatabase):
+            self._status["generation"] = database.publish(self._source())
+            self.complete()
+        return self._status
+
+    def status(self):
+        return self._status
+
+    def complete(self):
+        self._status["state"] = "completed"
+        return self._status
@@ -0,0 +1,246 @@
+"""Per-client rate limits and concurrency lanes for request admission."""
+from __future__ import annotations
+
+import ipaddress
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
+
+METADATA_LANE = "metadata"
+DOWNLOAD_LANE = "download"
+# Hint sent with rejections caused by concurrency rather than rate.
+BUSY_RETRY_AFTER = 1
+# Request threads per worker process; gunicorn.conf.py runs gthread workers
+# with this many threads and the download lane is sized from it.
+DEFAULT_WORKER_THREADS = 16
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+class LanePolicy(NamedTuple):
+    """Limits for one lane.
+
+    ``rate`` tokens per second refill each client's bucket up to ``burst``.
+    ``max_concurrent`` caps in-flight requests of the lane across all clients
+    and ``max_per_client`` caps them per client; ``None`` means unlimited.
+    """
+
+    rate: float
+    burst: float
+    max_concurrent: Optional[int] = None
+    max_per_client: Optional[int] = None
+
+
+def lanes_for_threads(threads: int) -> Dict[str, LanePolicy]:
+    """Return the default lanes for a worker process serving ``threads`` requests at once.
+
+    Downloads hold a thread for the whole transfer, so their lane is capped a
+    quarter (at least one thread) below ``threads`` and browsing always finds
+    a free one. A single thread cannot be shared and leaves downloads uncapped.
+    """
+
+    if threads < 1:
+        raise ValueError("threads must be positive")
+    downloads = threads - max(1, threads // 4) if threads > 1 else None
+    return {
+        METADATA_LANE: LanePolicy(rate=20.0, burst=40.0),
+        DOWNLOAD_LANE: LanePolicy(
+            rate=2.0,
+            burst=10.0,
+            max_concurrent=downloads,
+            max_per_client=min(4, downloads) if downloads is not None else 4,
+        ),
+    }
+
+
+DEFAULT_LANES: Mapping[str, LanePolicy] = lanes_for_threads(DEFAULT_WORKER_THREADS)
+
+
+def parse_networks(value: str) -> Tuple[Network, ...]:
+    """Parse a comma separated list of addresses or CIDR ranges."""
+
+    return tuple(ipaddress.ip_network(item.strip(), strict=False) for item in value.split(",") if item.strip())
+
+
+def _is_trusted(address: str, trusted: Iterable[Network]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted)
+
+
+def client_address(remote_addr: Optional[str], forwarded_for: Optional[str], trusted: Sequence[Network]) -> str:
+    """Return the address to key admission on.
+
+    ``X-Forwarded-For`` is only believed when the peer is one of the
+    ``trusted`` proxies; its entries are then walked right to left past
+    further trusted hops, so a client cannot pick its own key by sending the
+    header itself.
+    """
+
+    address = remote_addr or "unknown"
+    if not forwarded_for or not _is_trusted(address, trusted):
+        return address
+    for hop in reversed([item.strip() for item in forwarded_for.split(",") if item.strip()]):
+        address = hop
+        if not _is_trusted(hop, trusted):
+            break
+    return address
+
+
+class AdmissionRejected(Exception):
+    """Raised instead of queueing when a request may not start now."""
+
+    def __init__(self, status_code: int, retry_after: int, reason: str) -> None:
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+        super().__init__(reason)
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated", "active")
+
+    def __init__(self, burst: float, now: float) -> None:
+        self.tokens = burst
+        self.updated = now
+        self.active = 0
+
+
+class Ticket:
+    """Admission of one request; release it once the response has been sent."""
+
+    __slots__ = ("_controller", "_client_id", "_lane", "_released")
+
+    def __init__(self, controller: "AdmissionController", client_id: str, lane: str) -> None:
+        self._controller = controller
+        self._client_id = client_id
+        self._lane = lane
+        self._released = False
+
+    @property
+    def lane(self) -> str:
+        return self._lane
+
+    def release(self) -> None:
+        """Give the concurrency slots back; calling it again is a no-op."""
+        if not self._released:
+            self._released = True
+            self._controller._release(self._client_id, self._lane)
+
+    def __enter__(self) -> "Ticket":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.release()
+
+
+class AdmissionController:
+    """Admit or reject requests immediately, per client and per lane.
+
+    Every decision is O(1) under a single lock and never waits: a request
+    that would exceed a limit is rejected with the status code and
+    ``Retry-After`` seconds to report. Exceeding a client's own rate or
+    stream cap yields 429; a full lane yields 503. State is per process, so
+    with several workers the effective limits scale with the worker count.
+    Idle clients beyond ``max_clients`` are forgotten oldest first.
+    """
+
+    def __init__(
+        self,
+        lanes: Mapping[str, LanePolicy] = DEFAULT_LANES,
+        *,
+        max_clients: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._lanes = dict(lanes)
+        self._max_clients = max_clients
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._clients: "OrderedDict[str, Dict[str, _Bucket]]" = OrderedDict()
+        self._active: Dict[str, int] = {lane: 0 for lane in self._lanes}
+        self._rejected: Dict[str, int] = {lane: 0 for lane in self._lanes}
+
+    def admit(self, client_id: str, lane: str) -> Ticket:
+        """Return a :class:`Ticket` or raise :class:`AdmissionRejected`."""
+        policy = self._lanes[lane]
+        with self._lock:
+            now = self._clock()
+            buckets = self._clients.get(client_id)
+            if buckets is None:
+                self._forget_idle_clients()
+                buckets = self._clients[client_id] = {}
+            else:
+                self._clients.move_to_end(client_id)
+            bucket = buckets.get(lane)
+            if bucket is None:
+                bucket = buckets[lane] = _Bucket(policy.burst, now)
+
+            bucket.tokens = min(policy.burst, bucket.tokens + (now - bucket.updated) * policy.rate)
+            bucket.updated = now
+            # The client's own limits come first so a greedy client is told to
+            # back off (429) rather than that the server is busy (503).
+            if policy.max_per_client is not None and bucket.active >= policy.max_per_client:
+                self._rejected[lane] += 1
+                raise AdmissionRejected(429, BUSY_RETRY_AFTER, f"Too many concurrent {lane} requests from this client.")
+            if bucket.tokens < 1.0:
+                self._rejected[lane] += 1
+                wait = (1.0 - bucket.tokens) / policy.rate if policy.rate > 0 else BUSY_RETRY_AFTER
+                raise AdmissionRejected(429, max(1, math.ceil(wait)), f"Rate limit exceeded for {lane} requests.")
+            if policy.max_concurrent is not None and self._active[lane] >= policy.max_concurrent:
+                self._rejected[lane] += 1
+                raise AdmissionRejected(503, BUSY_RETRY_AFTER, f"Too many concurrent {lane} requests.")
+
+            bucket.tokens -= 1.0
+            bucket.active += 1
+            self._active[lane] += 1
+        return Ticket(self, client_id, lane)
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Return in-flight and rejected counts per lane."""
+        with self._lock:
+            return {
+                lane: {"active": self._active[lane], "rejected": self._rejected[lane]}
+                for lane in self._lanes
+            }
+
+    def _release(self, client_id: str, lane: str) -> None:
+        with self._lock:
+            self._active[lane] -= 1
+            buckets = self._clients.get(client_id)
+            if buckets is not None and lane in buckets:
+                buckets[lane].active -= 1
+
+    def _forget_idle_clients(self) -> None:
+        # Called with the lock held; clients with requests in flight are kept
+        # so their slots are still found on release.
+        excess = len(self._clients) + 1 - self._max_clients
+        if excess <= 0:
+            return
+        idle = []
+        for client_id, buckets in self._clients.items():
+            if all(bucket.active == 0 for bucket in buckets.values()):
+                idle.append(client_id)
+                if len(idle) >= excess:
+                    break
+        for client_id in idle:
+            del self._clients[client_id]
+
+
+__all__ = [
+    "AdmissionController",
+    "AdmissionRejected",
+    "BUSY_RETRY_AFTER",
+    "DEFAULT_LANES",
+    "DEFAULT_WORKER_THREADS",
+    "DOWNLOAD_LANE",
+    "LanePolicy",
+    "METADATA_LANE",
+    "Ticket",
+    "client_address",
+    "lanes_for_threads",
+    "parse_networks",
+]
@@ -0,0 +1,374 @@
+"""Columnar in-memory storage for the model catalog."""
+from __future__ import annotations
+
+import sys
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from itertools import chain
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    Union,
+    overload,
+)
+
+DEFAULT_VISIBILITY = "private"
+FACET_NAMES = ("category", "owner", "tag", "visibility")
+
+
+# Probing a posting with binary searches beats hashing all of it while the
+# candidates are this many times fewer than the posting's entries.
+_BISECT_RATIO = 16
+
+
+def _posting_contains(posting: Sequence[int], offset: int) -> bool:
+    index = bisect_left(posting, offset)
+    return index < len(posting) and posting[index] == offset
+
+
+def intersect_postings(postings: Sequence[Sequence[int]]) -> List[int]:
+    """Intersect ascending offset lists, starting from the shortest one.
+
+    Candidates from the shortest list are probed against the others with
+    binary searches, or through a set when the lists are of similar size, so
+    the cost follows the most selective filter rather than the catalog size.
+    """
+    if not postings:
+        return []
+    ordered = sorted(postings, key=len)
+    matched: List[int] = list(ordered[0])
+    for posting in ordered[1:]:
+        if len(matched) * _BISECT_RATIO < len(posting):
+            matched = [offset for offset in matched if _posting_contains(posting, offset)]
+        else:
+            matched = list(filter(set(posting).__contains__, matched))
+    return matched
+
+
+def count_codes(
+    matched: Sequence[int],
+    categories: Sequence[int],
+    owners: Sequence[int],
+    visibilities: Sequence[int],
+    tags: Sequence[Sequence[int]],
+) -> Dict[str, Counter]:
+    """Tally the facet codes of the rows at ``matched`` offsets, one column at a time."""
+    return {
+        "category": Counter(map(categories.__getitem__, matched)),
+        "owner": Counter(map(owners.__getitem__, matched)),
+        "tag": Counter(chain.from_iterable(map(tags.__getitem__, matched))),
+        "visibility": Counter(map(visibilities.__getitem__, matched)),
+    }
+
+
+def _remove_offset(posting: array, offset: int) -> None:
+    del posting[bisect_left(posting, offset)]
+
+
+class _Interner:
+    """Map low-cardinality strings to small integer codes and back."""
+
+    __slots__ = ("_values", "_codes")
+
+    def __init__(self) -> None:
+        self._values: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self._values)
+            value = sys.intern(value)
+            self._values.append(value)
+            self._codes[value] = code
+        return code
+
+    def lookup(self, value: str) -> Optional[int]:
+        return self._codes.get(value)
+
+    def value(self, code: int) -> str:
+        return self._values[code]
+
+    def decode_counts(self, counts: Mapping[int, int]) -> Dict[str, int]:
+        return {self._values[code]: count for code, count in counts.items() if count > 0}
+
+
+class CompactCatalog:
+    """Store model metadata column by column instead of one dict per model.
+
+    ``category``, ``owner``, ``visibility`` and tags are interned and kept as
+    integer codes, and ``id -> row offset`` lookups go through a single dict.
+    Rows are only turned into dicts when they are read. Every facet value
+    also keeps an ascending array of the offsets carrying it; filters
+    intersect those arrays and per-value counts are their lengths, so both
+    stay current on every upsert and delete.
+    """
+
+    def __init__(self, models: Iterable[Mapping[str, Any]] = ()) -> None:
+        self._ids: List[str] = []
+        self._names: List[str] = []
+        self._descriptions: List[str] = []
+        self._categories = array("I")
+        self._owners = array("I")
+        self._visibilities = array("I")
+        self._tags: List[Tuple[int, ...]] = []
+        self._category_values = _Interner()
+        self._owner_values = _Interner()
+        self._visibility_values = _Interner()
+        self._tag_values = _Interner()
+        self._offsets: Dict[str, int] = {}
+        # facet name -> interned code -> ascending row offsets with that value.
+        self._postings: Dict[str, List[array]] = {name: [] for name in FACET_NAMES}
+        for model in models:
+            self.upsert(model)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, model_id: object) -> bool:
+        return model_id in self._offsets
+
+    def upsert(self, model: Mapping[str, Any]) -> int:
+        """Insert or replace a model and return its row offset."""
+        model_id = model["id"]
+        category = self._category_values.code(model["category"])
+        owner = self._owner_values.code(model["owner"])
+        visibility = self._visibility_values.code(model.get("visibility", DEFAULT_VISIBILITY))
+        tags = tuple(dict.fromkeys(self._tag_values.code(tag) for tag in model.get("tags", ())))
+        offset = self._offsets.get(model_id)
+        if offset is None:
+            offset = len(self._ids)
+            self._ids.append(model_id)
+            self._names.append(model["name"])
+            self._descriptions.append(model["description"])
+            self._categories.append(category)
+            self._owners.append(owner)
+            self._visibilities.append(visibility)
+            self._tags.append(tags)
+            self._offsets[model_id] = offset
+            # The new offset is the largest, so appending keeps postings sorted.
+            for name, codes in self._facet_codes(offset):
+                for code in codes:
+                    self._posting(name, code).append(offset)
+        else:
+            previous = dict(self._facet_codes(offset))
+            self._names[offset] = model["name"]
+            self._descriptions[offset] = model["description"]
+            self._categories[offset] = category
+            self._owners[offset] = owner
+            self._visibilities[offset] = visibility
+            self._tags[offset] = tags
+            for name, codes in self._facet_codes(offset):
+                old = previous[name]
+                for code in old:
+                    if code not in codes:
+                        _remove_offset(self._posting(name, code), offset)
+                for code in codes:
+                    if code not in old:
+                        insort(self._posting(name, code), offset)
+        return offset
+
+    def delete(self, model_id: str) -> bool:
+        """Remove a model; return ``False`` when it was not present.
+
+        The last row moves into the freed slot so the columns stay dense.
+        """
+        offset = self._offsets.pop(model_id, None)
+        if offset is None:
+            return False
+        for name, codes in self._facet_codes(offset):
+            for code in codes:
+                _remove_offset(self._posting(name, code), offset)
+        last = len(self._ids) - 1
+        if offset != last:
+            for name, codes in self._facet_codes(last):
+                for code in codes:
+                    posting = self._posting(name, code)
+                    posting.pop()
+                    insort(posting, offset)
+            for column in self._columns():
+                column[offset] = column[last]
+            self._offsets[self._ids[offset]] = offset
+        for column in self._columns():
+            column.pop()
+        return True
+
+    def _columns(self) -> Tuple[Any, ...]:
+        return (
+            self._ids,
+            self._names,
+            self._descriptions,
+            self._categories,
+            self._owners,
+            self._visibilities,
+            self._tags,
+        )
+
+    def _facet_codes(self, offset: int) -> List[Tuple[str, Sequence[int]]]:
+        return [
+            ("category", (self._categories[offset],)),
+            ("owner", (self._owners[offset],)),
+            ("visibility", (self._visibilities[offset],)),
+            ("tag", self._tags[offset]),
+        ]
+
+    def _posting(self, name: str, code: int) -> array:
+        postings = self._postings[name]
+        while len(postings) <= code:
+            postings.append(array("I"))
+        return postings[code]
+
+    def _lookup_posting(self, name: str, interner: "_Interner", value: str) -> Optional[array]:
+        code = interner.lookup(value)
+        if code is None or code >= len(self._postings[name]):
+            return None
+        return self._postings[name][code]
+
+    def offset_of(self, model_id: str) -> int:
+        return self._offsets[model_id]
+
+    def row(self, offset: int) -> Dict[str, Any]:
+        return {
+            "id": self._ids[offset],
+            "name": self._names[offset],
+            "description": self._descriptions[offset],
+            "category": self._category_values.value(self._categories[offset]),
+            "owner": self._owner_values.value(self._owners[offset]),
+            "visibility": self._visibility_values.value(self._visibilities[offset]),
+            "tags": [self._tag_values.value(tag) for tag in self._tags[offset]],
+        }
+
+    def get(self, model_id: str) -> Dict[str, Any]:
+        return self.row(self._offsets[model_id])
+
+    def view(self) -> "CatalogView":
+        """Return a read-only sequence over the rows present right now."""
+        return CatalogView(self, range(len(self._ids)))
+
+    def offsets_where(self, *, category: Optional[str] = None, owner: Optional[str] = None) -> List[int]:
+        """Return ascending row offsets matching the filters."""
+        if category is None and owner is None:
+            return list(range(len(self._ids)))
+        postings = self._filter_postings(category=category, owner=owner)
+        return [] if postings is None else intersect_postings(postings)
+
+    def _filter_postings(
+        self,
+        *,
+        category: Optional[str] = None,
+        owner: Optional[str] = None,
+        visibility: Optional[str] = None,
+        tags: Sequence[str] = (),
+    ) -> Optional[List[array]]:
+        """Return the postings to intersect, or ``None`` when a value is unknown."""
+        requested = [
+            ("category", self._category_values, category),
+            ("owner", self._owner_values, owner),
+            ("visibility", self._visibility_values, visibility),
+        ]
+        requested.extend(("tag", self._tag_values, tag) for tag in tags)
+        postings = []
+        for name, interner, value in requested:
+            if value is None:
+                continue
+            posting = self._lookup_posting(name, interner, value)
+            if posting is None:
+                return None
+            postings.append(posting)
+        return postings
+
+    def id_at(self, offset: int) -> str:
+        return self._ids[offset]
+
+    def facets(
+        self,
+        *,
+        category: Optional[str] = None,
+        owner: Optional[str] = None,
+        visibility: Optional[str] = None,
+        tags: Sequence[str] = (),
+    ) -> Tuple[int, Dict[str, Dict[str, int]]]:
+        """Return ``(total, counts per facet value)`` for the models matching the filters.
+
+        Without filters the counts are the lengths of the per-value postings.
+        Otherwise the postings of the requested values are intersected and
+        only the matching rows are tallied; a model matches a tag filter only
+        when it carries every tag.
+        """
+        postings = self._filter_postings(category=category, owner=owner, visibility=visibility, tags=tags)
+        if postings is None:
+            return 0, self._decode_facets({name: Counter() for name in FACET_NAMES})
+        if not postings:
+            counts = {
+                name: Counter({code: len(posting) for code, posting in enumerate(self._postings[name])})
+                for name in FACET_NAMES
+            }
+            return len(self._ids), self._decode_facets(counts)
+
+        matched = intersect_postings(postings)
+        counts = count_codes(matched, self._categories, self._owners, self._visibilities, self._tags)
+        return len(matched), self._decode_facets(counts)
+
+    def _decode_facets(self, counts: Mapping[str, Counter]) -> Dict[str, Dict[str, int]]:
+        return {
+            "category": self._category_values.decode_counts(counts["category"]),
+            "owner": self._owner_values.decode_counts(counts["owner"]),
+            "tag": self._tag_values.decode_counts(counts["tag"]),
+            "visibility": self._visibility_values.decode_counts(counts["visibility"]),
+        }
+
+
+class RowSource(Protocol):
+    def row(self, offset: int) -> Dict[str, Any]:
+        ...
+
+
+class CatalogView(Sequence[Dict[str, Any]]):
+    """Lazy sequence of catalog rows; each row is built only when accessed."""
+
+    __slots__ = ("_catalog", "_offsets")
+
+    def __init__(self, catalog: RowSource, offsets: Union[range, Sequence[int]]) -> None:
+        self._catalog = catalog
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    @overload
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "CatalogView":
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict[str, Any], "CatalogView"]:
+        if isinstance(index, slice):
+            return CatalogView(self._catalog, self._offsets[index])
+        return self._catalog.row(self._offsets[index])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        row = self._catalog.row
+        for offset in self._offsets:
+            yield row(offset)
+
+
+__all__ = [
+    "CatalogView",
+    "CompactCatalog",
+    "DEFAULT_VISIBILITY",
+    "FACET_NAMES",
+    "RowSource",
+    "count_codes",
+    "intersect_postings",
+]
@@ -0,0 +1,444 @@
+"""Read-only catalog snapshots shared between worker processes through ``mmap``.
+
+A snapshot file holds the whole catalog in a fixed layout: one record of
+``RECORD_FIELDS`` unsigned 32-bit integers per model, a UTF-8 string heap the
+records point into, interned value tables for every facet with an ascending
+posting list of record offsets per value, and an open-addressing hash index
+from model id to record. Filters intersect postings and counts are posting
+lengths, so reads never scan every record. Workers
+map the file read-only, so the page cache keeps one copy no matter how many
+processes attach. Publishing a new generation writes a new file and renames
+it over the old one; readers notice the new inode and remap, while requests
+still holding the previous generation keep reading it until they finish.
+"""
+from __future__ import annotations
+
+import contextlib
+import fcntl
+import mmap
+import os
+import pathlib
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from array import array
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from .catalog import DEFAULT_VISIBILITY, FACET_NAMES, CatalogView, count_codes, intersect_postings
+
+MAGIC = b"BMCAT\x00\x02\x00"
+_BYTE_ORDER_MARK = 0x01020304
+# id, name, description (offset, length each), category, owner, visibility,
+# tags (offset into the tag-code array, count).
+RECORD_FIELDS = 11
+_ID, _NAME, _DESCRIPTION, _CATEGORY, _OWNER, _VISIBILITY, _TAGS = 0, 2, 4, 6, 7, 8, 9
+# Per facet: value string refs, then each value's posting as a slice of
+# ``postings`` delimited by ``starts`` (one more entry than there are values).
+_SECTIONS = ("records", "tag_codes", "index", "strings") + tuple(
+    f"{facet}_{kind}" for facet in FACET_NAMES for kind in ("refs", "starts", "postings")
+)
+_HEADER = struct.Struct("=8sIQII" + "QQ" * len(_SECTIONS))
+
+
+class _Heap:
+    """Deduplicating UTF-8 string heap used while writing a snapshot."""
+
+    def __init__(self) -> None:
+        self.data = bytearray()
+        self._refs: Dict[str, Tuple[int, int]] = {}
+
+    def add(self, value: str) -> Tuple[int, int]:
+        ref = self._refs.get(value)
+        if ref is None:
+            encoded = value.encode("utf-8")
+            ref = (len(self.data), len(encoded))
+            self.data += encoded
+            self._refs[value] = ref
+        return ref
+
+
+def _slot_count(record_count: int) -> int:
+    slots = 8
+    while slots < record_count * 2:
+        slots *= 2
+    return slots
+
+
+def write_snapshot(models: Iterable[Mapping[str, Any]], path: os.PathLike[str] | str, generation: int) -> pathlib.Path:
+    """Write ``models`` as snapshot ``generation`` and atomically replace ``path``."""
+    target = pathlib.Path(path)
+    heap = _Heap()
+    records = array("I")
+    tag_codes = array("I")
+    values: Dict[str, Dict[str, int]] = {facet: {} for facet in FACET_NAMES}
+    ids: List[bytes] = []
+    positions: Dict[str, int] = {}
+
+    def code(facet: str, value: str) -> int:
+        return values[facet].setdefault(value, len(values[facet]))
+
+    for model in models:
+        model_id = model["id"]
+        category = code("category", model["category"])
+        owner = code("owner", model["owner"])
+        visibility = code("visibility", model.get("visibility", DEFAULT_VISIBILITY))
+        tags = list(dict.fromkeys(code("tag", tag) for tag in model.get("tags", ())))
+        row = [
+            *heap.add(model_id),
+            *heap.add(model["name"]),
+            *heap.add(model["description"]),
+            category,
+            owner,
+            visibility,
+            len(tag_codes),
+            len(tags),
+        ]
+        position = positions.get(model_id)
+        if position is None:
+            positions[model_id] = len(ids)
+            ids.append(model_id.encode("utf-8"))
+            records.extend(row)
+        else:  # a later duplicate replaces the earlier row, like CompactCatalog.upsert
+            records[position * RECORD_FIELDS:(position + 1) * RECORD_FIELDS] = array("I", row)
+        tag_codes.extend(tags)
+
+    # Built in offset order, so every posting comes out ascending.
+    postings: Dict[str, List[array]] = {facet: [array("I") for _ in values[facet]] for facet in FACET_NAMES}
+    for position in range(len(ids)):
+        base = position * RECORD_FIELDS
+        postings["category"][records[base + _CATEGORY]].append(position)
+        postings["owner"][records[base + _OWNER]].append(position)
+        postings["visibility"][records[base + _VISIBILITY]].append(position)
+        start, length = records[base + _TAGS], records[base + _TAGS + 1]
+        for tag in tag_codes[start:start + length]:
+            postings["tag"][tag].append(position)
+
+    slots = _slot_count(len(ids))
+    index = array("I", bytes(4 * slots))
+    mask = slots - 1
+    for position, encoded in enumerate(ids):
+        slot = zlib.crc32(encoded) & mask
+        while index[slot]:
+            slot = (slot + 1) & mask
+        index[slot] = position + 1
+
+    sections: Dict[str, bytes] = {
+        "records": records.tobytes(),
+        "tag_codes": tag_codes.tobytes(),
+        "index": index.tobytes(),
+    }
+    for facet in FACET_NAMES:
+        refs = array("I")
+        for value in values[facet]:
+            refs.extend(heap.add(value))
+        sections[f"{facet}_refs"] = refs.tobytes()
+        starts = array("I", [0])
+        joined = array("I")
+        for posting in postings[facet]:
+            joined.extend(posting)
+            starts.append(len(joined))
+        sections[f"{facet}_starts"] = starts.tobytes()
+        sections[f"{facet}_postings"] = joined.tobytes()
+    sections["strings"] = bytes(heap.data)
+
+    layout: List[int] = []
+    body = bytearray()
+    offset = _HEADER.size
+    for name in _SECTIONS:
+        padding = -offset % 8
+        body += bytes(padding)
+        offset += padding
+        layout.extend((offset, len(sections[name])))
+        body += sections[name]
+        offset += len(sections[name])
+    header = _HEADER.pack(MAGIC, _BYTE_ORDER_MARK, generation, len(ids), slots, *layout)
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(dir=target.parent, prefix=".catalog-")
+    try:
+        with os.fdopen(fd, "wb") as stream:
+            stream.write(header)
+            stream.write(body)
+            stream.flush()
+            os.fsync(stream.fileno())
+        os.replace(temp_name, target)
+    except BaseException:
+        try:
+            os.unlink(temp_name)
+        except FileNotFoundError:
+            pass
+        raise
+    return target
+
+
+def read_generation(path: os.PathLike[str] | str) -> int:
+    """Return the generation recorded in the snapshot header at ``path``."""
+    with open(path, "rb") as stream:
+        magic, mark, generation, *_ = _HEADER.unpack(stream.read(_HEADER.size))
+    if magic != MAGIC or mark != _BYTE_ORDER_MARK:
+        raise ValueError(f"{path} is not a catalog snapshot for this platform")
+    return generation
+
+
+class _TagLists(Sequence[memoryview]):
+    """Each record's tag codes as a slice of the shared tag-code array."""
+
+    __slots__ = ("_starts", "_lengths", "_codes")
+
+    def __init__(self, starts: memoryview, lengths: memoryview, codes: memoryview) -> None:
+        self._starts = starts
+        self._lengths = lengths
+        self._codes = codes
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __getitem__(self, offset):  # type: ignore[override]
+        start = self._starts[offset]
+        return self._codes[start:start + self._lengths[offset]]
+
+
+class CatalogSnapshot:
+    """One mapped snapshot generation, read through the ``CompactCatalog`` API.
+
+    Only the small interned value tables are decoded into Python objects;
+    rows, id lookups and postings are served straight from the shared mapping.
+    """
+
+    def __init__(self, path: os.PathLike[str] | str) -> None:
+        with open(path, "rb") as stream:
+            stat = os.fstat(stream.fileno())
+            self._buffer = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        self.inode = stat.st_ino
+        view = memoryview(self._buffer)
+        magic, mark, generation, count, slots, *layout = _HEADER.unpack_from(view)
+        if magic != MAGIC or mark != _BYTE_ORDER_MARK:
+            raise ValueError(f"{path} is not a catalog snapshot for this platform")
+        self.generation = generation
+        self._count = count
+        self._slots = slots
+        sections = {
+            name: view[layout[2 * position]:layout[2 * position] + layout[2 * position + 1]]
+            for position, name in enumerate(_SECTIONS)
+        }
+        self._records = sections["records"].cast("I")
+        self._tag_codes = sections["tag_codes"].cast("I")
+        self._index = sections["index"].cast("I")
+        self._strings = sections["strings"]
+        self._values: Dict[str, List[str]] = {}
+        self._codes: Dict[str, Dict[str, int]] = {}
+        self._postings: Dict[str, List[memoryview]] = {}
+        for facet in FACET_NAMES:
+            refs = sections[f"{facet}_refs"].cast("I")
+            decoded = [self._string(refs[position], refs[position + 1]) for position in range(0, len(refs), 2)]
+            self._values[facet] = [sys.intern(value) for value in decoded]
+            self._codes[facet] = {value: code for code, value in enumerate(decoded)}
+            starts = sections[f"{facet}_starts"].cast("I")
+            joined = sections[f"{facet}_postings"].cast("I")
+            self._postings[facet] = [joined[starts[code]:starts[code + 1]] for code in range(len(decoded))]
+        # Strided views over the records act as the per-facet code columns.
+        records = self._records
+        self._categories = records[_CATEGORY::RECORD_FIELDS]
+        self._owners = records[_OWNER::RECORD_FIELDS]
+        self._visibilities = records[_VISIBILITY::RECORD_FIELDS]
+        self._tags = _TagLists(records[_TAGS::RECORD_FIELDS], records[_TAGS + 1::RECORD_FIELDS], self._tag_codes)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, model_id: object) -> bool:
+        return isinstance(model_id, str) and self._find(model_id) is not None
+
+    def _string(self, offset: int, length: int) -> str:
+        return str(self._strings[offset:offset + length], "utf-8")
+
+    def _find(self, model_id: str) -> Optional[int]:
+        encoded = model_id.encode("utf-8")
+        mask = self._slots - 1
+        slot = zlib.crc32(encoded) & mask
+        records = self._records
+        while True:
+            entry = self._index[slot]
+            if not entry:
+                return None
+            base = (entry - 1) * RECORD_FIELDS
+            offset, length = records[base + _ID], records[base + _ID + 1]
+            if length == len(encoded) and self._strings[offset:offset + length] == encoded:
+                return entry - 1
+            slot = (slot + 1) & mask
+
+    def offset_of(self, model_id: str) -> int:
+        offset = self._find(model_id)
+        if offset is None:
+            raise KeyError(model_id)
+        return offset
+
+    def row(self, offset: int) -> Dict[str, Any]:
+        if not 0 <= offset < self._count:
+            raise IndexError(offset)
+        record = self._records[offset * RECORD_FIELDS:(offset + 1) * RECORD_FIELDS]
+        tags = self._values["tag"]
+        start, length = record[_TAGS], record[_TAGS + 1]
+        return {
+            "id": self._string(record[_ID], record[_ID + 1]),
+            "name": self._string(record[_NAME], record[_NAME + 1]),
+            "description": self._string(record[_DESCRIPTION], record[_DESCRIPTION + 1]),
+            "category": self._values["category"][record[_CATEGORY]],
+            "owner": self._values["owner"][record[_OWNER]],
+            "visibility": self._values["visibility"][record[_VISIBILITY]],
+            "tags": [tags[code] for code in self._tag_codes[start:start + length]],
+        }
+
+    def get(self, model_id: str) -> Dict[str, Any]:
+        return self.row(self.offset_of(model_id))
+
+    def view(self) -> CatalogView:
+        return CatalogView(self, range(self._count))
+
+    def id_at(self, offset: int) -> str:
+        base = offset * RECORD_FIELDS
+        return self._string(self._records[base + _ID], self._records[base + _ID + 1])
+
+    def offsets_where(self, *, category: Optional[str] = None, owner: Optional[str] = None) -> List[int]:
+        """Return ascending row offsets matching the filters by intersecting postings."""
+        if category is None and owner is None:
+            return list(range(self._count))
+        postings = self._filter_postings(category=category, owner=owner)
+        return [] if postings is None else intersect_postings(postings)
+
+    def _filter_postings(
+        self,
+        *,
+        category: Optional[str] = None,
+        owner: Optional[str] = None,
+        visibility: Optional[str] = None,
+        tags: Sequence[str] = (),
+    ) -> Optional[List[memoryview]]:
+        """Return the postings to intersect, or ``None`` when a value is unknown."""
+        requested = [("category", category), ("owner", owner), ("visibility", visibility)]
+        requested.extend(("tag", tag) for tag in tags)
+        postings = []
+        for facet, value in requested:
+            if value is None:
+                continue
+            code = self._codes[facet].get(value)
+            if code is None:
+                return None
+            postings.append(self._postings[facet][code])
+        return postings
+
+    def facets(
+        self,
+        *,
+        category: Optional[str] = None,
+        owner: Optional[str] = None,
+        visibility: Optional[str] = None,
+        tags: Sequence[str] = (),
+    ) -> Tuple[int, Dict[str, Dict[str, int]]]:
+        """Return ``(total, counts per facet value)`` like ``CompactCatalog.facets``."""
+        postings = self._filter_postings(category=category, owner=owner, visibility=visibility, tags=tags)
+        if postings is None:
+            return 0, self._decode_facets({name: Counter() for name in FACET_NAMES})
+        if not postings:
+            counts = {
+                name: Counter({code: len(posting) for code, posting in enumerate(self._postings[name])})
+                for name in FACET_NAMES
+            }
+            return self._count, self._decode_facets(counts)
+
+        matched = intersect_postings(postings)
+        counts = count_codes(matched, self._categories, self._owners, self._visibilities, self._tags)
+        return len(matched), self._decode_facets(counts)
+
+    def _decode_facets(self, counts: Mapping[str, Mapping[int, int]]) -> Dict[str, Dict[str, int]]:
+        return {
+            facet: {self._values[facet][code]: count for code, count in counts[facet].items() if count > 0}
+            for facet in ("category", "owner", "tag", "visibility")
+        }
+
+
+@contextlib.contextmanager
+def _publish_lock(path: pathlib.Path) -> Iterator[None]:
+    """Serialize snapshot writers across processes with an ``flock`` next to ``path``."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path.with_name(f"{path.name}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+class SharedCatalog:
+    """Attach to the newest snapshot at ``path`` and follow later generations.
+
+    :meth:`current` re-checks the file at most every ``check_interval``
+    seconds and swaps to a new generation when the file was replaced. Callers
+    should take one snapshot per request so every read in it sees the same
+    generation. When no snapshot exists yet, ``initial`` supplies the models
+    for generation 1. Writers in any process take a lock file next to the
+    snapshot, so concurrent publishes get distinct generations.
+    """
+
+    def __init__(
+        self,
+        path: os.PathLike[str] | str,
+        *,
+        initial: Optional[Callable[[], Iterable[Mapping[str, Any]]]] = None,
+        check_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._path = pathlib.Path(path)
+        self._initial = initial
+        self._check_interval = check_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._checked_at = float("-inf")
+
+    @property
+    def path(self) -> pathlib.Path:
+        return self._path
+
+    def current(self) -> CatalogSnapshot:
+        now = self._clock()
+        snapshot = self._snapshot
+        if snapshot is not None and now - self._checked_at < self._check_interval:
+            return snapshot
+        with self._lock:
+            self._checked_at = now
+            try:
+                inode = self._path.stat().st_ino
+            except FileNotFoundError:
+                if self._snapshot is not None:
+                    return self._snapshot
+                if self._initial is None:
+                    raise
+                with _publish_lock(self._path):
+                    if not self._path.exists():  # another worker may have won
+                        write_snapshot(self._initial(), self._path, 1)
+                inode = self._path.stat().st_ino
+            if self._snapshot is None or self._snapshot.inode != inode:
+                # The previous generation is released once the last view of it
+                # is garbage collected.
+                self._snapshot = CatalogSnapshot(self._path)
+            return self._snapshot
+
+    def publish(self, models: Iterable[Mapping[str, Any]]) -> int:
+        """Write ``models`` as the next generation and switch to it; return the generation."""
+        with self._lock, _publish_lock(self._path):
+            try:
+                generation = read_generation(self._path) + 1
+            except FileNotFoundError:
+                generation = 1
+            write_snapshot(models, self._path, generation)
+            self._snapshot = CatalogSnapshot(self._path)
+            self._checked_at = self._clock()
+            return generation
+
+
+__all__ = ["CatalogSnapshot", "MAGIC", "RECORD_FIELDS", "SharedCatalog", "read_generation", "write_snapshot"]
@@ -0,0 +1,147 @@
+"""Favorite state for list pages, cached per user."""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Set
+
+from ..repositories.favorite_repository import FavoriteRepository
+
+
+class _CachedFavorites:
+    __slots__ = ("ids", "expires_at")
+
+    def __init__(self, ids: Optional[Set[int]], expires_at: float) -> None:
+        # ``None`` marks a user with too many favorites to cache.
+        self.ids = ids
+        self.expires_at = expires_at
+
+
+class FavoritesService:
+    """Answer "which of these models did this user favorite" for whole pages.
+
+    The first lookup for a user loads their favorite ids with one query and
+    keeps them as a set; later pages are answered from memory. At most
+    ``max_users`` sets are kept (least recently used are evicted), users with
+    more than ``max_ids_per_user`` favorites fall back to one batched ``IN``
+    query per page, and entries expire after ``ttl`` seconds so writes handled
+    by other worker processes become visible. Writes made through this service
+    update the cached set in place and bump the user's generation, so a load
+    that was already running when they happened is not cached over them.
+    """
+
+    def __init__(
+        self,
+        repository: FavoriteRepository,
+        *,
+        max_users: int = 10_000,
+        max_ids_per_user: int = 1_000,
+        ttl: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_users < 1:
+            raise ValueError("max_users must be positive")
+        self._repository = repository
+        self._max_users = max_users
+        self._max_ids_per_user = max_ids_per_user
+        self._ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[int, _CachedFavorites]" = OrderedDict()
+        # user id -> [write generation, loads in flight]; only kept while a load runs.
+        self._generations: Dict[int, List[int]] = {}
+
+    def favorited(self, user_id: int, model_ids: Sequence[int]) -> Set[int]:
+        """Return the subset of ``model_ids`` that ``user_id`` has favorited."""
+        if not model_ids:
+            return set()
+        ids = self._cached_ids(user_id)
+        if ids is None:
+            return self._repository.favorited_among(user_id, model_ids)
+        return ids.intersection(model_ids)
+
+    def favorite_map(self, user_id: int, model_ids: Sequence[int]) -> Dict[int, bool]:
+        """Like :meth:`favorited` but keyed by every requested id, for JSON payloads."""
+        favorited = self.favorited(user_id, model_ids)
+        return {model_id: model_id in favorited for model_id in model_ids}
+
+    def add(self, user_id: int, model_id: int) -> bool:
+        """Favorite ``model_id``; repeating it is a no-op that returns ``False``."""
+        created = self._repository.add_favorite(user_id, model_id)
+        with self._lock:
+            self._bump(user_id)
+            entry = self._cache.get(user_id)
+            if entry is not None and entry.ids is not None:
+                entry.ids.add(model_id)
+                if len(entry.ids) > self._max_ids_per_user:
+                    entry.ids = None
+        return created
+
+    def remove(self, user_id: int, model_id: int) -> bool:
+        """Unfavorite ``model_id``; repeating it is a no-op that returns ``False``."""
+        removed = self._repository.remove_favorite(user_id, model_id)
+        with self._lock:
+            self._bump(user_id)
+            entry = self._cache.get(user_id)
+            if entry is not None and entry.ids is not None:
+                entry.ids.discard(model_id)
+        return removed
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._bump(user_id)
+            self._cache.pop(user_id, None)
+
+    def cached_users(self) -> int:
+        with self._lock:
+            return len(self._cache)
+
+    def _cached_ids(self, user_id: int) -> Optional[Set[int]]:
+        now = self._clock()
+        with self._lock:
+            entry = self._cache.get(user_id)
+            if entry is not None and entry.expires_at > now:
+                self._cache.move_to_end(user_id)
+                return entry.ids
+            state = self._generations.setdefault(user_id, [0, 0])
+            state[1] += 1
+            generation = state[0]
+
+        # Loaded outside the lock; a concurrent load of the same user only
+        # costs a duplicate query.
+        try:
+            loaded = self._repository.list_favorite_ids(user_id, limit=self._max_ids_per_user + 1)
+            ids = set(loaded) if len(loaded) <= self._max_ids_per_user else None
+        except BaseException:
+            with self._lock:
+                self._finish_load(user_id, state)
+            raise
+        # The generation check and the insert share one critical section, so
+        # a write cannot slip in between them unnoticed.
+        with self._lock:
+            self._finish_load(user_id, state)
+            if state[0] != generation:
+                # A write landed while loading; the result may predate it, so
+                # answer from it once but let the next lookup load again.
+                return ids
+            self._cache[user_id] = _CachedFavorites(ids, now + self._ttl)
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self._max_users:
+                self._cache.popitem(last=False)
+        return ids
+
+    def _finish_load(self, user_id: int, state: List[int]) -> None:
+        # Called with the lock held.
+        state[1] -= 1
+        if state[1] == 0:
+            del self._generations[user_id]
+
+    def _bump(self, user_id: int) -> None:
+        # Called with the lock held.
+        state = self._generations.get(user_id)
+        if state is not None:
+            state[0] += 1
+
+
+__all__ = ["FavoritesService"]
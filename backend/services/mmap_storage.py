@@ -0,0 +1,184 @@
+"""File-backed attachment storage served through shared memory mappings."""
+from __future__ import annotations
+
+import mimetypes
+import mmap
+import os
+import pathlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Iterator, Optional, Tuple
+
+from .streaming import iter_slices
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class _Mapping:
+    __slots__ = ("path", "inode", "size", "buffer")
+
+    def __init__(self, path: pathlib.Path, inode: int, size: int, buffer: Optional[mmap.mmap]) -> None:
+        self.path = path
+        self.inode = inode
+        self.size = size
+        self.buffer = buffer
+
+    def view(self) -> memoryview:
+        if self.buffer is None:  # empty files cannot be mapped
+            return memoryview(b"")
+        return memoryview(self.buffer)
+
+    def close(self) -> None:
+        if self.buffer is None:
+            return
+        try:
+            self.buffer.close()
+        except BufferError:
+            # Slices are still being streamed; the mapping is released once
+            # the last memoryview referencing it is garbage collected.
+            pass
+
+
+class MmapStorage:
+    """Serve attachments stored as ``<root>/<model_id>/<filename>`` via ``mmap``.
+
+    Read-only mappings are backed by the page cache, so every worker process
+    mapping the same file shares a single copy in memory. The number of open
+    mappings is capped by an LRU.
+    """
+
+    # Touching a mapped page may fault in data from disk.
+    blocking_reads = True
+
+    def __init__(self, root: os.PathLike[str] | str, *, max_open: int = 128) -> None:
+        if max_open < 1:
+            raise ValueError("max_open must be at least 1")
+        self._root = pathlib.Path(root)
+        self._max_open = max_open
+        self._lock = threading.Lock()
+        self._mappings: "OrderedDict[str, _Mapping]" = OrderedDict()
+
+    @property
+    def root(self) -> pathlib.Path:
+        return self._root
+
+    def put_attachment(self, model_id: str, filename: str, payload: bytes) -> pathlib.Path:
+        """Atomically write the attachment for ``model_id``, replacing any previous one."""
+        directory = self._model_directory(model_id)
+        directory.mkdir(parents=True, exist_ok=True)
+        target = directory / pathlib.Path(filename).name
+        fd, temp_name = tempfile.mkstemp(dir=directory, prefix=".upload-")
+        with os.fdopen(fd, "wb") as stream:
+            stream.write(payload)
+        os.replace(temp_name, target)
+        for existing in directory.iterdir():
+            if existing != target and not existing.name.startswith("."):
+                existing.unlink()
+        return target
+
+    def get_attachment(self, model_id: str) -> Tuple[str, memoryview, str]:
+        """Return ``(filename, payload, mimetype)`` with the payload as a zero-copy view."""
+        mapping, view = self._acquire(model_id)
+        return mapping.path.name, view, self._guess_mimetype(mapping.path)
+
+    def describe_attachment(self, model_id: str) -> Tuple[str, int, str]:
+        mapping, _ = self._acquire(model_id)
+        return mapping.path.name, mapping.size, self._guess_mimetype(mapping.path)
+
+    def iter_attachment(self, model_id: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[memoryview]:
+        """Yield ``memoryview`` slices of the mapped attachment."""
+        return self.stream_attachment(model_id, chunk_size)[3]
+
+    def stream_attachment(
+        self, model_id: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Tuple[str, int, str, Iterator[memoryview]]:
+        """Return ``(filename, size, mimetype, chunks)`` taken from one mapping.
+
+        The size and the body come from the same mapping, so replacing the
+        file mid-request cannot make ``Content-Length`` disagree with the body.
+        """
+        mapping, view = self._acquire(model_id)
+        return mapping.path.name, mapping.size, self._guess_mimetype(mapping.path), iter_slices(view, chunk_size)
+
+    def warm_up(self) -> None:
+        """Map up to ``max_open`` attachments so first downloads skip the setup."""
+        if not self._root.is_dir():
+            return
+        for directory in sorted(self._root.iterdir())[: self._max_open]:
+            try:
+                self._acquire(directory.name)
+            except KeyError:
+                continue
+
+    def open_mappings(self) -> int:
+        with self._lock:
+            return len(self._mappings)
+
+    def close(self) -> None:
+        with self._lock:
+            mappings = list(self._mappings.values())
+            self._mappings.clear()
+        for mapping in mappings:
+            mapping.close()
+
+    def _model_directory(self, model_id: str) -> pathlib.Path:
+        safe_id = pathlib.Path(model_id).name
+        if not safe_id or safe_id != model_id:
+            raise KeyError(model_id)
+        return self._root / safe_id
+
+    def _locate(self, model_id: str) -> pathlib.Path:
+        directory = self._model_directory(model_id)
+        try:
+            candidates = sorted(path for path in directory.iterdir() if path.is_file() and not path.name.startswith("."))
+        except (FileNotFoundError, NotADirectoryError):
+            raise KeyError(model_id) from None
+        if not candidates:
+            raise KeyError(model_id)
+        return candidates[0]
+
+    def _acquire(self, model_id: str) -> Tuple[_Mapping, memoryview]:
+        # The view is taken while holding the lock so a concurrent eviction
+        # cannot close the mapping before it is exported.
+        with self._lock:
+            mapping = self._mappings.get(model_id)
+            if mapping is not None:
+                try:
+                    stat = mapping.path.stat()
+                except FileNotFoundError:
+                    stat = None
+                if stat is not None and (stat.st_ino, stat.st_size) == (mapping.inode, mapping.size):
+                    self._mappings.move_to_end(model_id)
+                    return mapping, mapping.view()
+                # The file was replaced or removed; drop the stale mapping.
+                del self._mappings[model_id]
+                mapping.close()
+
+            mapping = self._map(self._locate(model_id))
+            self._mappings[model_id] = mapping
+            view = mapping.view()
+            evicted = []
+            while len(self._mappings) > self._max_open:
+                _, old = self._mappings.popitem(last=False)
+                evicted.append(old)
+        for old in evicted:
+            old.close()
+        return mapping, view
+
+    @staticmethod
+    def _map(path: pathlib.Path) -> _Mapping:
+        with path.open("rb") as stream:
+            stat = os.fstat(stream.fileno())
+            buffer: Optional[mmap.mmap] = None
+            if stat.st_size:
+                buffer = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        return _Mapping(path, stat.st_ino, stat.st_size, buffer)
+
+    @staticmethod
+    def _guess_mimetype(path: pathlib.Path) -> str:
+        mimetype, _ = mimetypes.guess_type(path.name)
+        return mimetype or "application/octet-stream"
+
+
+__all__ = ["MmapStorage"]
@@ -0,0 +1,367 @@
+"""Rolling-window download rankings kept as time-bucketed counters."""
+from __future__ import annotations
+
+import contextlib
+import fcntl
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Tuple
+
+if TYPE_CHECKING:
+    import sqlite3
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_K = 100
+# Catalog ids are the database primary key behind this prefix ("mdl-42").
+CATALOG_ID_PREFIX = "mdl-"
+
+
+def catalog_id(primary_key: object) -> str:
+    """Return the catalog id the API uses for the model row ``primary_key``."""
+    return f"{CATALOG_ID_PREFIX}{primary_key}"
+
+
+class WindowSpec(NamedTuple):
+    """A window of ``length`` seconds made of buckets ``bucket`` seconds wide."""
+
+    length: int
+    bucket: int
+
+
+DEFAULT_WINDOWS: Mapping[str, WindowSpec] = {
+    "24h": WindowSpec(24 * 3600, 3600),
+    "7d": WindowSpec(7 * 24 * 3600, 6 * 3600),
+    "30d": WindowSpec(30 * 24 * 3600, 24 * 3600),
+}
+
+
+class _Window:
+    """Counters for one window plus its top-K, kept exact incrementally.
+
+    Recording a download only raises one count, which can move that model up
+    the top-K or let it displace the last entry. Counts only fall when a
+    bucket expires, and that is the only time the top-K is rebuilt from the
+    running totals.
+    """
+
+    def __init__(self, spec: WindowSpec, top_k: int) -> None:
+        self.spec = spec
+        self.top_k = top_k
+        self.span = max(1, spec.length // spec.bucket)
+        self.buckets: Dict[int, Counter] = {}
+        self.totals: Counter = Counter()
+        self.top: List[str] = []
+
+    def _rank_key(self, model_id: str) -> Tuple[int, str]:
+        return -self.totals[model_id], model_id
+
+    def add(self, model_id: str, bucket_index: int, current_bucket: int, count: int) -> Optional[int]:
+        """Count into a bucket and return its index, or ``None`` if it is outside the window."""
+        if bucket_index <= current_bucket - self.span:
+            return None
+        bucket_index = min(bucket_index, current_bucket)
+        counter = self.buckets.get(bucket_index)
+        if counter is None:
+            counter = self.buckets[bucket_index] = Counter()
+        counter[model_id] += count
+        self.totals[model_id] += count
+        self._promote(model_id)
+        return bucket_index
+
+    def reset(self, buckets: Dict[int, Counter]) -> None:
+        """Replace every bucket at once and rebuild the totals and top-K from them."""
+        self.buckets = buckets
+        self.totals = Counter()
+        for counter in buckets.values():
+            self.totals.update(counter)
+        self.totals = +self.totals
+        self.top = sorted(self.totals, key=self._rank_key)[: self.top_k]
+
+    def _promote(self, model_id: str) -> None:
+        top = self.top
+        if model_id in top:
+            position = top.index(model_id)
+        elif len(top) < self.top_k:
+            top.append(model_id)
+            position = len(top) - 1
+        elif self._rank_key(model_id) < self._rank_key(top[-1]):
+            top[-1] = model_id
+            position = len(top) - 1
+        else:
+            return
+        while position > 0 and self._rank_key(top[position]) < self._rank_key(top[position - 1]):
+            top[position], top[position - 1] = top[position - 1], top[position]
+            position -= 1
+
+    def expire(self, current_bucket: int) -> None:
+        expired = [index for index in self.buckets if index <= current_bucket - self.span]
+        if not expired:
+            return
+        for index in expired:
+            self.totals.subtract(self.buckets.pop(index))
+        self.totals = +self.totals  # drop models whose count reached zero
+        self.top = sorted(self.totals, key=self._rank_key)[: self.top_k]
+
+
+class PopularityTracker:
+    """Count downloads per model over rolling windows such as 24h, 7d and 30d.
+
+    Each window keeps one counter per time bucket plus running totals, so
+    recording a download touches one bucket per window and expiry subtracts
+    whole buckets as they fall out of the window. Rankings are read from a
+    top-K list maintained alongside the totals, so serving them never scans
+    download records. A window covers its last ``length // bucket`` buckets,
+    the current, partially filled one included.
+    """
+
+    def __init__(
+        self,
+        windows: Mapping[str, WindowSpec] = DEFAULT_WINDOWS,
+        *,
+        top_k: int = DEFAULT_TOP_K,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if top_k < 1:
+            raise ValueError("top_k must be positive")
+        self._windows: Dict[str, _Window] = {name: _Window(spec, top_k) for name, spec in windows.items()}
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    @property
+    def windows(self) -> List[str]:
+        return list(self._windows)
+
+    @property
+    def top_k(self) -> int:
+        return next(iter(self._windows.values())).top_k
+
+    def record(self, model_id: str, at: Optional[float] = None, count: int = 1) -> None:
+        """Count ``count`` downloads of ``model_id`` at epoch seconds ``at`` (default: now)."""
+        now = self._clock()
+        at = now if at is None else at
+        with self._lock:
+            for name, window in self._windows.items():
+                current_bucket = int(now // window.spec.bucket)
+                window.expire(current_bucket)
+                bucket_index = window.add(model_id, int(at // window.spec.bucket), current_bucket, count)
+                if bucket_index is not None:
+                    self._counted(name, bucket_index, model_id, count)
+
+    def _counted(self, window: str, bucket_index: int, model_id: str, count: int) -> None:
+        """Hook called with the lock held for every bucket a download was added to."""
+
+    def backfill(self, events: Iterable[Tuple[str, float]]) -> int:
+        """Load ``(model_id, epoch_seconds)`` events, e.g. from ``download_records``."""
+        loaded = 0
+        for model_id, at in events:
+            self.record(model_id, at)
+            loaded += 1
+        return loaded
+
+    def is_empty(self) -> bool:
+        """Return whether no window holds any downloads."""
+        with self._lock:
+            return not any(window.totals for window in self._windows.values())
+
+    def seed(self, loader: Callable[["PopularityTracker"], object]) -> bool:
+        """Call ``loader`` with the tracker if nothing was counted yet; return whether it ran."""
+        if not self.is_empty():
+            return False
+        loader(self)
+        return True
+
+    def rankings(self, window: str, limit: int = 20) -> List[Tuple[str, int]]:
+        """Return up to ``limit`` ``(model_id, downloads)`` pairs, most downloaded first."""
+        state = self._windows[window]
+        with self._lock:
+            state.expire(int(self._clock() // state.spec.bucket))
+            return [(model_id, state.totals[model_id]) for model_id in state.top[:limit]]
+
+
+@contextlib.contextmanager
+def _file_lock(path: str) -> Iterator[None]:
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+class SharedPopularityTracker(PopularityTracker):
+    """A :class:`PopularityTracker` whose counts are shared through an SQLite file.
+
+    Every worker process counts downloads in memory as before; recording and
+    ranking never touch the file. A background thread, started by the first
+    download or ranking in each process, adds the process's new bucket counts
+    to the file every ``sync_interval`` seconds and reloads the buckets when
+    any worker changed them. Rankings therefore cover every worker and survive
+    restarts, lagging other workers by about one sync interval. A failed sync
+    is logged and its counts are kept for the next one.
+
+    Seeding with :meth:`seed` happens under a file lock and only while the
+    file holds no counts, so several workers starting at once backfill just
+    once.
+    """
+
+    def __init__(
+        self,
+        path: os.PathLike[str] | str,
+        windows: Mapping[str, WindowSpec] = DEFAULT_WINDOWS,
+        *,
+        top_k: int = DEFAULT_TOP_K,
+        clock: Callable[[], float] = time.time,
+        sync_interval: float = 5.0,
+    ) -> None:
+        super().__init__(windows, top_k=top_k, clock=clock)
+        self._path = os.fspath(path)
+        self._sync_interval = sync_interval
+        # (window, bucket index, model id) -> downloads not yet in the file.
+        self._pending: Counter = Counter()
+        self._revision: Optional[int] = None
+        # Serializes syncs; never held while recording or ranking.
+        self._sync_lock = threading.Lock()
+        self._syncer: Optional[threading.Thread] = None
+        self._syncer_pid: Optional[int] = None
+        self._stopped = threading.Event()
+        with contextlib.closing(self._connect()) as connection, connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS popularity_buckets ("
+                "window_name TEXT NOT NULL, bucket INTEGER NOT NULL, model_id TEXT NOT NULL, "
+                "downloads INTEGER NOT NULL, PRIMARY KEY (window_name, bucket, model_id))"
+            )
+            # Bumped by every change so unchanged files are not read again.
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS popularity_revision (id INTEGER PRIMARY KEY CHECK (id = 0), "
+                "revision INTEGER NOT NULL)"
+            )
+            connection.execute("INSERT OR IGNORE INTO popularity_revision (id, revision) VALUES (0, 0)")
+
+    def record(self, model_id: str, at: Optional[float] = None, count: int = 1) -> None:
+        super().record(model_id, at, count)
+        self._ensure_syncing()
+
+    def backfill(self, events: Iterable[Tuple[str, float]]) -> int:
+        loaded = super().backfill(events)
+        self.sync()
+        return loaded
+
+    def rankings(self, window: str, limit: int = 20) -> List[Tuple[str, int]]:
+        self._ensure_syncing()
+        return super().rankings(window, limit)
+
+    def is_empty(self) -> bool:
+        # Only asked at start-up, so reading the file inline is fine here.
+        self.sync()
+        return super().is_empty()
+
+    def seed(self, loader: Callable[[PopularityTracker], object]) -> bool:
+        with _file_lock(f"{self._path}.lock"):
+            return super().seed(loader)
+
+    def stop(self) -> None:
+        """Stop this process's background sync after one final sync."""
+        self._stopped.set()
+        syncer = self._syncer
+        if syncer is not None and self._syncer_pid == os.getpid():
+            syncer.join()
+
+    def sync(self) -> None:
+        """Add this process's new counts to the file and reload them if anything changed."""
+        with self._sync_lock:
+            self._sync()
+
+    def _sync(self) -> None:
+        now = self._clock()
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        try:
+            with contextlib.closing(self._connect()) as connection, connection:
+                connection.execute("BEGIN IMMEDIATE")
+                connection.executemany(
+                    "INSERT INTO popularity_buckets (window_name, bucket, model_id, downloads) "
+                    "VALUES (?, ?, ?, ?) ON CONFLICT (window_name, bucket, model_id) "
+                    "DO UPDATE SET downloads = downloads + excluded.downloads",
+                    [(name, bucket, model_id, count) for (name, bucket, model_id), count in pending.items()],
+                )
+                changed = bool(pending)
+                for name, window in self._windows.items():
+                    deleted = connection.execute(
+                        "DELETE FROM popularity_buckets WHERE window_name = ? AND bucket <= ?",
+                        (name, int(now // window.spec.bucket) - window.span),
+                    ).rowcount
+                    changed = changed or deleted > 0
+                if changed:
+                    connection.execute("UPDATE popularity_revision SET revision = revision + 1")
+                (revision,) = connection.execute("SELECT revision FROM popularity_revision").fetchone()
+                rows = None
+                if revision != self._revision:
+                    rows = connection.execute(
+                        "SELECT window_name, bucket, model_id, downloads FROM popularity_buckets"
+                    ).fetchall()
+        except BaseException:
+            with self._lock:
+                self._pending.update(pending)
+            raise
+        if rows is None:
+            return
+        self._revision = revision
+
+        buckets: Dict[str, Dict[int, Counter]] = {name: {} for name in self._windows}
+        for name, bucket, model_id, downloads in rows:
+            if name in buckets:
+                buckets[name].setdefault(bucket, Counter())[model_id] += downloads
+        with self._lock:
+            for name, window in self._windows.items():
+                window.reset(buckets[name])
+                window.expire(int(now // window.spec.bucket))
+            # Downloads counted while the file was being read are not in it yet.
+            for (name, bucket, model_id), count in self._pending.items():
+                self._windows[name].add(model_id, bucket, int(now // self._windows[name].spec.bucket), count)
+
+    def _counted(self, window: str, bucket_index: int, model_id: str, count: int) -> None:
+        self._pending[window, bucket_index, model_id] += count
+
+    def _ensure_syncing(self) -> None:
+        # Threads do not survive fork, so each worker starts its own on first use.
+        pid = os.getpid()
+        if self._syncer_pid == pid or self._stopped.is_set():
+            return
+        with self._lock:
+            if self._syncer_pid == pid:
+                return
+            self._syncer_pid = pid
+            self._syncer = threading.Thread(target=self._run, name="popularity-sync", daemon=True)
+        self._syncer.start()
+
+    def _run(self) -> None:
+        while True:
+            stopped = self._stopped.wait(self._sync_interval)
+            try:
+                self.sync()
+            except Exception:
+                logger.warning("Could not sync popularity counts with %s", self._path, exc_info=True)
+            if stopped:
+                return
+
+    def _connect(self) -> "sqlite3.Connection":
+        # Imported here so the request path only loads sqlite3 when sharing is
+        # configured; a connection per sync keeps forked workers from sharing one.
+        import sqlite3
+
+        return sqlite3.connect(self._path, timeout=30, isolation_level=None)
+
+
+__all__ = [
+    "CATALOG_ID_PREFIX",
+    "DEFAULT_TOP_K",
+    "DEFAULT_WINDOWS",
+    "PopularityTracker",
+    "SharedPopularityTracker",
+    "WindowSpec",
+    "catalog_id",
+]
@@ -0,0 +1,214 @@
+"""Storage service helpers for persisting uploaded files."""
+from __future__ import annotations
+
+import hashlib
+import os
+import pathlib
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import BinaryIO, Iterable, Optional, Tuple
+
+CHUNK_SIZE = 1024 * 1024  # 1 MiB
+DEFAULT_CHECKSUM_ALGORITHM = "blake2b"
+DEFAULT_SEGMENT_SIZE = 64 * CHUNK_SIZE
+TREE_PREFIX = "tree-"
+# Domain separation so a leaf digest can never be mistaken for a root digest.
+_LEAF_MARKER = b"\x00"
+_ROOT_MARKER = b"\x01"
+
+
+def _iter_file_chunks(source: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterable[bytes]:
+    """Yield chunks from a file-like object without altering its final pointer."""
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def tree_algorithm(base: str = DEFAULT_CHECKSUM_ALGORITHM, segment_size: int = DEFAULT_SEGMENT_SIZE) -> str:
+    """Return the identifier stored for a tree hash, e.g. ``tree-blake2b:67108864``.
+
+    The segment size is part of the identifier because it changes the digest.
+    """
+    if segment_size < 1:
+        raise ValueError("segment_size must be positive")
+    hashlib.new(base)  # reject unknown algorithms up front
+    return f"{TREE_PREFIX}{base}:{segment_size}"
+
+
+def parse_tree_algorithm(algorithm: str) -> Optional[Tuple[str, int]]:
+    """Split a tree identifier into ``(base, segment_size)``; ``None`` for plain names."""
+    if not algorithm.startswith(TREE_PREFIX):
+        return None
+    base, _, segment_size = algorithm[len(TREE_PREFIX):].partition(":")
+    if not base or not segment_size.isdigit() or int(segment_size) < 1:
+        raise ValueError(f"Malformed tree checksum algorithm: {algorithm}")
+    return base, int(segment_size)
+
+
+def hash_leaf(base: str, data: bytes | memoryview) -> bytes:
+    """Return the leaf digest of one segment."""
+    hasher = hashlib.new(base)
+    hasher.update(_LEAF_MARKER)
+    hasher.update(data)
+    return hasher.digest()
+
+
+def combine_leaves(base: str, leaves: Iterable[bytes]) -> str:
+    """Combine leaf digests, in segment order, into the hex root digest."""
+    hasher = hashlib.new(base)
+    hasher.update(_ROOT_MARKER)
+    for leaf in leaves:
+        hasher.update(leaf)
+    return hasher.hexdigest()
+
+
+def _hash_fd_segment(fd: int, base: str, offset: int, length: int) -> bytes:
+    hasher = hashlib.new(base)
+    hasher.update(_LEAF_MARKER)
+    end = offset + length
+    while offset < end:
+        chunk = os.pread(fd, min(CHUNK_SIZE, end - offset), offset)
+        if not chunk:
+            raise ValueError("File shrank while it was being hashed")
+        hasher.update(chunk)
+        offset += len(chunk)
+    return hasher.digest()
+
+
+def _tree_checksum(source: BinaryIO, base: str, segment_size: int, workers: Optional[int]) -> str:
+    try:
+        fd = source.fileno()
+    except (AttributeError, OSError):
+        fd = None
+
+    if fd is None:
+        # No positional reads available: same digest, computed one segment at a time.
+        try:
+            source.seek(0)
+        except (AttributeError, OSError):
+            pass
+        leaves = []
+        while True:
+            segment = source.read(segment_size)
+            if not segment:
+                break
+            leaves.append(hash_leaf(base, segment))
+        return combine_leaves(base, leaves)
+
+    # hashlib releases the GIL while hashing large buffers, so segment
+    # workers run on separate cores.
+    size = os.fstat(fd).st_size
+    offsets = range(0, size, segment_size)
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        leaves = pool.map(lambda offset: _hash_fd_segment(fd, base, offset, min(segment_size, size - offset)), offsets)
+        return combine_leaves(base, leaves)
+
+
+def compute_checksum(source: BinaryIO, algorithm: str = DEFAULT_CHECKSUM_ALGORITHM, *, workers: Optional[int] = None) -> str:
+    """Compute checksum using the provided hashing algorithm name.
+
+    ``algorithm`` is any :mod:`hashlib` name or an identifier built by
+    :func:`tree_algorithm`. Tree hashes of real files are computed with up to
+    ``workers`` threads, one segment each.
+    """
+    tree = parse_tree_algorithm(algorithm)
+    if tree is not None:
+        base, segment_size = tree
+        try:
+            start_pos = source.tell()
+        except (AttributeError, OSError):
+            start_pos = None
+        digest = _tree_checksum(source, base, segment_size, workers)
+        if start_pos is not None:
+            source.seek(start_pos)
+        return digest
+
+    hasher = hashlib.new(algorithm)
+    try:
+        # attempt to remember starting position if seekable
+        start_pos = source.tell()
+        source.seek(0)
+    except (AttributeError, OSError):
+        start_pos = None
+
+    for chunk in _iter_file_chunks(source):
+        hasher.update(chunk)
+
+    if start_pos is not None:
+        source.seek(start_pos)
+
+    return hasher.hexdigest()
+
+
+def compute_md5(source: BinaryIO) -> str:
+    """Return the MD5 digest for the provided file-like object."""
+    return compute_checksum(source, "md5")
+
+
+def compute_sha256(source: BinaryIO) -> str:
+    """Return the SHA256 digest for the provided file-like object."""
+    return compute_checksum(source, "sha256")
+
+
+def generate_storage_path(base_directory: os.PathLike[str] | str, filename: str) -> pathlib.Path:
+    """Generate a unique storage path for the file inside the base directory."""
+    base_path = pathlib.Path(base_directory)
+    timestamp = datetime.utcnow().strftime("%Y/%m/%d")
+    unique = secrets.token_hex(8)
+    safe_name = pathlib.Path(filename).name
+    relative_path = pathlib.Path(timestamp) / f"{unique}_{safe_name}"
+    return base_path.joinpath(relative_path)
+
+
+def save_file(source: BinaryIO, destination: os.PathLike[str] | str, filename: str | None = None) -> Tuple[pathlib.Path, int, str, str]:
+    """Persist a file-like object to disk and return metadata.
+
+    Returns a tuple consisting of the written path, file size, md5 and sha256 digests.
+    """
+    if filename is None:
+        filename = getattr(source, "name", secrets.token_hex(4))
+
+    destination_path = generate_storage_path(destination, filename)
+    destination_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Ensure we start reading from the beginning if possible
+    try:
+        source.seek(0)
+    except (AttributeError, OSError):
+        pass
+
+    md5_hash = hashlib.md5()
+    sha_hash = hashlib.sha256()
+    total = 0
+
+    with destination_path.open("wb") as target:
+        for chunk in _iter_file_chunks(source):
+            target.write(chunk)
+            md5_hash.update(chunk)
+            sha_hash.update(chunk)
+            total += len(chunk)
+
+    # reset source for caller if possible
+    try:
+        source.seek(0)
+    except (AttributeError, OSError):
+        pass
+
+    return destination_path, total, md5_hash.hexdigest(), sha_hash.hexdigest()
+
+__all__ = [
+    "DEFAULT_CHECKSUM_ALGORITHM",
+    "DEFAULT_SEGMENT_SIZE",
+    "combine_leaves",
+    "compute_checksum",
+    "hash_leaf",
+    "parse_tree_algorithm",
+    "tree_algorithm",
+    "save_file",
+    "compute_md5",
+    "compute_sha256",
+    "generate_storage_path",
+]
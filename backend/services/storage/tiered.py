@@ -0,0 +1,475 @@
+"""Bounded local disk cache in front of a slow attachment backend."""
+from __future__ import annotations
+
+import contextlib
+import fcntl
+import io
+import json
+import mimetypes
+import os
+import pathlib
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Protocol, Tuple
+
+from . import CHUNK_SIZE, DEFAULT_CHECKSUM_ALGORITHM, compute_checksum
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+DEFAULT_CACHE_BYTES = 10 * 1024 ** 3
+EVICTION_POLICIES = ("lru", "lfu")
+_CHECKSUM_SIDECAR = ".checksum.json"
+_FILL_PREFIX = ".fill-"
+_FILL_LOCKS = ".locks"
+_INDEX_FILE = ".index.json"
+_INDEX_LOCK = ".index.lock"
+
+
+class ChecksumMismatchError(ValueError):
+    """Raised when a blob fetched from the backend does not match its checksum."""
+
+
+class BlobInfo(NamedTuple):
+    filename: str
+    size: int
+    checksum_algorithm: Optional[str]
+    checksum: Optional[str]
+
+
+class AttachmentBackend(Protocol):
+    def stat_attachment(self, model_id: str) -> BlobInfo:
+        ...
+
+    def open_attachment(self, model_id: str) -> BinaryIO:
+        ...
+
+
+def _safe_model_id(model_id: str) -> str:
+    safe_id = pathlib.Path(model_id).name
+    if not safe_id or safe_id != model_id or safe_id.startswith("."):
+        raise KeyError(model_id)
+    return safe_id
+
+
+def _attachment_file(directory: pathlib.Path, model_id: str) -> pathlib.Path:
+    try:
+        candidates = sorted(path for path in directory.iterdir() if path.is_file() and not path.name.startswith("."))
+    except (FileNotFoundError, NotADirectoryError):
+        raise KeyError(model_id) from None
+    if not candidates:
+        raise KeyError(model_id)
+    return candidates[0]
+
+
+class LocalDirectoryBackend:
+    """Backend reading ``<root>/<model_id>/<filename>``, e.g. from a network mount.
+
+    The expected checksum of each attachment is kept next to it in a small
+    sidecar file, mirroring the ``checksum_algorithm``/``checksum`` columns.
+    """
+
+    def __init__(self, root: os.PathLike[str] | str) -> None:
+        self._root = pathlib.Path(root)
+
+    def put_attachment(
+        self,
+        model_id: str,
+        filename: str,
+        payload: bytes,
+        *,
+        checksum_algorithm: str = DEFAULT_CHECKSUM_ALGORITHM,
+    ) -> pathlib.Path:
+        """Write an attachment together with its checksum sidecar."""
+        directory = self._root / _safe_model_id(model_id)
+        directory.mkdir(parents=True, exist_ok=True)
+        target = directory / pathlib.Path(filename).name
+        target.write_bytes(payload)
+        with target.open("rb") as stream:
+            checksum = compute_checksum(stream, checksum_algorithm)
+        (directory / _CHECKSUM_SIDECAR).write_text(
+            json.dumps({"checksum_algorithm": checksum_algorithm, "checksum": checksum})
+        )
+        return target
+
+    def stat_attachment(self, model_id: str) -> BlobInfo:
+        directory = self._root / _safe_model_id(model_id)
+        path = _attachment_file(directory, model_id)
+        try:
+            recorded = json.loads((directory / _CHECKSUM_SIDECAR).read_text())
+        except FileNotFoundError:
+            recorded = {}
+        return BlobInfo(path.name, path.stat().st_size, recorded.get("checksum_algorithm"), recorded.get("checksum"))
+
+    def open_attachment(self, model_id: str) -> BinaryIO:
+        return _attachment_file(self._root / _safe_model_id(model_id), model_id).open("rb")
+
+
+def _stream_size(stream: BinaryIO, default: int) -> int:
+    try:
+        return os.fstat(stream.fileno()).st_size
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return default
+
+
+def _read_chunks(stream: BinaryIO, chunk_size: int) -> Iterator[bytes]:
+    with stream:
+        for chunk in iter(lambda: stream.read(chunk_size), b""):
+            yield chunk
+
+
+@contextlib.contextmanager
+def _file_lock(path: pathlib.Path) -> Iterator[None]:
+    """Hold an exclusive ``flock`` on ``path``, shared by threads and processes alike."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)  # closing the descriptor releases the lock
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _fill_owner(name: str) -> Optional[int]:
+    """Return the pid encoded in a ``.fill-<pid>-...`` temp file name."""
+    pid, _, _ = name[len(_FILL_PREFIX):].partition("-")
+    return int(pid) if pid.isdigit() else None
+
+
+class TieredStorage:
+    """Serve attachments from a size-bounded local cache filled from ``backend``.
+
+    Cached blobs live in ``<cache_root>/<model_id>/<filename>`` and the total
+    size is capped at ``max_bytes``; ``policy`` picks the eviction victim
+    either by recency (``"lru"``) or by hit count (``"lfu"``, ties broken by
+    recency). A blob only enters the cache after its size and recorded
+    checksum have been verified, and blobs larger than the whole cache are
+    streamed straight from the backend.
+
+    Every worker process may point at the same ``cache_root``. Sizes, hit
+    counts and in-progress fills are kept in an on-disk index that is only
+    changed under an ``flock``, so the byte cap holds for all processes
+    together; a per-blob lock file makes concurrent misses in any process
+    share a single backend read. Hits are counted locally and folded into the
+    index at the next index update, at least every ``hit_flush_interval``
+    seconds. Temp files carry their writer's pid and are only cleaned up once
+    that process is gone or they are older than ``stale_fill_age``.
+    """
+
+    # Cache fills and reads go through the filesystem.
+    blocking_reads = True
+
+    def __init__(
+        self,
+        backend: AttachmentBackend,
+        cache_root: os.PathLike[str] | str,
+        *,
+        max_bytes: int = DEFAULT_CACHE_BYTES,
+        policy: str = "lru",
+        hit_flush_interval: float = 5.0,
+        stale_fill_age: float = 60 * 60.0,
+    ) -> None:
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be positive")
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"policy must be one of {', '.join(EVICTION_POLICIES)}")
+        self._backend = backend
+        self._root = pathlib.Path(cache_root)
+        (self._root / _FILL_LOCKS).mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max_bytes
+        self._policy = policy
+        self._hit_flush_interval = hit_flush_interval
+        self._stale_fill_age = stale_fill_age
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        # model id -> [hits, last use] not yet folded into the on-disk index.
+        self._pending_hits: Dict[str, List[float]] = {}
+        self._next_flush = time.monotonic() + hit_flush_interval
+        self._stats = {"hits": 0, "misses": 0, "backend_reads": 0, "evictions": 0, "bypassed": 0}
+        self._reconcile()
+
+    def describe_attachment(self, model_id: str) -> Tuple[str, int, str]:
+        """Describe from the cache when possible, otherwise from backend metadata.
+
+        No blob data is fetched here; the fill happens when the body is read.
+        """
+        path = self._cached_path(_safe_model_id(model_id))
+        if path is not None:
+            try:
+                return path.name, path.stat().st_size, self._guess_mimetype(path.name)
+            except FileNotFoundError:
+                pass  # evicted meanwhile
+        info = self._backend.stat_attachment(model_id)
+        return info.filename, info.size, self._guess_mimetype(info.filename)
+
+    def iter_attachment(self, model_id: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Yield the attachment in chunks, filling the cache first on a miss."""
+        _, _, stream = self._open(model_id)
+        return _read_chunks(stream, chunk_size)
+
+    def stream_attachment(
+        self, model_id: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Tuple[str, int, str, Iterator[bytes]]:
+        """Open the blob once and return ``(filename, size, mimetype, chunks)`` for it.
+
+        The size is taken from the open handle, so an eviction or refill
+        between the headers and the body cannot make them disagree.
+        """
+        filename, size, stream = self._open(model_id)
+        return filename, size, self._guess_mimetype(filename), _read_chunks(stream, chunk_size)
+
+    def get_attachment(self, model_id: str) -> Tuple[str, bytes, str]:
+        filename, _, stream = self._open(model_id)
+        with stream:
+            return filename, stream.read(), self._guess_mimetype(filename)
+
+    def stats(self) -> Dict[str, int]:
+        """Return this process's hit/miss counters and the shared cache usage."""
+        index = self._read_index()
+        used = sum(entry["size"] for entry in index["entries"].values())
+        with self._lock:
+            return dict(self._stats, used_bytes=used, max_bytes=self._max_bytes, entries=len(index["entries"]))
+
+    def _open(self, model_id: str) -> Tuple[str, int, BinaryIO]:
+        """Return ``(filename, size, stream)`` with the size read from the open handle."""
+        # An eviction may unlink the file between lookup and open; an already
+        # open descriptor stays readable, so only the open itself is retried.
+        while True:
+            path = self._ensure_cached(model_id)
+            if path is None:
+                info = self._backend.stat_attachment(model_id)
+                stream = self._backend.open_attachment(model_id)
+                return info.filename, _stream_size(stream, info.size), stream
+            try:
+                stream = path.open("rb")
+            except FileNotFoundError:
+                continue
+            return path.name, os.fstat(stream.fileno()).st_size, stream
+
+    def _cached_path(self, safe_id: str) -> Optional[pathlib.Path]:
+        try:
+            return _attachment_file(self._root / safe_id, safe_id)
+        except KeyError:
+            return None
+
+    def _ensure_cached(self, model_id: str) -> Optional[pathlib.Path]:
+        """Return the cached path, or ``None`` when the blob bypasses the cache."""
+        safe_id = _safe_model_id(model_id)
+        path = self._cached_path(safe_id)
+        if path is not None:
+            self._note_hit(safe_id)
+            return path
+
+        with self._lock:
+            self._stats["misses"] += 1
+            future = self._inflight.get(safe_id)
+            leader = future is None
+            if leader:
+                future = self._inflight[safe_id] = Future()
+
+        if not leader:
+            return future.result()
+        try:
+            path = self._fill(safe_id)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(path)
+            return path
+        finally:
+            with self._lock:
+                self._inflight.pop(safe_id, None)
+
+    def _note_hit(self, safe_id: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._stats["hits"] += 1
+            pending = self._pending_hits.setdefault(safe_id, [0, 0.0])
+            pending[0] += 1
+            pending[1] = time.time()
+            due = now >= self._next_flush
+            if due:
+                self._next_flush = now + self._hit_flush_interval
+        if due:
+            with self._locked_index():
+                pass
+
+    def _fill(self, model_id: str) -> Optional[pathlib.Path]:
+        info = self._backend.stat_attachment(model_id)
+        if info.size > self._max_bytes:
+            with self._lock:
+                self._stats["bypassed"] += 1
+            return None
+
+        # Threads of this process already share one fill; the per-blob lock
+        # extends that to other processes, which find the blob cached once
+        # they get the lock.
+        with _file_lock(self._root / _FILL_LOCKS / f"{model_id}.lock"):
+            path = self._cached_path(model_id)
+            if path is not None:
+                with self._lock:
+                    self._stats["hits"] += 1
+                return path
+            return self._fill_locked(model_id, info)
+
+    def _fill_locked(self, model_id: str, info: BlobInfo) -> pathlib.Path:
+        pid = os.getpid()
+        reservation = f"{pid}:{model_id}"
+        with self._locked_index() as index:
+            self._evict_for(index, info.size)
+            index["reservations"][reservation] = info.size
+
+        committed = False
+        fd, temp_name = tempfile.mkstemp(dir=self._root, prefix=f"{_FILL_PREFIX}{pid}-")
+        try:
+            with self._lock:
+                self._stats["backend_reads"] += 1
+            with os.fdopen(fd, "w+b") as target, self._backend.open_attachment(model_id) as source:
+                shutil.copyfileobj(source, target, CHUNK_SIZE)
+                target.flush()
+                if target.tell() != info.size:
+                    raise ChecksumMismatchError(
+                        f"Attachment {model_id} is {target.tell()} bytes, expected {info.size}"
+                    )
+                if info.checksum:
+                    calculated = compute_checksum(target, info.checksum_algorithm or "sha256")
+                    if calculated != info.checksum:
+                        raise ChecksumMismatchError(
+                            f"Checksum mismatch for attachment {model_id}: expected {info.checksum} got {calculated}"
+                        )
+
+            with self._locked_index() as index:
+                index["reservations"].pop(reservation, None)
+                directory = self._root / model_id
+                directory.mkdir(exist_ok=True)
+                path = directory / pathlib.Path(info.filename).name
+                for previous in directory.iterdir():
+                    if previous != path:
+                        previous.unlink()
+                os.replace(temp_name, path)
+                index["entries"][model_id] = {
+                    "filename": path.name,
+                    "size": info.size,
+                    "hits": 1,
+                    "used_at": time.time(),
+                }
+                committed = True
+            return path
+        finally:
+            if not committed:
+                with self._locked_index() as index:
+                    index["reservations"].pop(reservation, None)
+                try:
+                    os.unlink(temp_name)
+                except FileNotFoundError:
+                    pass
+
+    def _evict_for(self, index: Dict[str, Any], size: int) -> None:
+        """Evict until ``size`` more bytes fit, counting every process's fills in progress."""
+        entries = index["entries"]
+        used = sum(entry["size"] for entry in entries.values())
+        reserved = sum(index["reservations"].values())
+        while entries and used + reserved + size > self._max_bytes:
+            if self._policy == "lfu":
+                victim = min(entries, key=lambda key: (entries[key]["hits"], entries[key]["used_at"]))
+            else:
+                victim = min(entries, key=lambda key: entries[key]["used_at"])
+            used -= entries.pop(victim)["size"]
+            with self._lock:
+                self._stats["evictions"] += 1
+            # Readers that already opened the file keep streaming from the
+            # unlinked inode; later opens miss and refill.
+            shutil.rmtree(self._root / victim, ignore_errors=True)
+
+    @contextlib.contextmanager
+    def _locked_index(self) -> Iterator[Dict[str, Any]]:
+        """Yield the index under the cross-process lock and write it back afterwards."""
+        with _file_lock(self._root / _INDEX_LOCK):
+            index = self._read_index()
+            with self._lock:
+                pending, self._pending_hits = self._pending_hits, {}
+            entries = index["entries"]
+            for model_id, (hits, used_at) in pending.items():
+                entry = entries.get(model_id)
+                if entry is not None:
+                    entry["hits"] += hits
+                    entry["used_at"] = max(entry["used_at"], used_at)
+            reservations = index["reservations"]
+            for key in list(reservations):
+                pid = key.partition(":")[0]
+                if not pid.isdigit() or not _pid_alive(int(pid)):
+                    del reservations[key]
+            yield index
+            temp_path = self._root / f"{_INDEX_FILE}.tmp"
+            temp_path.write_text(json.dumps(index))
+            os.replace(temp_path, self._root / _INDEX_FILE)
+
+    def _read_index(self) -> Dict[str, Any]:
+        try:
+            index = json.loads((self._root / _INDEX_FILE).read_text())
+        except (FileNotFoundError, ValueError):
+            index = {}
+        index.setdefault("entries", {})
+        index.setdefault("reservations", {})
+        return index
+
+    def _reconcile(self) -> None:
+        """Bring the index in line with the blobs on disk and drop stale temp files.
+
+        Blobs cached by an earlier run are re-adopted; they were verified on fill.
+        """
+        now = time.time()
+        with self._locked_index() as index:
+            entries = index["entries"]
+            for child in sorted(self._root.iterdir()):
+                name = child.name
+                if name.startswith(_FILL_PREFIX):
+                    owner = _fill_owner(name)
+                    try:
+                        age = now - child.stat().st_mtime
+                    except FileNotFoundError:
+                        continue
+                    if owner is None or not _pid_alive(owner) or age > self._stale_fill_age:
+                        child.unlink(missing_ok=True)
+                    continue
+                if name.startswith(".") or not child.is_dir():
+                    continue
+                try:
+                    path = _attachment_file(child, name)
+                except KeyError:
+                    shutil.rmtree(child, ignore_errors=True)
+                    entries.pop(name, None)
+                    continue
+                stat = path.stat()
+                entry = entries.get(name)
+                if entry is None or entry["size"] != stat.st_size or entry["filename"] != path.name:
+                    entries[name] = {"filename": path.name, "size": stat.st_size, "hits": 0, "used_at": stat.st_mtime}
+            for model_id in [model_id for model_id in entries if not (self._root / model_id).is_dir()]:
+                del entries[model_id]
+            self._evict_for(index, 0)
+
+    @staticmethod
+    def _guess_mimetype(filename: str) -> str:
+        mimetype, _ = mimetypes.guess_type(filename)
+        return mimetype or "application/octet-stream"
+
+
+__all__ = [
+    "AttachmentBackend",
+    "BlobInfo",
+    "ChecksumMismatchError",
+    "EVICTION_POLICIES",
+    "LocalDirectoryBackend",
+    "TieredStorage",
+]
@@ -0,0 +1,51 @@
+"""Adapters turning blocking chunk iterators into async streams for ASGI."""
+from __future__ import annotations
+
+import asyncio
+from typing import AsyncIterator, Callable, Iterable, Iterator, Optional, Union
+
+Chunk = Union[bytes, memoryview]
+
+_DONE = object()
+
+
+def iter_slices(view: memoryview, chunk_size: int) -> Iterator[memoryview]:
+    """Yield ``view`` in ``chunk_size`` slices without copying the bytes."""
+    for offset in range(0, len(view), chunk_size):
+        yield view[offset:offset + chunk_size]
+
+
+async def aiter_chunks(
+    chunks: Iterable[Chunk],
+    *,
+    blocking: bool = True,
+    on_close: Optional[Callable[[], object]] = None,
+) -> AsyncIterator[bytes]:
+    """Yield ``chunks`` as ``bytes`` without blocking the event loop.
+
+    When ``blocking`` is set each chunk is produced on the default executor,
+    so disk reads and page faults never stall other connections; otherwise
+    chunks are produced inline. Only one chunk is read ahead: the next read
+    starts after the server's ``send`` for the previous one returns, so a slow
+    client applies backpressure all the way down to storage. ``on_close`` runs
+    once the stream is exhausted or abandoned.
+    """
+    try:
+        iterator = iter(chunks)
+        while True:
+            if blocking:
+                chunk = await asyncio.to_thread(next, iterator, _DONE)
+            else:
+                chunk = next(iterator, _DONE)
+            if chunk is _DONE:
+                return
+            yield bytes(chunk)
+            if not blocking:
+                # Give other connections a turn between chunks of a large stream.
+                await asyncio.sleep(0)
+    finally:
+        if on_close is not None:
+            on_close()
+
+
+__all__ = ["aiter_chunks", "iter_slices"]
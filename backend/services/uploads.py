@@ -0,0 +1,461 @@
+"""Resumable, chunked upload sessions staged on local disk."""
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import pathlib
+import re
+import secrets
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional, Set
+
+from .storage import (
+    CHUNK_SIZE,
+    DEFAULT_CHECKSUM_ALGORITHM,
+    combine_leaves,
+    generate_storage_path,
+    hash_leaf,
+    parse_tree_algorithm,
+    tree_algorithm,
+)
+
+DEFAULT_UPLOAD_CHUNK_SIZE = 8 * CHUNK_SIZE
+DEFAULT_SESSION_TTL = 24 * 60 * 60.0
+# A chunk request advances the md5/sha256 frontier by at most this many chunks,
+# so the request that fills a gap does not re-read the rest of the file.
+_ADVANCE_BUDGET = 16
+_SESSION_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class IncompleteUploadError(ValueError):
+    """Raised when committing a session that still has missing chunks."""
+
+    def __init__(self, missing: List[int]) -> None:
+        self.missing = missing
+        super().__init__(f"{len(missing)} chunk(s) have not been uploaded yet")
+
+
+class SessionClosedError(Exception):
+    """Raised when a session was committed, aborted or expired while in use."""
+
+    def __init__(self, session_id: str) -> None:
+        self.session_id = session_id
+        super().__init__(f"Upload session {session_id} is no longer open")
+
+
+class CommittedUpload(NamedTuple):
+    """Metadata for a committed upload; the first four fields match ``save_file``."""
+
+    path: pathlib.Path
+    size: int
+    md5: str
+    sha256: str
+    checksum_algorithm: Optional[str]
+    checksum: Optional[str]
+
+
+class _SessionState:
+    """In-process view of a session: received chunks and the hashing frontier.
+
+    Chunk ``i`` covers bytes ``[i * chunk_size, (i + 1) * chunk_size)`` of one
+    pre-sized staging file. Digests advance over the contiguous prefix of
+    received chunks as they arrive, so commit only has to hash whatever the
+    frontier has not reached yet (nothing, when chunks arrive roughly in order).
+    One request at a time holds the hashing baton and hashes without the
+    session lock, so other chunks of the session keep being accepted.
+
+    With a tree checksum the segments are the chunks themselves: each chunk's
+    leaf digest is computed by the request that wrote it, so concurrent uploads
+    of one file hash on as many cores as there are requests in flight. Leaves
+    are stored in the received-chunk markers and survive worker restarts.
+    """
+
+    def __init__(self, directory: pathlib.Path, manifest: Dict[str, object]) -> None:
+        self.directory = directory
+        self.filename = str(manifest["filename"])
+        self.total_size = int(manifest["total_size"])
+        self.chunk_size = int(manifest["chunk_size"])
+        self.chunk_count = math.ceil(self.total_size / self.chunk_size) if self.total_size else 0
+        self.checksum_algorithm: Optional[str] = manifest.get("checksum_algorithm")  # type: ignore[assignment]
+        tree = parse_tree_algorithm(self.checksum_algorithm) if self.checksum_algorithm else None
+        self.tree_base: Optional[str] = tree[0] if tree else None
+        self.lock = threading.Lock()
+        # Notified whenever a write finishes or the hashing baton is released.
+        self.idle = threading.Condition(self.lock)
+        self.closed = False
+        self.writers = 0
+        self.hashing = False
+        self.received: Set[int] = set()
+        self.leaves: Dict[int, bytes] = {}
+        self.refresh()
+        self.hashed_chunks = 0
+        self.md5 = hashlib.md5()
+        self.sha256 = hashlib.sha256()
+
+    @property
+    def data_path(self) -> pathlib.Path:
+        return self.directory / "data.part"
+
+    def refresh(self) -> None:
+        """Pick up chunks recorded on disk by other workers."""
+        markers = self.directory / "received"
+        for name in os.listdir(markers):
+            if not name.isdigit() or int(name) in self.received:
+                continue
+            index = int(name)
+            self.received.add(index)
+            leaf = (markers / name).read_text()
+            if leaf:
+                self.leaves[index] = bytes.fromhex(leaf)
+
+    def record(self, index: int, leaf: Optional[bytes]) -> None:
+        """Persist the marker for chunk ``index``, replacing it atomically."""
+        markers = self.directory / "received"
+        pending = markers / f"{index}.{secrets.token_hex(4)}.tmp"
+        pending.write_text(leaf.hex() if leaf is not None else "")
+        os.replace(pending, markers / str(index))
+        self.received.add(index)
+        if leaf is not None:
+            self.leaves[index] = leaf
+
+    def tree_checksum(self, fd: int) -> Optional[str]:
+        """Combine the chunk leaves, re-hashing any chunk whose leaf is unknown."""
+        if self.tree_base is None:
+            return None
+        base = self.tree_base
+        leaves = (
+            self.leaves.get(index)
+            or hash_leaf(base, os.pread(fd, self.expected_length(index), index * self.chunk_size))
+            for index in range(self.chunk_count)
+        )
+        return combine_leaves(base, leaves)
+
+    def expected_length(self, index: int) -> int:
+        if index == self.chunk_count - 1:
+            return self.total_size - index * self.chunk_size
+        return self.chunk_size
+
+    def missing(self) -> List[int]:
+        return [index for index in range(self.chunk_count) if index not in self.received]
+
+    def claim_hashing(self) -> bool:
+        """Take the hashing baton if the frontier can move; call with the lock held."""
+        if self.hashing or self.hashed_chunks not in self.received:
+            return False
+        self.hashing = True
+        return True
+
+    def advance(
+        self,
+        fd: int,
+        index: Optional[int] = None,
+        data: Optional[bytes] = None,
+        budget: Optional[int] = None,
+    ) -> None:
+        """Hash contiguous received chunks, using ``data`` for ``index`` when given.
+
+        Call after :meth:`claim_hashing` succeeded and without holding the lock;
+        the baton is released when the frontier stops or ``budget`` chunks
+        have been hashed.
+        """
+        try:
+            while budget is None or budget > 0:
+                current = self.hashed_chunks
+                if current == index and data is not None:
+                    chunk = data
+                else:
+                    chunk = os.pread(fd, self.expected_length(current), current * self.chunk_size)
+                self.md5.update(chunk)
+                self.sha256.update(chunk)
+                if budget is not None:
+                    budget -= 1
+                with self.lock:
+                    self.hashed_chunks += 1
+                    if self.hashed_chunks not in self.received:
+                        break
+        finally:
+            with self.lock:
+                self.hashing = False
+                self.idle.notify_all()
+
+    def status(self, session_id: str) -> Dict[str, object]:
+        return {
+            "session_id": session_id,
+            "filename": self.filename,
+            "total_size": self.total_size,
+            "chunk_size": self.chunk_size,
+            "chunk_count": self.chunk_count,
+            "checksum_algorithm": self.checksum_algorithm,
+            "received": len(self.received),
+            "missing": self.missing(),
+        }
+
+
+class UploadSessionManager:
+    """Create, fill and commit upload sessions under ``destination``.
+
+    Staging lives in ``<destination>/.sessions`` so committing is a rename onto
+    the final path produced by :func:`generate_storage_path`. Session manifests
+    and received-chunk markers are kept on disk, so a client can resume against
+    a restarted or different worker; that worker then hashes the staged prefix
+    once at commit instead of incrementally.
+
+    ``checksum_algorithm`` names the base of the tree checksum recorded with
+    each upload (segment size equal to ``chunk_size``); ``None`` disables it.
+
+    Sessions without a new chunk for ``session_ttl`` seconds are removed by
+    :meth:`sweep_expired`, which also runs at most once per ``sweep_interval``
+    when a session is created.
+    """
+
+    def __init__(
+        self,
+        destination: os.PathLike[str] | str,
+        *,
+        chunk_size: int = DEFAULT_UPLOAD_CHUNK_SIZE,
+        checksum_algorithm: Optional[str] = DEFAULT_CHECKSUM_ALGORITHM,
+        session_ttl: float = DEFAULT_SESSION_TTL,
+        sweep_interval: float = 15 * 60.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        if session_ttl <= 0:
+            raise ValueError("session_ttl must be positive")
+        self._checksum_algorithm = tree_algorithm(checksum_algorithm, chunk_size) if checksum_algorithm else None
+        self._destination = pathlib.Path(destination)
+        self._sessions_root = self._destination / ".sessions"
+        self._chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, _SessionState] = {}
+        self._session_ttl = session_ttl
+        self._sweep_interval = sweep_interval
+        # Compared with file modification times, so this is a wall clock.
+        self._clock = clock
+        self._next_sweep = clock() + sweep_interval
+
+    def create_session(self, filename: str, total_size: int) -> Dict[str, object]:
+        """Start a session for a file of ``total_size`` bytes and describe its chunks."""
+        if total_size < 0:
+            raise ValueError("total_size must not be negative")
+        safe_name = pathlib.Path(filename).name
+        if not safe_name:
+            raise ValueError("filename is required")
+        if self._clock() >= self._next_sweep:
+            self._next_sweep = self._clock() + self._sweep_interval
+            self.sweep_expired()
+
+        session_id = secrets.token_hex(16)
+        directory = self._sessions_root / session_id
+        (directory / "received").mkdir(parents=True)
+        manifest = {
+            "filename": safe_name,
+            "total_size": total_size,
+            "chunk_size": self._chunk_size,
+            "checksum_algorithm": self._checksum_algorithm,
+            "created_at": datetime.utcnow().isoformat(),
+        }
+        (directory / "manifest.json").write_text(json.dumps(manifest))
+        with open(directory / "data.part", "wb") as staging:
+            staging.truncate(total_size)
+
+        state = _SessionState(directory, manifest)
+        with self._lock:
+            self._sessions[session_id] = state
+        return state.status(session_id)
+
+    def status(self, session_id: str) -> Dict[str, object]:
+        state = self._get_state(session_id)
+        with state.lock:
+            self._refresh(session_id, state)
+            return state.status(session_id)
+
+    def write_chunk(self, session_id: str, index: int, data: bytes) -> Dict[str, object]:
+        """Stage chunk ``index``; chunks may arrive in any order and concurrently.
+
+        Re-sending a chunk that was already received is a no-op, which makes
+        retries after a lost response safe. Raises :class:`SessionClosedError`
+        when the session is committed, aborted or swept concurrently.
+        """
+        state = self._get_state(session_id)
+        if not 0 <= index < state.chunk_count:
+            raise ValueError(f"chunk index must be between 0 and {state.chunk_count - 1}")
+        expected = state.expected_length(index)
+        if len(data) != expected:
+            raise ValueError(f"chunk {index} must be {expected} bytes, got {len(data)}")
+
+        with state.lock:
+            if state.closed:
+                raise SessionClosedError(session_id)
+            if index in state.received:
+                return state.status(session_id)
+            # Commit waits for writes in flight, so none lands in a committed file.
+            state.writers += 1
+
+        try:
+            # Leaf hashing, positional writes to disjoint ranges and advancing
+            # the digests do not need the session lock.
+            leaf = hash_leaf(state.tree_base, data) if state.tree_base else None
+            try:
+                fd = os.open(state.data_path, os.O_RDWR)
+            except FileNotFoundError:
+                # Committed, aborted or swept by another worker.
+                self._forget(session_id)
+                raise SessionClosedError(session_id) from None
+            try:
+                written = 0
+                view = memoryview(data)
+                while written < len(view):
+                    written += os.pwrite(fd, view[written:], index * state.chunk_size + written)
+                with state.lock:
+                    try:
+                        state.record(index, leaf)
+                    except FileNotFoundError:
+                        self._forget(session_id)
+                        raise SessionClosedError(session_id) from None
+                    claimed = state.claim_hashing()
+                if claimed:
+                    state.advance(fd, index, data, budget=_ADVANCE_BUDGET)
+            finally:
+                os.close(fd)
+        finally:
+            with state.lock:
+                state.writers -= 1
+                state.idle.notify_all()
+        with state.lock:
+            return state.status(session_id)
+
+    def commit(self, session_id: str) -> CommittedUpload:
+        """Move the assembled file into place and return ``save_file``-style metadata.
+
+        Besides the written path, file size, md5 and sha256 digests, the result
+        carries the tree checksum and its algorithm identifier.
+        """
+        state = self._get_state(session_id)
+        with state.lock:
+            state.idle.wait_for(lambda: state.closed or (state.writers == 0 and not state.hashing))
+            if state.closed:
+                raise SessionClosedError(session_id)
+            self._refresh(session_id, state)
+            missing = state.missing()
+            if missing:
+                raise IncompleteUploadError(missing)
+            state.closed = True
+            try:
+                fd = os.open(state.data_path, os.O_RDONLY)
+            except FileNotFoundError:
+                self._forget(session_id)
+                raise SessionClosedError(session_id) from None
+            try:
+                # Nothing else can touch the session any more, so the frontier
+                # is finished under the lock.
+                if state.claim_hashing():
+                    state.lock.release()
+                    try:
+                        state.advance(fd)
+                    finally:
+                        state.lock.acquire()
+                checksum = state.tree_checksum(fd)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+            destination_path = generate_storage_path(self._destination, state.filename)
+            destination_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(state.data_path, destination_path)
+            shutil.rmtree(state.directory, ignore_errors=True)
+            self._forget(session_id)
+            return CommittedUpload(
+                destination_path,
+                state.total_size,
+                state.md5.hexdigest(),
+                state.sha256.hexdigest(),
+                state.checksum_algorithm,
+                checksum,
+            )
+
+    def abort(self, session_id: str) -> None:
+        """Discard a session and its staged data."""
+        state = self._get_state(session_id)
+        with state.lock:
+            state.closed = True
+        self._forget(session_id)
+        shutil.rmtree(state.directory, ignore_errors=True)
+
+    def sweep_expired(self) -> List[str]:
+        """Remove sessions that have not received a chunk for ``session_ttl`` seconds.
+
+        Returns the ids of the removed sessions. Staging directories left by
+        other workers and by earlier runs are swept too.
+        """
+        try:
+            candidates = [path for path in self._sessions_root.iterdir() if _SESSION_ID.match(path.name)]
+        except FileNotFoundError:
+            return []
+        cutoff = self._clock() - self._session_ttl
+        removed = []
+        for directory in candidates:
+            try:
+                last_activity = (directory / "received").stat().st_mtime
+            except FileNotFoundError:
+                # Half-created or half-removed; judge it by the directory itself.
+                try:
+                    last_activity = directory.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+            if last_activity >= cutoff:
+                continue
+            with self._lock:
+                state = self._sessions.pop(directory.name, None)
+            if state is not None:
+                with state.lock:
+                    state.closed = True
+            shutil.rmtree(directory, ignore_errors=True)
+            removed.append(directory.name)
+        return removed
+
+    def _refresh(self, session_id: str, state: _SessionState) -> None:
+        """Re-read markers; called with the session lock held."""
+        try:
+            state.refresh()
+        except FileNotFoundError:
+            # The staging directory was removed by another worker.
+            state.closed = True
+            self._forget(session_id)
+            raise KeyError(session_id) from None
+
+    def _forget(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _get_state(self, session_id: str) -> _SessionState:
+        if not _SESSION_ID.match(session_id):
+            raise KeyError(session_id)
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is not None:
+                return state
+            directory = self._sessions_root / session_id
+            try:
+                manifest = json.loads((directory / "manifest.json").read_text())
+            except FileNotFoundError:
+                raise KeyError(session_id) from None
+            # Resumed from disk: the frontier starts over and catches up on commit.
+            state = _SessionState(directory, manifest)
+            self._sessions[session_id] = state
+            return state
+
+
+__all__ = [
+    "CommittedUpload",
+    "DEFAULT_SESSION_TTL",
+    "DEFAULT_UPLOAD_CHUNK_SIZE",
+    "IncompleteUploadError",
+    "SessionClosedError",
+    "UploadSessionManager",
+]
@@ -1,14 +1,14 @@
 """Background task to ensure stored model files are valid."""
 from __future__ import annotations
 
-import hashlib
 import logging
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Optional
 
 from sqlalchemy.orm import Session
 
-from ..models import Model
+from ..models import Attachment, Model
+from ..services.storage import compute_checksum
 
 logger = logging.getLogger(__name__)
 
@@ -19,33 +19,55 @@ def _iter_models(session: Session) -> Iterable[Model]:
     return session.query(Model).all()
 
 
-def _calculate_checksum(path: Path) -> str:
-    """Calculate the SHA256 checksum for a file."""
+def _iter_attachments(session: Session) -> Iterable[Attachment]:
+    """Yield attachments from the database, hiding the query implementation."""
+
+    return session.query(Attachment).all()
+
+
+def _calculate_checksum(path: Path, algorithm: str = "sha256") -> str:
+    """Calculate the checksum for a file with the algorithm recorded for it.
+
+    Tree algorithms hash the file's segments in parallel.
+    """
 
-    digest = hashlib.sha256()
     with path.open("rb") as stream:
-        for chunk in iter(lambda: stream.read(1024 * 1024), b""):
-            digest.update(chunk)
-    return digest.hexdigest()
+        return compute_checksum(stream, algorithm)
+
+
+def _resolve(root_path: Path, file_path: str) -> Path:
+    return Path(file_path) if Path(file_path).is_absolute() else root_path / file_path
+
+
+def _verify(label: str, record_id: int, file_path: Path, expected: Optional[str], algorithm: str) -> None:
+    try:
+        if not file_path.exists():
+            raise FileNotFoundError(f"File missing: {file_path}")
+        if expected:
+            calculated = _calculate_checksum(file_path, algorithm)
+            if calculated != expected:
+                raise ValueError(
+                    "Checksum mismatch for %s %s: expected %s got %s" % (label, record_id, expected, calculated)
+                )
+    except Exception as exc:  # noqa: BLE001 - we want to log and continue
+        logger.exception("Integrity check failed for %s_id=%s: %s", label, record_id, exc)
+    else:
+        logger.info("Integrity check passed for %s_id=%s", label, record_id)
 
 
 def check_integrity(session: Session, storage_root: str | Path) -> None:
-    """Validate that every model file exists and matches the stored checksum."""
+    """Validate that every model file and attachment exists and matches its checksum.
+
+    Model files carry sha256 digests. Attachments are hashed with the
+    algorithm stored next to their digest in ``attachments.checksum_algorithm``.
+    """
 
     root_path = Path(storage_root)
     for model in _iter_models(session):
-        file_path = root_path / model.file_path if not Path(model.file_path).is_absolute() else Path(model.file_path)
-        try:
-            if not file_path.exists():
-                raise FileNotFoundError(f"Model file missing: {file_path}")
-            if model.checksum:
-                calculated = _calculate_checksum(file_path)
-                if calculated != model.checksum:
-                    raise ValueError(
-                        "Checksum mismatch for model %s: expected %s got %s"
-                        % (model.id, model.checksum, calculated)
-                    )
-        except Exception as exc:  # noqa: BLE001 - we want to log and continue
-            logger.exception("Integrity check failed for model_id=%s: %s", model.id, exc)
+        _verify("model", model.id, _resolve(root_path, model.file_path), model.checksum, "sha256")
+    for attachment in _iter_attachments(session):
+        if attachment.checksum:
+            expected, algorithm = attachment.checksum, attachment.checksum_algorithm or "sha256"
         else:
-            logger.info("Integrity check passed for model_id=%s", model.id)
+            expected, algorithm = attachment.checksum_sha256, "sha256"
+        _verify("attachment", attachment.id, _resolve(root_path, attachment.file_path), expected, algorithm)
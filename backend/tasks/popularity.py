@@ -0,0 +1,51 @@
+"""Seed the in-memory popularity rankings from stored download records."""
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..models import DownloadRecord
+from ..services.popularity import PopularityTracker, catalog_id
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 10_000
+
+
+def _iter_recent_downloads(session: Session, since: datetime) -> Iterable[Tuple[str, float]]:
+    """Yield ``(model_id, epoch_seconds)`` for downloads after ``since``, streamed in batches."""
+
+    query = (
+        session.query(DownloadRecord.model_id, DownloadRecord.downloaded_at)
+        .filter(DownloadRecord.downloaded_at >= since)
+        .yield_per(BATCH_SIZE)
+    )
+    for model_id, downloaded_at in query:
+        # ``downloaded_at`` is stored as naive UTC.
+        yield catalog_id(model_id), downloaded_at.replace(tzinfo=timezone.utc).timestamp()
+
+
+def load_recent_downloads(session: Session, tracker: PopularityTracker, days: int = 30) -> int:
+    """Backfill ``tracker`` with the last ``days`` of downloads; run once at start-up."""
+
+    since = datetime.utcnow() - timedelta(days=days)
+    loaded = tracker.backfill(_iter_recent_downloads(session, since))
+    logger.info("Loaded %d download records into popularity rankings", loaded)
+    return loaded
+
+
+def seed_from_database(tracker: PopularityTracker) -> int:
+    """Backfill ``tracker`` from the application database; used as its start-up seed."""
+
+    from ..database import engine, session_scope
+
+    try:
+        with session_scope() as session:
+            return load_recent_downloads(session, tracker)
+    finally:
+        # This may run in the gunicorn master just before it forks; pooled
+        # connections must not be inherited by the workers.
+        engine.dispose()
@@ -0,0 +1,155 @@
+from pathlib import Path
+import runpy
+import sys
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import pytest  # noqa: E402
+
+from backend.app import create_app  # noqa: E402
+from backend.services.admission import (  # noqa: E402
+    DOWNLOAD_LANE,
+    METADATA_LANE,
+    AdmissionController,
+    AdmissionRejected,
+    LanePolicy,
+    client_address,
+    lanes_for_threads,
+    parse_networks,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_rejects_with_retry_after_and_refills():
+    clock = FakeClock()
+    controller = AdmissionController({METADATA_LANE: LanePolicy(rate=0.5, burst=2)}, clock=clock)
+
+    controller.admit("client-a", METADATA_LANE).release()
+    controller.admit("client-a", METADATA_LANE).release()
+    with pytest.raises(AdmissionRejected) as excinfo:
+        controller.admit("client-a", METADATA_LANE)
+    assert (excinfo.value.status_code, excinfo.value.retry_after) == (429, 2)
+
+    # Other clients have their own bucket.
+    controller.admit("client-b", METADATA_LANE).release()
+    clock.now = 2.0
+    controller.admit("client-a", METADATA_LANE).release()
+    assert controller.snapshot()[METADATA_LANE] == {"active": 0, "rejected": 1}
+
+
+def test_concurrency_caps_per_client_and_per_lane():
+    controller = AdmissionController(
+        {DOWNLOAD_LANE: LanePolicy(rate=100, burst=100, max_concurrent=3, max_per_client=2)}
+    )
+    first = controller.admit("a", DOWNLOAD_LANE)
+    controller.admit("a", DOWNLOAD_LANE)
+    with pytest.raises(AdmissionRejected) as excinfo:
+        controller.admit("a", DOWNLOAD_LANE)
+    assert excinfo.value.status_code == 429
+
+    controller.admit("b", DOWNLOAD_LANE)
+    with pytest.raises(AdmissionRejected) as excinfo:
+        controller.admit("c", DOWNLOAD_LANE)
+    assert excinfo.value.status_code == 503
+
+    first.release()
+    first.release()  # releasing twice must not free a second slot
+    controller.admit("c", DOWNLOAD_LANE)
+    assert controller.snapshot()[DOWNLOAD_LANE]["active"] == 3
+
+
+def test_idle_clients_are_forgotten_but_active_ones_kept():
+    controller = AdmissionController({METADATA_LANE: LanePolicy(rate=1, burst=1, max_per_client=1)}, max_clients=2)
+    held = controller.admit("busy", METADATA_LANE)
+    controller.admit("idle", METADATA_LANE).release()
+    controller.admit("new", METADATA_LANE).release()
+
+    # "idle" was dropped, so it starts again with a full bucket.
+    controller.admit("idle", METADATA_LANE).release()
+    with pytest.raises(AdmissionRejected):
+        controller.admit("busy", METADATA_LANE)
+    held.release()
+
+
+def test_download_streams_hold_their_slot_until_sent_and_metadata_stays_open():
+    app = create_app()
+    app.config["ADMISSION"] = AdmissionController(
+        {
+            METADATA_LANE: LanePolicy(rate=100, burst=100),
+            DOWNLOAD_LANE: LanePolicy(rate=100, burst=100, max_concurrent=2, max_per_client=1),
+        }
+    )
+    client = app.test_client()
+
+    # Streams that have not been sent yet keep their admission.
+    open_streams = [
+        app.handle_request("GET", "/api/models/mdl-1/attachment", remote_addr=address)
+        for address in ("10.0.0.1", "10.0.0.2")
+    ]
+    assert all(response.status_code == 200 for response in open_streams)
+
+    same_client = client.get("/api/models/mdl-2/attachment", environ_base={"REMOTE_ADDR": "10.0.0.1"})
+    assert same_client.status_code == 429
+    assert same_client.headers["Retry-After"] == "1"
+    lane_full = client.get("/api/models/mdl-2/attachment", environ_base={"REMOTE_ADDR": "10.0.0.3"})
+    assert lane_full.status_code == 503
+    assert "Retry-After" in lane_full.headers
+
+    # Browsing is admitted through its own lane during the download storm.
+    assert client.get("/api/models/mdl-1", environ_base={"REMOTE_ADDR": "10.0.0.1"}).status_code == 200
+    assert client.get("/api/models", environ_base={"REMOTE_ADDR": "10.0.0.3"}).status_code == 200
+
+    for response in open_streams:
+        b"".join(response.iter_encoded())
+        response.close()
+    assert client.get("/api/models/mdl-2/attachment", environ_base={"REMOTE_ADDR": "10.0.0.3"}).status_code == 200
+
+
+def test_download_lane_leaves_threads_for_metadata():
+    for threads in (2, 4, 16, 64):
+        download = lanes_for_threads(threads)[DOWNLOAD_LANE]
+        assert 1 <= download.max_concurrent < threads
+        assert download.max_per_client <= download.max_concurrent
+    assert lanes_for_threads(1)[DOWNLOAD_LANE].max_concurrent is None
+
+    settings = runpy.run_path(str(PROJECT_ROOT / "gunicorn.conf.py"))
+    assert settings["worker_class"] == "gthread"
+    assert lanes_for_threads(settings["threads"])[DOWNLOAD_LANE].max_concurrent < settings["threads"]
+
+
+def test_forwarded_for_is_only_believed_from_trusted_proxies():
+    proxies = parse_networks("10.0.0.0/8, 192.168.1.1")
+
+    assert client_address("203.0.113.9", "198.51.100.1", proxies) == "203.0.113.9"
+    assert client_address("10.1.2.3", "198.51.100.1", proxies) == "198.51.100.1"
+    # A spoofed left-most entry is ignored; the right-most untrusted hop wins.
+    assert client_address("10.1.2.3", "1.2.3.4, 198.51.100.1, 192.168.1.1", proxies) == "198.51.100.1"
+    assert client_address("10.1.2.3", None, proxies) == "10.1.2.3"
+    assert client_address(None, None, ()) == "unknown"
+
+
+def test_clients_behind_a_proxy_get_their_own_buckets():
+    app = create_app()
+    app.config["TRUSTED_PROXIES"] = parse_networks("10.0.0.1")
+    app.config["ADMISSION"] = AdmissionController({METADATA_LANE: LanePolicy(rate=0.001, burst=1)})
+    client = app.test_client()
+
+    def fetch(forwarded_for):
+        return client.get(
+            "/api/models/mdl-1",
+            headers={"X-Forwarded-For": forwarded_for},
+            environ_base={"REMOTE_ADDR": "10.0.0.1"},
+        ).status_code
+
+    assert fetch("198.51.100.1") == 200
+    assert fetch("198.51.100.2") == 200
+    assert fetch("198.51.100.1") == 429
@@ -0,0 +1,88 @@
+from io import BytesIO
+from pathlib import Path
+import sys
+import zipfile
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.app import create_app  # noqa: E402
+from backend.services import InMemoryStorage  # noqa: E402
+from backend.services.archive import compression_for, stream_zip  # noqa: E402
+
+
+class CountingStorage(InMemoryStorage):
+    def __init__(self) -> None:
+        super().__init__()
+        self.chunks_read = 0
+        self._attachments["mdl-6"] = ("plate.3mf", b"PK\x03\x04" + bytes(300_000), "model/3mf")
+
+    def stream_attachment(self, model_id, chunk_size=64 * 1024):
+        filename, size, mimetype, chunks = super().stream_attachment(model_id, chunk_size)
+        return filename, size, mimetype, self._count(chunks)
+
+    def _count(self, chunks):
+        for chunk in chunks:
+            self.chunks_read += 1
+            yield chunk
+
+
+def test_compression_stores_precompressed_formats():
+    assert compression_for("plate.3mf") == zipfile.ZIP_STORED
+    assert compression_for("photo.JPG") == zipfile.ZIP_STORED
+    assert compression_for("part.stl") == zipfile.ZIP_DEFLATED
+
+
+def test_stream_zip_is_lazy_and_reads_in_chunks():
+    storage = CountingStorage()
+
+    stream = stream_zip(storage, ["mdl-1", "mdl-6"])
+    assert storage.chunks_read == 0
+
+    pieces = list(stream)
+    assert storage.chunks_read == 1 + 5
+    assert max(len(piece) for piece in pieces) < 200_000
+
+    archive = zipfile.ZipFile(BytesIO(b"".join(pieces)))
+    assert archive.testzip() is None
+    entries = {info.filename: info for info in archive.infolist()}
+    assert entries["mdl-1/alpha.txt"].compress_type == zipfile.ZIP_DEFLATED
+    assert entries["mdl-6/plate.3mf"].compress_type == zipfile.ZIP_STORED
+    assert archive.read("mdl-1/alpha.txt") == b"Alpha model attachment contents"
+    assert archive.read("mdl-6/plate.3mf") == storage.get_attachment("mdl-6")[1]
+
+
+def test_archive_endpoint_returns_headers_before_reading_entries():
+    app = create_app()
+    storage = CountingStorage()
+    app.config["STORAGE"] = storage
+
+    response = app.handle_request("GET", "/api/models/archive?ids=mdl-1,mdl-3")
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == "application/zip"
+    assert "models.zip" in response.headers["Content-Disposition"]
+    assert storage.chunks_read == 0
+
+    archive = zipfile.ZipFile(BytesIO(b"".join(response.iter_encoded())))
+    assert sorted(archive.namelist()) == ["mdl-1/alpha.txt", "mdl-3/gamma.csv"]
+
+
+def test_archive_endpoint_filters_by_category():
+    client = create_app().test_client()
+
+    response = client.get("/api/models/archive?category=legacy")
+
+    assert response.status_code == 200
+    archive = zipfile.ZipFile(BytesIO(response.data))
+    assert archive.namelist() == ["mdl-4/delta.json"]
+
+
+def test_archive_endpoint_rejects_unknown_or_missing_selection():
+    client = create_app().test_client()
+
+    assert client.get("/api/models/archive?ids=mdl-1,unknown").status_code == 404
+    assert client.get("/api/models/archive?category=none").status_code == 404
+    assert client.get("/api/models/archive").status_code == 400
@@ -0,0 +1,262 @@
+from pathlib import Path
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.asgi import create_asgi_app  # noqa: E402
+from backend.services import InMemoryStorage, MmapStorage  # noqa: E402
+from backend.services.admission import (  # noqa: E402
+    DOWNLOAD_LANE,
+    METADATA_LANE,
+    AdmissionController,
+    LanePolicy,
+)
+from backend.services.storage.tiered import LocalDirectoryBackend, TieredStorage  # noqa: E402
+
+ADMIN_TOKEN = "secret-token"
+
+
+async def call_asgi(app, method, path, headers=None, on_send=None, client=None):
+    """Drive one HTTP request through the ASGI interface and collect the messages."""
+
+    path, _, query_string = path.partition("?")
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": query_string.encode(),
+        "headers": [(key.lower().encode(), value.encode()) for key, value in (headers or {}).items()],
+    }
+    if client is not None:
+        scope["client"] = (client, 50000)
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+        if on_send is not None:
+            await on_send(message)
+
+    await app(scope, receive, send)
+    start = messages[0]
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    response_headers = {key.decode(): value.decode() for key, value in start["headers"]}
+    return start["status"], response_headers, body, messages
+
+
+def request(app, method, path, headers=None):
+    return asyncio.run(call_asgi(app, method, path, headers))
+
+
+class CountingStorage(InMemoryStorage):
+    def __init__(self) -> None:
+        super().__init__()
+        self.chunks_read = 0
+        self._attachments["mdl-big"] = ("big.bin", bytes(64 * 1024 * 8), "application/octet-stream")
+
+    def stream_attachment(self, model_id, chunk_size=64 * 1024):
+        filename, size, mimetype, chunks = super().stream_attachment(model_id, chunk_size)
+        return filename, size, mimetype, self._count(chunks)
+
+    def _count(self, chunks):
+        for chunk in chunks:
+            self.chunks_read += 1
+            yield chunk
+
+
+def test_metadata_routes_are_served_over_asgi():
+    app = create_asgi_app()
+
+    status, headers, body, _ = request(app, "GET", "/api/models")
+    assert status == 200
+    assert headers["content-type"] == "application/json"
+    assert len(json.loads(body)) == 5
+
+    status, _, body, _ = request(app, "GET", "/api/models/mdl-1")
+    assert status == 200
+    assert json.loads(body)["name"] == "Alpha"
+
+    status, _, body, _ = request(app, "GET", "/api/models?ids=mdl-2,nope")
+    assert [entry["id"] for entry in json.loads(body)] == ["mdl-2", "nope"]
+
+    assert request(app, "GET", "/api/models/unknown")[0] == 404
+    request(app, "GET", "/api/models/mdl-2/attachment")
+    status, _, body, _ = request(app, "GET", "/api/models/popular?window=24h")
+    assert [(entry["id"], entry["downloads"]) for entry in json.loads(body)["models"]] == [("mdl-2", 1)]
+    assert json.loads(request(app, "GET", "/health")[2]) == {"status": "ok"}
+
+
+def test_admin_routes_require_token_over_asgi():
+    app = create_asgi_app()
+
+    assert request(app, "POST", "/api/admin/sync")[0] == 401
+    status, _, body, _ = request(app, "POST", "/api/admin/sync", headers={"X-Admin-Token": ADMIN_TOKEN})
+    assert status == 202
+    assert json.loads(body)["runs"] == 1
+
+
+def test_attachment_stream_reads_one_chunk_ahead_of_send():
+    app = create_asgi_app()
+    storage = CountingStorage()
+    app.config["STORAGE"] = storage
+    sent_chunks = 0
+
+    async def slow_client(message):
+        nonlocal sent_chunks
+        if message.get("body"):
+            sent_chunks += 1
+            # The storage must never run ahead of what the client accepted.
+            assert storage.chunks_read <= sent_chunks
+            await asyncio.sleep(0)
+
+    status, headers, body, _ = asyncio.run(
+        call_asgi(app, "GET", "/api/models/mdl-big/attachment", on_send=slow_client)
+    )
+
+    assert status == 200
+    assert headers["content-length"] == str(len(body))
+    assert sent_chunks == storage.chunks_read == 8
+
+
+def test_mmap_attachments_are_read_off_the_event_loop(tmp_path):
+    app = create_asgi_app()
+    storage = MmapStorage(tmp_path)
+    storage.put_attachment("mdl-1", "plate.3mf", b"x" * 200_000)
+    app.config["STORAGE"] = storage
+
+    status, headers, body, _ = request(app, "GET", "/api/models/mdl-1/attachment")
+
+    assert status == 200
+    assert "plate.3mf" in headers["content-disposition"]
+    assert body == b"x" * 200_000
+
+
+def test_many_slow_downloads_share_one_event_loop(tmp_path):
+    app = create_asgi_app()
+    storage = MmapStorage(tmp_path)
+    payload = bytes(range(256)) * 1024
+    storage.put_attachment("mdl-3", "plate.3mf", payload)
+    app.config["STORAGE"] = storage
+    # Every download comes from one test client; only the event loop is measured here.
+    app.config["ADMISSION"] = AdmissionController(
+        {
+            METADATA_LANE: LanePolicy(rate=1000, burst=1000),
+            DOWNLOAD_LANE: LanePolicy(rate=1000, burst=1000),
+        }
+    )
+    # Reads run on the default executor, so threads are bounded by its size
+    # rather than by the number of open downloads.
+    thread_budget = threading.active_count() + min(32, (os.cpu_count() or 1) + 4)
+    peak_threads = 0
+
+    async def slow_client(message):
+        nonlocal peak_threads
+        peak_threads = max(peak_threads, threading.active_count())
+        await asyncio.sleep(0.01)
+
+    async def run_all():
+        return await asyncio.gather(
+            *(call_asgi(app, "GET", "/api/models/mdl-3/attachment", on_send=slow_client) for _ in range(200))
+        )
+
+    started = time.perf_counter()
+    results = asyncio.run(run_all())
+    elapsed = time.perf_counter() - started
+
+    assert all(status == 200 and body == payload for status, _, body, _ in results)
+    assert 0 < peak_threads <= thread_budget
+    # Each download waits on its client five times; run one after another
+    # they would take at least ten seconds.
+    assert elapsed < 5
+
+
+def test_slow_backend_lookups_do_not_block_the_event_loop(tmp_path):
+    class SlowBackend(LocalDirectoryBackend):
+        def stat_attachment(self, model_id):
+            time.sleep(0.2)
+            return super().stat_attachment(model_id)
+
+    backend = SlowBackend(tmp_path / "remote")
+    backend.put_attachment("mdl-1", "plate.3mf", b"p" * 1000)
+    app = create_asgi_app()
+    app.config["STORAGE"] = TieredStorage(backend, tmp_path / "cache")
+
+    async def run_all():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticking = asyncio.create_task(ticker())
+        results = await asyncio.gather(
+            call_asgi(app, "GET", "/api/models/mdl-1/attachment"),
+            call_asgi(app, "GET", "/api/models/archive?ids=mdl-1"),
+        )
+        ticking.cancel()
+        return ticks, results
+
+    ticks, results = asyncio.run(run_all())
+
+    assert [status for status, _, _, _ in results] == [200, 200]
+    # The loop kept running while the backend was being stat'ed.
+    assert ticks >= 10
+
+
+def test_async_download_streams_hold_their_slot_until_sent_and_metadata_stays_open():
+    app = create_asgi_app()
+    controller = AdmissionController(
+        {
+            METADATA_LANE: LanePolicy(rate=100, burst=100),
+            DOWNLOAD_LANE: LanePolicy(rate=100, burst=100, max_concurrent=2, max_per_client=1),
+        }
+    )
+    app.config["ADMISSION"] = controller
+    app.config["STORAGE"] = CountingStorage()
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def stalled_client(message):
+            if message.get("body"):
+                await release.wait()
+
+        # Two downloads from different clients are stuck mid-stream.
+        open_streams = [
+            asyncio.create_task(
+                call_asgi(app, "GET", "/api/models/mdl-big/attachment", on_send=stalled_client, client=address)
+            )
+            for address in ("10.0.0.1", "10.0.0.2")
+        ]
+        while controller.snapshot()[DOWNLOAD_LANE]["active"] < 2:
+            await asyncio.sleep(0.01)
+
+        same_client = await call_asgi(app, "GET", "/api/models/mdl-2/attachment", client="10.0.0.1")
+        assert same_client[0] == 429
+        assert same_client[1]["retry-after"] == "1"
+        lane_full = await call_asgi(app, "GET", "/api/models/mdl-2/attachment", client="10.0.0.3")
+        assert lane_full[0] == 503
+        assert "retry-after" in lane_full[1]
+
+        # Browsing is admitted through its own lane during the download storm.
+        assert (await call_asgi(app, "GET", "/api/models/mdl-1", client="10.0.0.1"))[0] == 200
+        assert (await call_asgi(app, "GET", "/api/models", client="10.0.0.3"))[0] == 200
+
+        release.set()
+        assert all(result[0] == 200 for result in await asyncio.gather(*open_streams))
+        assert controller.snapshot()[DOWNLOAD_LANE]["active"] == 0
+        assert controller.snapshot()[METADATA_LANE]["active"] == 0
+        assert (await call_asgi(app, "GET", "/api/models/mdl-2/attachment", client="10.0.0.3"))[0] == 200
+
+    asyncio.run(scenario())
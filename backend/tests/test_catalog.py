@@ -0,0 +1,183 @@
+from collections import Counter
+from pathlib import Path
+import random
+import sys
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import pytest  # noqa: E402
+
+from backend.app import create_app  # noqa: E402
+from backend.bootstrap import resolve_service  # noqa: E402
+from backend.services import CatalogView, CompactCatalog, InMemoryDatabase  # noqa: E402
+
+
+def make_model(index, category="production", owner="core-team", visibility="public", tags=()):
+    return {
+        "id": f"mdl-{index}",
+        "name": f"Model {index}",
+        "description": "demo",
+        "category": category,
+        "owner": owner,
+        "visibility": visibility,
+        "tags": list(tags),
+    }
+
+
+def test_catalog_round_trips_rows_and_upserts_in_place():
+    catalog = CompactCatalog([make_model(1), make_model(2, category="labs")])
+
+    assert len(catalog) == 2
+    assert catalog.get("mdl-2") == make_model(2, category="labs")
+
+    updated = dict(make_model(1, owner="platform"), name="Renamed")
+    assert catalog.upsert(updated) == 0
+    assert len(catalog) == 2
+    assert catalog.get("mdl-1") == updated
+    with pytest.raises(KeyError):
+        catalog.get("mdl-3")
+
+
+def test_catalog_interns_low_cardinality_columns():
+    catalog = CompactCatalog(make_model(index, category="".join(["bat", "ch"])) for index in range(100))
+
+    categories = {id(row["category"]) for row in catalog.view()}
+    assert len(categories) == 1
+    assert catalog.offsets_where(category="batch", owner="core-team") == list(range(100))
+    assert catalog.offsets_where(category="missing") == []
+
+
+def test_view_is_lazy_and_sliceable():
+    catalog = CompactCatalog(make_model(index) for index in range(10))
+    view = catalog.view()
+
+    assert isinstance(view, CatalogView)
+    assert len(view) == 10
+    assert view[3]["id"] == "mdl-3"
+    assert [row["id"] for row in view[8:]] == ["mdl-8", "mdl-9"]
+
+    catalog.upsert(make_model(10))
+    assert len(view) == 10
+    assert len(catalog.view()) == 11
+
+
+def test_database_lookups_use_catalog():
+    database = InMemoryDatabase()
+
+    assert len(database.list_models()) == 5
+    assert database.get_model("mdl-4")["category"] == "legacy"
+    assert database.get_models(["mdl-5", "nope"]) == [database.get_model("mdl-5"), None]
+
+
+def test_list_endpoint_streams_json_array():
+    app = create_app()
+    for index in range(6, 1200):
+        resolve_service(app.config, "DATABASE").catalog.upsert(make_model(index))
+
+    response = app.handle_request("GET", "/api/models")
+
+    assert response.is_streamed
+    chunks = list(response.iter_encoded())
+    assert len(chunks) > 3
+    response.data = b"".join(chunks)
+    assert len(response.get_json()) == 1199
+
+
+def test_facet_counts_follow_writes():
+    catalog = CompactCatalog(
+        [
+            make_model(1, tags=["vision", "stable"]),
+            make_model(2, category="labs", tags=["vision"]),
+            make_model(3, category="labs", visibility="private"),
+        ]
+    )
+
+    total, facets = catalog.facets()
+    assert total == 3
+    assert facets == {
+        "category": {"production": 1, "labs": 2},
+        "owner": {"core-team": 3},
+        "tag": {"vision": 2, "stable": 1},
+        "visibility": {"public": 2, "private": 1},
+    }
+
+    catalog.upsert(make_model(2, category="production", owner="labs", tags=["stable"]))
+    _, facets = catalog.facets()
+    assert facets["category"] == {"production": 2, "labs": 1}
+    assert facets["owner"] == {"core-team": 2, "labs": 1}
+    assert facets["tag"] == {"vision": 1, "stable": 2}
+
+
+def test_filtered_facets_are_counted_over_matching_rows():
+    catalog = CompactCatalog(
+        [
+            make_model(1, tags=["vision", "stable"]),
+            make_model(2, category="labs", tags=["vision"]),
+            make_model(3, category="labs", visibility="private", tags=["vision", "stable"]),
+        ]
+    )
+
+    total, facets = catalog.facets(tags=["vision", "stable"])
+    assert total == 2
+    assert facets["category"] == {"production": 1, "labs": 1}
+    assert facets["visibility"] == {"public": 1, "private": 1}
+
+    total, facets = catalog.facets(category="labs", visibility="public")
+    assert total == 1
+    assert facets["tag"] == {"vision": 1}
+
+    total, facets = catalog.facets(owner="nobody")
+    assert total == 0
+    assert facets["category"] == {}
+
+
+def test_delete_keeps_rows_and_facets_consistent():
+    rng = random.Random(7)
+    catalog = CompactCatalog()
+    live = {}
+    for step in range(2000):
+        index = rng.randrange(300)
+        if rng.random() < 0.3:
+            assert catalog.delete(f"mdl-{index}") == (live.pop(f"mdl-{index}", None) is not None)
+            continue
+        model = make_model(
+            index,
+            category=rng.choice(["a", "b", "c"]),
+            owner=rng.choice(["x", "y"]),
+            visibility=rng.choice(["public", "private"]),
+            tags=rng.sample(["t1", "t2", "t3", "t4"], rng.randrange(3)),
+        )
+        catalog.upsert(model)
+        live[model["id"]] = model
+
+    assert sorted(row["id"] for row in catalog.view()) == sorted(live)
+    assert all(catalog.get(model_id) == model for model_id, model in live.items())
+    for filters in ({}, {"category": "a"}, {"owner": "y", "tags": ["t2"]}, {"visibility": "public", "tags": ["t1", "t3"]}):
+        rows = [
+            model
+            for model in live.values()
+            if all(model[name] == value for name, value in filters.items() if name != "tags")
+            and set(filters.get("tags", ())) <= set(model["tags"])
+        ]
+        total, facets = catalog.facets(**filters)
+        assert total == len(rows)
+        assert facets["category"] == dict(Counter(model["category"] for model in rows))
+        assert facets["tag"] == dict(Counter(tag for model in rows for tag in model["tags"]))
+    expected = [catalog.offset_of(model["id"]) for model in live.values() if model["category"] == "b"]
+    assert catalog.offsets_where(category="b") == sorted(expected)
+    assert catalog.delete("missing") is False
+
+
+def test_facets_endpoint():
+    client = create_app().test_client()
+
+    response = client.get("/api/models/facets?tag=stable")
+
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert payload["total"] == 2
+    assert payload["facets"]["category"] == {"production": 1, "legacy": 1}
+    assert payload["facets"]["visibility"] == {"public": 1, "private": 1}
+    assert client.get("/api/models/facets").get_json()["total"] == 5
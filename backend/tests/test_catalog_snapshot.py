@@ -0,0 +1,155 @@
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import subprocess
+import sys
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import pytest  # noqa: E402
+
+from backend.app import create_app  # noqa: E402
+from backend.services import InMemoryDatabase, SharedCatalogDatabase, SyncManager  # noqa: E402
+from backend.services.catalog import CompactCatalog  # noqa: E402
+from backend.services.catalog_snapshot import CatalogSnapshot, SharedCatalog, write_snapshot  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_models(count):
+    return [
+        {
+            "id": f"mdl-{index}",
+            "name": f"Model {index} ✓",
+            "description": f"Description {index}",
+            "category": ("vision", "audio", "text")[index % 3],
+            "owner": f"team-{index % 4}",
+            "visibility": "public" if index % 2 else "private",
+            "tags": [f"tag-{index % 5}", f"tag-{index % 7}"],
+        }
+        for index in range(count)
+    ]
+
+
+def test_snapshot_reads_like_the_compact_catalog(tmp_path):
+    models = make_models(200)
+    compact = CompactCatalog(models)
+    snapshot = CatalogSnapshot(write_snapshot(models, tmp_path / "catalog.bin", generation=3))
+
+    assert snapshot.generation == 3
+    assert len(snapshot) == len(compact)
+    assert list(snapshot.view()) == list(compact.view())
+    assert snapshot.get("mdl-137") == compact.get("mdl-137")
+    assert "mdl-199" in snapshot and "mdl-200" not in snapshot
+    with pytest.raises(KeyError):
+        snapshot.get("missing")
+    assert snapshot.offsets_where(category="audio", owner="team-1") == compact.offsets_where(
+        category="audio", owner="team-1"
+    )
+    assert snapshot.id_at(5) == "mdl-5"
+    for filters in ({}, {"category": "text"}, {"visibility": "public", "tags": ["tag-1", "tag-3"]}, {"owner": "x"}):
+        assert snapshot.facets(**filters) == compact.facets(**filters)
+
+
+def test_snapshot_postings_answer_every_filter_combination(tmp_path):
+    models = make_models(500)
+    compact = CompactCatalog(models)
+    snapshot = CatalogSnapshot(write_snapshot(models, tmp_path / "catalog.bin", generation=1))
+
+    for category in (None, "vision", "text", "none"):
+        for owner in (None, "team-2", "team-9"):
+            assert snapshot.offsets_where(category=category, owner=owner) == compact.offsets_where(
+                category=category, owner=owner
+            )
+            for visibility in (None, "public"):
+                for tags in ((), ("tag-3",), ("tag-1", "tag-6"), ("tag-1", "missing")):
+                    filters = dict(category=category, owner=owner, visibility=visibility, tags=tags)
+                    assert snapshot.facets(**filters) == compact.facets(**filters)
+
+
+def test_publish_swaps_generations_and_old_views_stay_readable(tmp_path):
+    path = tmp_path / "catalog.bin"
+    clock = FakeClock()
+    writer = SharedCatalog(path, initial=lambda: make_models(3))
+    reader = SharedCatalog(path, clock=clock)
+
+    first = writer.current()
+    assert first.generation == 1
+    held = reader.current().view()
+
+    assert writer.publish(make_models(5)) == 2
+    # The reader keeps its generation until the next check is due.
+    assert reader.current() is held._catalog
+    clock.now += 1.5
+    assert reader.current().generation == 2
+    assert len(reader.current()) == 5
+
+    # A request that started on generation 1 still reads it consistently.
+    assert [row["id"] for row in held] == ["mdl-0", "mdl-1", "mdl-2"]
+
+
+def test_workers_attach_to_the_same_file(tmp_path):
+    path = tmp_path / "catalog.bin"
+    SharedCatalogDatabase(path).warm_up()
+    script = (
+        "import sys; sys.path.insert(0, sys.argv[1]);"
+        "from backend.services import SharedCatalogDatabase;"
+        "database = SharedCatalogDatabase(sys.argv[2]);"
+        "print(database.catalog.generation, database.get_model('mdl-3')['name'])"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script, str(PROJECT_ROOT), str(path)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    assert output.split() == ["1", "Gamma"]
+
+
+def test_routes_serve_the_shared_snapshot(tmp_path):
+    app = create_app()
+    database = SharedCatalogDatabase(tmp_path / "catalog.bin")
+    app.config["DATABASE"] = database
+    client = app.test_client()
+
+    expected = list(InMemoryDatabase().list_models())
+    assert client.get("/api/models").get_json() == expected
+    assert client.get("/api/models?ids=mdl-2,nope").get_json()[1] == {"id": "nope", "not_found": True}
+    assert client.get("/api/models/facets?visibility=public").get_json()["total"] == 3
+
+    database.publish(expected[:2])
+    assert [row["id"] for row in client.get("/api/models").get_json()] == ["mdl-1", "mdl-2"]
+    assert client.get("/api/models/mdl-4").status_code == 404
+
+
+def test_concurrent_publishers_get_distinct_generations(tmp_path):
+    path = tmp_path / "catalog.bin"
+    writers = [SharedCatalog(path, initial=lambda: make_models(3)) for _ in range(4)]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        generations = list(pool.map(lambda index: writers[index % 4].publish(make_models(index + 1)), range(20)))
+
+    assert sorted(generations) == list(range(1, 21))
+    assert SharedCatalog(path).current().generation == 20
+
+
+def test_admin_sync_publishes_a_new_generation(tmp_path):
+    app = create_app()
+    database = SharedCatalogDatabase(tmp_path / "catalog.bin")
+    app.config["DATABASE"] = database
+    app.config["SYNC_MANAGER"] = SyncManager(source=lambda: make_models(7))
+    database.warm_up()
+
+    response = app.test_client().post("/api/admin/sync", headers={"X-Admin-Token": "secret-token"})
+
+    assert response.status_code == 202
+    assert response.get_json()["state"] == "completed"
+    assert response.get_json()["generation"] == 2
+    assert len(database.catalog) == 7
@@ -0,0 +1,108 @@
+from pathlib import Path
+import hashlib
+import logging
+import random
+import sys
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import pytest  # noqa: E402
+
+# The integrity task runs against the ORM models; skip where SQLAlchemy is absent.
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from backend.models import Attachment, Base, Model  # noqa: E402
+from backend.services.storage import compute_checksum, tree_algorithm  # noqa: E402
+from backend.tasks.check_integrity import check_integrity  # noqa: E402
+
+SEGMENT = 4096
+
+
+def write_payload(path, seed, size=SEGMENT * 5 + 17):
+    payload = random.Random(seed).randbytes(size)
+    path.write_bytes(payload)
+    return payload
+
+
+def seed_session(root):
+    """Store one model and three attachments, each with a valid digest."""
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = Session(engine)
+
+    model_payload = write_payload(root / "model.3mf", seed=1)
+    session.add(Model(id=1, name="Benchy", file_path="model.3mf", checksum=hashlib.sha256(model_payload).hexdigest()))
+
+    tree = tree_algorithm("sha256", SEGMENT)
+    write_payload(root / "tree.bin", seed=2)
+    with (root / "tree.bin").open("rb") as stream:
+        tree_digest = compute_checksum(stream, tree)
+    plain_payload = write_payload(root / "plain.bin", seed=3)
+    legacy_payload = write_payload(root / "legacy.bin", seed=4)
+    session.add_all(
+        [
+            Attachment(
+                id=1, model_id=1, file_name="tree.bin", file_path="tree.bin",
+                checksum_algorithm=tree, checksum=tree_digest,
+            ),
+            Attachment(
+                id=2, model_id=1, file_name="plain.bin", file_path="plain.bin",
+                checksum_algorithm="sha256", checksum=hashlib.sha256(plain_payload).hexdigest(),
+            ),
+            # Rows from before migration 0002 only have the sha256 column.
+            Attachment(
+                id=3, model_id=1, file_name="legacy.bin", file_path=str(root / "legacy.bin"),
+                checksum_sha256=hashlib.sha256(legacy_payload).hexdigest(),
+            ),
+        ]
+    )
+    session.commit()
+    return session
+
+
+def corrupt(path):
+    data = bytearray(path.read_bytes())
+    data[SEGMENT * 2] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+
+def test_tree_and_plain_attachments_pass_when_intact(tmp_path, caplog):
+    session = seed_session(tmp_path)
+    caplog.set_level(logging.INFO, logger="backend.tasks.check_integrity")
+
+    check_integrity(session, tmp_path)
+
+    assert "Integrity check failed" not in caplog.text
+    for label in ("model_id=1", "attachment_id=1", "attachment_id=2", "attachment_id=3"):
+        assert f"Integrity check passed for {label}" in caplog.text
+
+
+@pytest.mark.parametrize("attachment_id, file_name", [(1, "tree.bin"), (2, "plain.bin"), (3, "legacy.bin")])
+def test_corrupted_attachment_fails_and_the_rest_pass(tmp_path, caplog, attachment_id, file_name):
+    session = seed_session(tmp_path)
+    corrupt(tmp_path / file_name)
+    caplog.set_level(logging.INFO, logger="backend.tasks.check_integrity")
+
+    check_integrity(session, tmp_path)
+
+    assert f"Integrity check failed for attachment_id={attachment_id}" in caplog.text
+    assert f"Checksum mismatch for attachment {attachment_id}" in caplog.text
+    for other in {1, 2, 3} - {attachment_id}:
+        assert f"Integrity check passed for attachment_id={other}" in caplog.text
+    assert "Integrity check passed for model_id=1" in caplog.text
+
+
+def test_missing_attachment_fails(tmp_path, caplog):
+    session = seed_session(tmp_path)
+    (tmp_path / "tree.bin").unlink()
+
+    check_integrity(session, tmp_path)
+
+    assert "Integrity check failed for attachment_id=1" in caplog.text
+    assert "File missing" in caplog.text
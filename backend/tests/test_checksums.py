@@ -0,0 +1,68 @@
+from pathlib import Path
+from io import BytesIO
+import hashlib
+import random
+import sys
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import pytest  # noqa: E402
+
+from backend.services.storage import (  # noqa: E402
+    combine_leaves,
+    compute_checksum,
+    hash_leaf,
+    parse_tree_algorithm,
+    tree_algorithm,
+)
+
+SEGMENT = 4096
+
+
+def make_payload(size=SEGMENT * 9 + 123):
+    return random.Random(11).randbytes(size)
+
+
+def test_plain_algorithms_match_hashlib():
+    payload = make_payload()
+    assert compute_checksum(BytesIO(payload), "blake2b") == hashlib.blake2b(payload).hexdigest()
+    assert compute_checksum(BytesIO(payload), "sha256") == hashlib.sha256(payload).hexdigest()
+
+
+def test_parallel_tree_hash_matches_sequential_definition(tmp_path):
+    payload = make_payload()
+    path = tmp_path / "big.bin"
+    path.write_bytes(payload)
+    algorithm = tree_algorithm("blake2b", SEGMENT)
+
+    segments = [payload[offset:offset + SEGMENT] for offset in range(0, len(payload), SEGMENT)]
+    expected = combine_leaves("blake2b", (hash_leaf("blake2b", segment) for segment in segments))
+
+    with path.open("rb") as stream:
+        stream.seek(100)
+        assert compute_checksum(stream, algorithm, workers=4) == expected
+        assert stream.tell() == 100
+    # Sources without a file descriptor hash the same segments in sequence.
+    assert compute_checksum(BytesIO(payload), algorithm) == expected
+
+
+def test_tree_digest_depends_on_segment_size_and_content():
+    payload = make_payload()
+    small = compute_checksum(BytesIO(payload), tree_algorithm("blake2b", SEGMENT))
+    large = compute_checksum(BytesIO(payload), tree_algorithm("blake2b", SEGMENT * 2))
+    altered = compute_checksum(BytesIO(payload[:-1] + b"\0"), tree_algorithm("blake2b", SEGMENT))
+
+    assert len({small, large, altered}) == 3
+    assert compute_checksum(BytesIO(b""), tree_algorithm("sha256", SEGMENT)) == combine_leaves("sha256", [])
+
+
+def test_tree_algorithm_identifiers():
+    assert tree_algorithm("blake2b", 8) == "tree-blake2b:8"
+    assert parse_tree_algorithm("tree-blake2b:8") == ("blake2b", 8)
+    assert parse_tree_algorithm("sha256") is None
+    with pytest.raises(ValueError):
+        parse_tree_algorithm("tree-blake2b")
+    with pytest.raises(ValueError):
+        tree_algorithm("not-a-hash")
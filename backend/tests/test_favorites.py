@@ -0,0 +1,143 @@
+from pathlib import Path
+import sqlite3
+import sys
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.db.migrate import initialize_database  # noqa: E402
+from backend.repositories.favorite_repository import FavoriteRepository  # noqa: E402
+from backend.repositories.query_profiler import QueryProfiler  # noqa: E402
+from backend.services.favorites import FavoritesService  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def create_repository(profiler=None):
+    connection = sqlite3.connect(":memory:")
+    initialize_database(connection)
+    connection.execute("INSERT INTO authors (name) VALUES ('core-team')")
+    connection.executemany(
+        "INSERT INTO models (name, author_id) VALUES (?, 1)",
+        [(f"Model {index}",) for index in range(60)],
+    )
+    connection.commit()
+    return FavoriteRepository(connection, profiler=profiler)
+
+
+def favorite_count(repository, model_id):
+    row = repository._connection.execute(
+        "SELECT favorites FROM model_stats WHERE model_id = ?", (model_id,)
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def test_writes_are_idempotent_and_keep_stats_current():
+    repository = create_repository()
+    service = FavoritesService(repository)
+
+    assert service.add(7, 1) is True
+    assert service.add(7, 1) is False
+    assert service.add(8, 1) is True
+    assert favorite_count(repository, 1) == 2
+
+    assert service.remove(7, 1) is True
+    assert service.remove(7, 1) is False
+    assert favorite_count(repository, 1) == 1
+
+
+def test_page_lookup_uses_one_query_then_the_cached_set():
+    profiler = QueryProfiler()
+    repository = create_repository(profiler)
+    service = FavoritesService(repository)
+    for model_id in (3, 10, 42):
+        service.add(7, model_id)
+    profiler.reset()
+
+    page = list(range(1, 51))
+    assert service.favorited(7, page) == {3, 10, 42}
+    assert service.favorited(7, list(range(40, 60))) == {42}
+    assert sum(entry["count"] for entry in profiler.snapshot()) == 1
+
+    # Writes through the service update the cached set.
+    service.add(7, 11)
+    service.remove(7, 3)
+    assert service.favorite_map(7, [3, 11]) == {3: False, 11: True}
+
+
+def test_cache_is_bounded_and_expires():
+    clock = FakeClock()
+    profiler = QueryProfiler()
+    repository = create_repository(profiler)
+    service = FavoritesService(repository, max_users=2, ttl=30, clock=clock)
+
+    for user_id in (1, 2, 3):
+        service.favorited(user_id, [1])
+    assert service.cached_users() == 2
+
+    # A favorite written by another process shows up once the entry expires.
+    FavoriteRepository(repository._connection).add_favorite(3, 1)
+    assert service.favorited(3, [1]) == set()
+    clock.now += 31
+    assert service.favorited(3, [1]) == {1}
+
+
+def test_users_with_many_favorites_fall_back_to_batched_queries():
+    repository = create_repository()
+    service = FavoritesService(repository, max_ids_per_user=5)
+    for model_id in range(1, 11):
+        service.add(9, model_id)
+
+    assert service.favorited(9, [2, 4, 20]) == {2, 4}
+    assert service.favorited(9, [10, 11]) == {10}
+
+
+def test_writes_during_a_load_are_not_overwritten_by_its_result():
+    repository = create_repository()
+    service = FavoritesService(repository)
+    service.add(7, 3)
+    service.add(7, 4)
+    list_favorite_ids = repository.list_favorite_ids
+
+    def load_then_write(user_id, limit):
+        loaded = list_favorite_ids(user_id, limit=limit)
+        # Another request changes the favorites after the rows were read.
+        service.add(7, 5)
+        service.remove(7, 3)
+        return loaded
+
+    repository.list_favorite_ids = load_then_write
+    assert service.favorited(7, [3, 4, 5]) == {3, 4}
+    repository.list_favorite_ids = list_favorite_ids
+
+    assert service.favorited(7, [3, 4, 5]) == {4, 5}
+    assert service._generations == {}
+
+
+def test_a_write_after_the_load_but_before_caching_is_not_lost():
+    repository = create_repository()
+    service = FavoritesService(repository)
+    list_favorite_ids = repository.list_favorite_ids
+
+    class WriteOnInspect(list):
+        # The service inspects the rows after the query returned and before
+        # caching them; a concurrent favorite lands right then.
+        def __len__(self):
+            if not getattr(self, "written", False):
+                self.written = True
+                service.add(7, 5)
+            return super().__len__()
+
+    repository.list_favorite_ids = lambda user_id, limit: WriteOnInspect(list_favorite_ids(user_id, limit=limit))
+    assert service.favorited(7, [5]) == set()
+    repository.list_favorite_ids = list_favorite_ids
+
+    assert service.favorited(7, [5]) == {5}
+    assert service._generations == {}
@@ -0,0 +1,97 @@
+from pathlib import Path
+import sys
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import pytest  # noqa: E402
+
+from backend.app import create_app  # noqa: E402
+from backend.services import MmapStorage  # noqa: E402
+
+
+def test_get_attachment_returns_zero_copy_view(tmp_path):
+    storage = MmapStorage(tmp_path)
+    storage.put_attachment("mdl-1", "alpha.stl", b"solid alpha")
+
+    filename, payload, mimetype = storage.get_attachment("mdl-1")
+
+    assert filename == "alpha.stl"
+    assert isinstance(payload, memoryview)
+    assert payload.readonly
+    assert payload.tobytes() == b"solid alpha"
+    assert mimetype != ""
+
+
+def test_iter_attachment_yields_memoryview_slices(tmp_path):
+    storage = MmapStorage(tmp_path)
+    storage.put_attachment("mdl-1", "data.bin", bytes(range(256)) * 10)
+
+    chunks = list(storage.iter_attachment("mdl-1", chunk_size=1000))
+
+    assert all(isinstance(chunk, memoryview) for chunk in chunks)
+    assert [len(chunk) for chunk in chunks] == [1000, 1000, 560]
+    assert b"".join(chunks) == bytes(range(256)) * 10
+
+
+def test_lru_caps_open_mappings_while_views_stay_valid(tmp_path):
+    storage = MmapStorage(tmp_path, max_open=2)
+    for index in range(4):
+        storage.put_attachment(f"mdl-{index}", f"file-{index}.txt", f"payload {index}".encode())
+
+    _, first_view, _ = storage.get_attachment("mdl-0")
+    for index in range(1, 4):
+        storage.get_attachment(f"mdl-{index}")
+
+    assert storage.open_mappings() == 2
+    assert first_view.tobytes() == b"payload 0"
+
+
+def test_replaced_file_is_remapped(tmp_path):
+    storage = MmapStorage(tmp_path)
+    storage.put_attachment("mdl-1", "plate.3mf", b"old")
+    assert storage.get_attachment("mdl-1")[1].tobytes() == b"old"
+
+    storage.put_attachment("mdl-1", "plate-v2.3mf", b"newer")
+
+    filename, payload, _ = storage.get_attachment("mdl-1")
+    assert filename == "plate-v2.3mf"
+    assert payload.tobytes() == b"newer"
+
+
+def test_missing_and_empty_attachments(tmp_path):
+    storage = MmapStorage(tmp_path)
+    storage.put_attachment("mdl-1", "empty.txt", b"")
+
+    assert storage.describe_attachment("mdl-1")[1] == 0
+    assert list(storage.iter_attachment("mdl-1")) == []
+    with pytest.raises(KeyError):
+        storage.get_attachment("unknown")
+    with pytest.raises(KeyError):
+        storage.get_attachment("../mdl-1")
+
+
+def test_download_endpoint_serves_mmap_storage(tmp_path, monkeypatch):
+    MmapStorage(tmp_path).put_attachment("mdl-1", "alpha.txt", b"mapped contents")
+    monkeypatch.setenv("ATTACHMENT_ROOT", str(tmp_path))
+    client = create_app().test_client()
+
+    response = client.get("/api/models/mdl-1/attachment")
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    assert response.headers["Content-Length"] == str(len(b"mapped contents"))
+    assert response.data == b"mapped contents"
+    assert client.get("/api/models/mdl-2/attachment").status_code == 404
+
+
+def test_stream_attachment_keeps_size_and_body_from_one_mapping(tmp_path):
+    storage = MmapStorage(tmp_path)
+    storage.put_attachment("mdl-1", "alpha.txt", b"first version")
+
+    filename, size, _, chunks = storage.stream_attachment("mdl-1")
+    storage.put_attachment("mdl-1", "alpha.txt", b"a much longer second version")
+
+    assert (filename, size) == ("alpha.txt", len(b"first version"))
+    assert b"".join(bytes(chunk) for chunk in chunks) == b"first version"
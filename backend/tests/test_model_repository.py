@@ -0,0 +1,140 @@
+from pathlib import Path
+import sqlite3
+import sys
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.db.migrate import apply_migrations, initialize_database  # noqa: E402
+from backend.repositories.model_repository import ModelRepository  # noqa: E402
+from backend.repositories.query_profiler import QueryProfiler  # noqa: E402
+
+
+def create_repository(profiler=None):
+    connection = sqlite3.connect(":memory:")
+    initialize_database(connection)
+    connection.execute("INSERT INTO authors (name) VALUES ('core-team')")
+    for index in range(3):
+        connection.execute(
+            "INSERT INTO models (name, description, author_id) VALUES (?, ?, 1)",
+            (f"Model {index}", "demo"),
+        )
+    return ModelRepository(connection, profiler=profiler)
+
+
+def test_get_models_by_ids_uses_single_query_in_request_order():
+    profiler = QueryProfiler(slow_threshold_ms=10_000)
+    repository = create_repository(profiler)
+
+    rows = repository.get_models_by_ids([3, 99, 1, 3])
+
+    assert [row["id"] if row is not None else None for row in rows] == [3, None, 1, 3]
+    (entry,) = profiler.snapshot()
+    assert entry["count"] == 1
+    assert "IN (?...)" in entry["sql"]
+
+
+def test_get_models_by_ids_with_no_ids_skips_query():
+    profiler = QueryProfiler()
+    repository = create_repository(profiler)
+
+    assert repository.get_models_by_ids([]) == []
+    assert profiler.snapshot() == []
+
+
+def create_tagged_repository(profiler=None):
+    repository = create_repository(profiler)
+    connection = repository._connection
+    connection.execute("INSERT INTO authors (name) VALUES ('labs')")
+    connection.execute("UPDATE models SET visibility = 'public' WHERE id IN (1, 2)")
+    connection.execute("UPDATE models SET author_id = 2 WHERE id = 3")
+    connection.executemany("INSERT INTO tags (name) VALUES (?)", [("vase",), ("benchy",), ("abs",)])
+    connection.executemany(
+        "INSERT INTO model_tag (model_id, tag_id) VALUES (?, ?)",
+        [(1, 1), (1, 2), (2, 1), (3, 2), (3, 3)],
+    )
+    return repository
+
+
+def test_migrations_are_recorded_and_idempotent():
+    repository = create_repository()
+    connection = repository._connection
+
+    version = connection.execute("PRAGMA user_version").fetchone()[0]
+    assert version >= 1
+    assert apply_migrations(connection) == version
+    indexes = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_model_tag_tag_model", "idx_models_visibility_updated", "idx_models_author_updated"} <= indexes
+    attachment_columns = {row[1] for row in connection.execute("PRAGMA table_info(attachments)")}
+    assert {"checksum_algorithm", "checksum"} <= attachment_columns
+
+
+def test_tag_names_are_kept_current_by_triggers():
+    repository = create_tagged_repository()
+    connection = repository._connection
+
+    def tag_names(model_id):
+        return connection.execute("SELECT tag_names FROM models WHERE id = ?", (model_id,)).fetchone()[0]
+
+    assert tag_names(1) == "benchy,vase"
+    assert tag_names(3) == "abs,benchy"
+
+    connection.execute("DELETE FROM model_tag WHERE model_id = 1 AND tag_id = 2")
+    assert tag_names(1) == "vase"
+
+    connection.execute("UPDATE tags SET name = 'petg' WHERE name = 'abs'")
+    assert tag_names(3) == "benchy,petg"
+    assert tag_names(2) == "vase"
+
+
+def test_list_models_returns_denormalized_tags_and_filters_on_all_tags():
+    repository = create_tagged_repository()
+
+    rows = repository.list_models(tags=["vase", "benchy"])
+    assert [row["id"] for row in rows] == [1]
+    assert rows[0]["tag_names"] == "benchy,vase"
+    assert repository.count_models(tags=["vase"]) == 2
+    assert repository.count_models(tags=["vase"], visibility="public", keywords="Model") == 2
+    assert repository.count_models(author_ids=[2]) == 1
+    assert repository.count_models(author_ids=[1, 2]) == 3
+
+
+def _plan_for(profiler, prefix):
+    entries = [entry for entry in profiler.snapshot() if entry["sql"].startswith(prefix)]
+    assert len(entries) == 1
+    return entries[0]
+
+
+def test_visibility_listing_uses_covering_index_without_sort():
+    profiler = QueryProfiler(slow_threshold_ms=0)
+    repository = create_tagged_repository(profiler)
+
+    repository.list_models(visibility="public")
+
+    entry = _plan_for(profiler, "SELECT m.*")
+    assert any("idx_models_visibility_updated" in detail for detail in entry["plan"])
+    assert not any("ORDER BY" in detail for detail in entry["plan"])
+    assert entry["full_scan"] is False
+
+
+def test_author_listing_uses_author_updated_index():
+    profiler = QueryProfiler(slow_threshold_ms=0)
+    repository = create_tagged_repository(profiler)
+
+    repository.list_models(author_ids=[2])
+
+    entry = _plan_for(profiler, "SELECT m.*")
+    assert any("idx_models_author_updated" in detail for detail in entry["plan"])
+    assert not any("ORDER BY" in detail for detail in entry["plan"])
+
+
+def test_tag_filter_goes_from_tag_to_model_through_index():
+    profiler = QueryProfiler(slow_threshold_ms=0)
+    repository = create_tagged_repository(profiler)
+
+    repository.count_models(tags=["vase", "benchy"])
+
+    entry = _plan_for(profiler, "SELECT COUNT(*)")
+    assert any("idx_model_tag_tag_model" in detail for detail in entry["plan"])
+    assert entry["full_scan"] is False
@@ -5,6 +5,7 @@ PROJECT_ROOT = Path(__file__).resolve().parents[2]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
+from backend.api.routes.common import content_disposition  # noqa: E402
 from backend.app import create_app  # noqa: E402
 
 
@@ -56,9 +57,48 @@ def test_download_attachment_returns_file_payload():
     assert response.data == b"Alpha model attachment contents"
 
 
+def test_content_disposition_quotes_and_encodes_file_names():
+    assert content_disposition("alpha.txt") == 'attachment; filename="alpha.txt"'
+    assert content_disposition('my "plate"; v2.stl') == 'attachment; filename="my \\"plate\\"; v2.stl"'
+    header = content_disposition("Düse 0,4 ✓.3mf")
+    assert header == "attachment; filename=\"Duse 0,4 .3mf\"; filename*=UTF-8''D%C3%BCse%200%2C4%20%E2%9C%93.3mf"
+    header.encode("latin-1")
+
+
 def test_download_attachment_for_unknown_model_returns_404():
     client = create_client()
 
     response = client.get("/api/models/unknown/attachment")
 
     assert response.status_code == 404
+
+
+def test_batch_get_models_preserves_order_and_marks_missing():
+    client = create_client()
+
+    response = client.get("/api/models?ids=mdl-3,unknown,mdl-1")
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [entry["id"] for entry in data] == ["mdl-3", "unknown", "mdl-1"]
+    assert data[0]["name"] == "Gamma"
+    assert data[1] == {"id": "unknown", "not_found": True}
+    assert "not_found" not in data[2]
+
+
+def test_batch_get_models_accepts_repeated_ids():
+    client = create_client()
+
+    response = client.get("/api/models?ids=mdl-2&ids=mdl-4")
+
+    assert response.status_code == 200
+    assert [entry["name"] for entry in response.get_json()] == ["Beta", "Delta"]
+
+
+def test_batch_get_models_rejects_too_many_ids():
+    client = create_client()
+    ids = ",".join(f"mdl-{index}" for index in range(101))
+
+    response = client.get(f"/api/models?ids={ids}")
+
+    assert response.status_code == 400
@@ -0,0 +1,200 @@
+from pathlib import Path
+import sqlite3
+import sys
+import time
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.app import create_app  # noqa: E402
+from backend.services import InMemoryDatabase  # noqa: E402
+from backend.services.popularity import (  # noqa: E402
+    PopularityTracker,
+    SharedPopularityTracker,
+    WindowSpec,
+    catalog_id,
+)
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+class FakeClock:
+    def __init__(self, now=100 * DAY):
+        self.now = float(now)
+
+    def __call__(self):
+        return self.now
+
+
+def test_windows_rank_and_expire_bucket_by_bucket():
+    clock = FakeClock()
+    tracker = PopularityTracker(clock=clock)
+    for _ in range(3):
+        tracker.record("mdl-1")
+    tracker.record("mdl-2", at=clock.now - 3 * DAY)
+    tracker.record("mdl-2", at=clock.now - 3 * DAY)
+    tracker.record("mdl-2", at=clock.now - 3 * DAY)
+    tracker.record("mdl-2")
+    tracker.record("mdl-3", at=clock.now - 40 * DAY)  # older than every window
+
+    assert tracker.rankings("24h") == [("mdl-1", 3), ("mdl-2", 1)]
+    assert tracker.rankings("7d") == [("mdl-2", 4), ("mdl-1", 3)]
+    assert tracker.rankings("30d", limit=1) == [("mdl-2", 4)]
+
+    clock.now += DAY
+    assert tracker.rankings("24h") == []
+    assert tracker.rankings("7d") == [("mdl-2", 4), ("mdl-1", 3)]
+    clock.now += 4 * DAY
+    assert tracker.rankings("7d") == [("mdl-1", 3), ("mdl-2", 1)]
+
+
+def test_top_k_stays_exact_as_counts_change():
+    clock = FakeClock()
+    tracker = PopularityTracker({"1h": WindowSpec(HOUR, 60)}, top_k=2, clock=clock)
+    tracker.record("a", count=5)
+    tracker.record("b", count=3)
+    tracker.record("c", count=4)  # displaces "b"
+    assert tracker.rankings("1h") == [("a", 5), ("c", 4)]
+
+    clock.now += 30 * 60
+    tracker.record("b", count=3)  # climbs past "c" and "a"
+    assert tracker.rankings("1h") == [("b", 6), ("a", 5)]
+
+    # Once the first half hour expires only later downloads remain.
+    clock.now += 31 * 60
+    assert tracker.rankings("1h") == [("b", 3)]
+
+
+def test_backfill_accepts_unordered_events():
+    clock = FakeClock()
+    tracker = PopularityTracker(clock=clock)
+    loaded = tracker.backfill([("x", clock.now - 2 * HOUR), ("y", clock.now - 10 * DAY), ("x", clock.now - 5 * DAY)])
+
+    assert loaded == 3
+    assert tracker.rankings("24h") == [("x", 1)]
+    assert tracker.rankings("30d") == [("x", 2), ("y", 1)]
+
+
+def test_popular_endpoint_counts_attachment_downloads():
+    app = create_app()
+    client = app.test_client()
+    for _ in range(2):
+        assert client.get("/api/models/mdl-3/attachment").status_code == 200
+    assert client.get("/api/models/mdl-1/attachment").status_code == 200
+    assert client.get("/api/models/missing/attachment").status_code == 404
+
+    response = client.get("/api/models/popular?window=24h")
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert payload["window"] == "24h"
+    assert [(entry["id"], entry["downloads"]) for entry in payload["models"]] == [("mdl-3", 2), ("mdl-1", 1)]
+    assert payload["models"][0]["name"] == "Gamma"
+
+    assert client.get("/api/models/popular?window=1y").status_code == 400
+    assert client.get("/api/models/popular?limit=0").status_code == 400
+
+
+def test_shared_trackers_rank_downloads_from_every_worker(tmp_path):
+    clock = FakeClock()
+    path = tmp_path / "popularity.db"
+    first = SharedPopularityTracker(path, clock=clock, sync_interval=3600)
+    second = SharedPopularityTracker(path, clock=clock, sync_interval=3600)
+
+    first.record("mdl-1", count=2)
+    second.record("mdl-2", count=3)
+    # Recording and ranking only use memory; the file is read by syncs.
+    assert second.rankings("24h") == [("mdl-2", 3)]
+    first.sync()
+    second.sync()
+    first.record("mdl-1")  # not in the file until the next sync
+    assert second.rankings("24h") == [("mdl-2", 3), ("mdl-1", 2)]
+
+    first.sync()
+    second.sync()
+    assert first.rankings("24h") == [("mdl-1", 3), ("mdl-2", 3)]
+    assert second.rankings("24h") == [("mdl-1", 3), ("mdl-2", 3)]
+    restarted = SharedPopularityTracker(path, clock=clock)
+    restarted.sync()
+    assert restarted.rankings("7d") == [("mdl-1", 3), ("mdl-2", 3)]
+
+    clock.now += 2 * DAY
+    first.sync()
+    assert first.rankings("24h") == []
+    assert first.rankings("7d") == [("mdl-1", 3), ("mdl-2", 3)]
+    for tracker in (first, second, restarted):
+        tracker.stop()
+
+
+def test_shared_tracker_syncs_in_the_background(tmp_path):
+    path = tmp_path / "popularity.db"
+    first = SharedPopularityTracker(path, sync_interval=0.01)
+    second = SharedPopularityTracker(path, sync_interval=0.01)
+
+    first.record("mdl-1", count=2)
+    deadline = time.monotonic() + 5
+    while second.rankings("24h") != [("mdl-1", 2)] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert second.rankings("24h") == [("mdl-1", 2)]
+    first.stop()
+    second.stop()
+
+
+def test_failed_syncs_keep_counts_and_never_reach_the_caller(tmp_path, caplog):
+    clock = FakeClock()
+    path = tmp_path / "popularity.db"
+    tracker = SharedPopularityTracker(path, clock=clock, sync_interval=0.01)
+    connect = tracker._connect
+
+    def locked():
+        raise sqlite3.OperationalError("database is locked")
+
+    tracker._connect = locked
+    tracker.record("mdl-1")  # starts the background sync, which fails
+    deadline = time.monotonic() + 5
+    while "Could not sync" not in caplog.text and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert "Could not sync" in caplog.text
+    assert tracker.rankings("24h") == [("mdl-1", 1)]
+
+    tracker._connect = connect
+    tracker.stop()
+    reader = SharedPopularityTracker(path, clock=clock)
+    reader.sync()
+    assert reader.rankings("24h") == [("mdl-1", 1)]
+    reader.stop()
+
+
+def test_seed_runs_only_for_an_empty_tracker(tmp_path):
+    clock = FakeClock()
+    seeded = []
+
+    def seed(tracker):
+        seeded.append(tracker)
+        tracker.backfill([(catalog_id(4), clock.now - HOUR)])
+
+    path = tmp_path / "popularity.db"
+    first = SharedPopularityTracker(path, clock=clock)
+    assert first.seed(seed) is True
+    second = SharedPopularityTracker(path, clock=clock)
+    assert second.seed(seed) is False
+
+    assert seeded == [first]
+    assert second.rankings("24h") == [("mdl-4", 1)]
+    first.stop()
+    second.stop()
+
+
+def test_popular_limit_applies_after_unknown_models_are_dropped():
+    app = create_app()
+    tracker = PopularityTracker()
+    app.config["POPULARITY"] = tracker
+    tracker.record("deleted", count=5)
+    tracker.record("mdl-2", count=2)
+    tracker.record("mdl-5")
+
+    payload = app.test_client().get("/api/models/popular?window=24h&limit=2").get_json()
+
+    assert [entry["id"] for entry in payload["models"]] == ["mdl-2", "mdl-5"]
@@ -0,0 +1,124 @@
+from pathlib import Path
+import sqlite3
+import sys
+import time
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.app import create_app  # noqa: E402
+from backend.bootstrap import model_repository  # noqa: E402
+from backend.repositories.model_repository import ModelRepository  # noqa: E402
+from backend.repositories.query_profiler import QueryProfiler, normalize_sql  # noqa: E402
+
+ADMIN_TOKEN = "secret-token"
+SCHEMA_PATH = PROJECT_ROOT / "backend" / "db" / "schema.sql"
+
+
+def create_connection():
+    connection = sqlite3.connect(":memory:")
+    connection.executescript(SCHEMA_PATH.read_text())
+    connection.execute("INSERT INTO authors (name) VALUES ('core-team')")
+    for index in range(3):
+        connection.execute(
+            "INSERT INTO models (name, description, author_id) VALUES (?, ?, 1)",
+            (f"Model {index}", "demo"),
+        )
+    connection.execute("INSERT INTO tags (name) VALUES ('printer')")
+    connection.execute("INSERT INTO model_tag (model_id, tag_id) VALUES (1, 1)")
+    return connection
+
+
+def test_normalize_sql_collapses_in_lists_and_whitespace():
+    assert normalize_sql("SELECT *  FROM t\nWHERE id IN (?, ?,?)") == "SELECT * FROM t WHERE id IN (?...)"
+    assert normalize_sql("SELECT * FROM t WHERE id IN (?)") == "SELECT * FROM t WHERE id IN (?)"
+
+
+def test_profiler_aggregates_queries_and_flags_full_scans():
+    profiler = QueryProfiler(slow_threshold_ms=0)
+    repository = ModelRepository(create_connection(), profiler=profiler)
+
+    repository.list_models(keywords="Model")
+    repository.list_models(keywords="demo", author_ids=[1, 1])
+    repository.count_models(tags=["printer"])
+
+    stats = {entry["sql"]: entry for entry in profiler.snapshot()}
+    list_stats = [entry for sql, entry in stats.items() if sql.startswith("SELECT m.*")]
+    assert len(list_stats) == 2
+    keyword_only = next(entry for entry in list_stats if "author_id" not in entry["sql"])
+    assert keyword_only["count"] == 1
+    assert keyword_only["param_shapes"] == ["(str, str, int, int)"]
+    assert keyword_only["slow_count"] == 1
+    assert keyword_only["full_scan"] is True
+    assert any(detail.startswith("SCAN") for detail in keyword_only["plan"])
+
+    samples = profiler.slow_queries()
+    assert len(samples) == 3
+    assert all("plan" in sample for sample in samples)
+
+
+def test_profiler_skips_explain_below_threshold():
+    profiler = QueryProfiler(slow_threshold_ms=10_000)
+    repository = ModelRepository(create_connection(), profiler=profiler)
+
+    assert len(repository.list_models()) == 3
+
+    (entry,) = profiler.snapshot()
+    assert entry["slow_count"] == 0
+    assert entry["plan"] is None
+    assert profiler.slow_queries() == []
+
+
+def test_admin_query_stats_endpoint_is_404_without_the_env_flag(monkeypatch):
+    monkeypatch.delenv("QUERY_PROFILE_SLOW_MS", raising=False)
+    client = create_app().test_client()
+
+    disabled = client.get("/api/admin/queries", headers={"X-Admin-Token": ADMIN_TOKEN})
+    assert disabled.status_code == 404
+
+
+def test_admin_query_stats_endpoint(monkeypatch):
+    monkeypatch.setenv("QUERY_PROFILE_SLOW_MS", "0")
+    app = create_app()
+    client = app.test_client()
+
+    model_repository(app.config, create_connection()).count_models(keywords="x")
+
+    assert client.get("/api/admin/queries").status_code == 401
+    response = client.get("/api/admin/queries", headers={"X-Admin-Token": ADMIN_TOKEN})
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert payload["slow_threshold_ms"] == 0
+    assert payload["queries"][0]["count"] == 1
+    assert payload["slow_queries"][0]["full_scan"] is True
+
+
+def test_profiler_times_rows_fetched_after_execute():
+    connection = create_connection()
+    # Each produced row sleeps, so nearly all of the work happens while fetching.
+    connection.create_function("pause", 1, lambda value: time.sleep(0.01) or value)
+    profiler = QueryProfiler(slow_threshold_ms=10_000)
+
+    cursor = profiler.execute(connection, "SELECT pause(id) FROM models")
+    assert profiler.snapshot() == []
+    assert len(list(cursor)) == 3
+
+    (entry,) = profiler.snapshot()
+    assert entry["count"] == 1
+    assert entry["total_ms"] >= 30
+
+
+def test_cursor_closed_before_its_rows_run_out_is_recorded_on_close():
+    profiler = QueryProfiler(slow_threshold_ms=0)
+    connection = create_connection()
+
+    cursor = profiler.execute(connection, "SELECT id FROM models ORDER BY id")
+    assert cursor.fetchone() == (1,)
+    assert profiler.snapshot() == []
+
+    cursor.close()
+    cursor.close()
+    (entry,) = profiler.snapshot()
+    assert entry["count"] == 1
+    assert profiler.slow_queries()[0]["plan"]
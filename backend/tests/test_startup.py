@@ -0,0 +1,146 @@
+from pathlib import Path
+from types import SimpleNamespace
+import gc
+import json
+import runpy
+import subprocess
+import sys
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.app import create_app  # noqa: E402
+from backend.bootstrap import LazyService, resolve_service, warm_up  # noqa: E402
+from backend.services import MmapStorage  # noqa: E402
+from backend.services.popularity import PopularityTracker  # noqa: E402
+
+IMPORT_TIME_BUDGET_SECONDS = 2.0
+
+PROBE = """
+import importlib.abc, json, sys, time
+
+attempted = set()
+
+
+class RecordImports(importlib.abc.MetaPathFinder):
+    # Sees every import attempt, so the check holds whether or not the
+    # database packages are installed.
+    def find_spec(self, name, path, target=None):
+        attempted.add(name)
+        return None
+
+
+sys.meta_path.insert(0, RecordImports())
+started = time.perf_counter()
+import backend.app
+calls = []
+original = backend.app.create_app
+def counting_create_app():
+    calls.append(1)
+    return original()
+backend.app.create_app = counting_create_app
+import backend.main
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "elapsed": elapsed,
+    "create_app_calls": len(calls),
+    "services_built": all(
+        value.built for value in backend.main.app.config.values() if hasattr(value, "built")
+    ),
+    "modules": sorted(sys.modules),
+    "attempted": sorted(attempted),
+}))
+"""
+
+
+def run_probe():
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout)
+
+
+def test_importing_main_builds_and_warms_the_app_once():
+    probe = run_probe()
+
+    assert probe["create_app_calls"] == 1
+    assert probe["services_built"] is True
+    assert probe["elapsed"] < IMPORT_TIME_BUDGET_SECONDS
+
+
+def test_request_path_does_not_import_database_layer():
+    probe = run_probe()
+    database_layer = {"sqlalchemy", "sqlite3", "backend.models", "backend.database", "backend.tasks.popularity"}
+
+    assert not database_layer & set(probe["modules"])
+    assert not database_layer & set(probe["attempted"])
+
+
+def test_services_are_built_lazily_and_once():
+    app = create_app()
+    lazy = app.config["DATABASE"]
+
+    assert isinstance(lazy, LazyService)
+    assert lazy.built is False
+    first = resolve_service(app.config, "DATABASE")
+    assert lazy.built is True
+    assert resolve_service(app.config, "DATABASE") is first
+    assert app.test_client().get("/api/models/mdl-1").status_code == 200
+    assert resolve_service(app.config, "DATABASE") is first
+
+
+def test_warm_up_maps_attachments_ahead_of_traffic(tmp_path, monkeypatch):
+    MmapStorage(tmp_path).put_attachment("mdl-1", "alpha.txt", b"warm")
+    monkeypatch.setenv("ATTACHMENT_ROOT", str(tmp_path))
+    app = create_app()
+
+    warm_up(app.config)
+
+    storage = resolve_service(app.config, "STORAGE")
+    assert isinstance(storage, MmapStorage)
+    assert storage.open_mappings() == 1
+
+
+def test_gunicorn_hooks_seed_popularity_once_outside_warm_up(monkeypatch):
+    import backend.bootstrap
+    import backend.main
+
+    loaded = []
+    monkeypatch.setattr(backend.bootstrap, "_load_popularity", loaded.append)
+    monkeypatch.setattr(backend.bootstrap, "freeze_before_fork", lambda: None)
+    monkeypatch.setitem(backend.main.app.config, "POPULARITY", PopularityTracker())
+    hooks = runpy.run_path(str(PROJECT_ROOT / "gunicorn.conf.py"))
+
+    # With preloading the master seeds before forking and workers do not.
+    hooks["when_ready"](SimpleNamespace(cfg=SimpleNamespace(preload_app=True)))
+    hooks["post_worker_init"](SimpleNamespace(cfg=SimpleNamespace(preload_app=True)))
+    assert loaded == [backend.main.app.config["POPULARITY"]]
+
+    # Without it each worker seeds its own app.
+    monkeypatch.setitem(backend.main.app.config, "POPULARITY", PopularityTracker())
+    hooks["post_worker_init"](SimpleNamespace(cfg=SimpleNamespace(preload_app=False)))
+    assert loaded[1:] == [backend.main.app.config["POPULARITY"]]
+
+
+def test_warm_up_leaves_the_collector_alone_unless_forking(monkeypatch):
+    frozen_before = gc.get_freeze_count()
+    warm_up(create_app().config)
+    assert gc.get_freeze_count() == frozen_before
+
+    hooks = runpy.run_path(str(PROJECT_ROOT / "gunicorn.conf.py"))
+    server = SimpleNamespace(cfg=SimpleNamespace(preload_app=False))
+    hooks["when_ready"](server)
+    assert gc.get_freeze_count() == frozen_before
+
+    server.cfg.preload_app = True
+    monkeypatch.setattr("backend.bootstrap._load_popularity", lambda tracker: None)
+    try:
+        hooks["when_ready"](server)
+        assert gc.get_freeze_count() > frozen_before
+    finally:
+        gc.unfreeze()
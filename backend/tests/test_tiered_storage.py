@@ -0,0 +1,166 @@
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import os
+import sys
+import threading
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import pytest  # noqa: E402
+
+from backend.app import create_app  # noqa: E402
+from backend.services.storage import tree_algorithm  # noqa: E402
+from backend.services.storage.tiered import (  # noqa: E402
+    ChecksumMismatchError,
+    LocalDirectoryBackend,
+    TieredStorage,
+)
+
+
+class CountingBackend(LocalDirectoryBackend):
+    def __init__(self, root, delay=None):
+        super().__init__(root)
+        self.reads = 0
+        self.delay = delay
+
+    def open_attachment(self, model_id):
+        self.reads += 1
+        if self.delay is not None:
+            self.delay.wait(5)
+        return super().open_attachment(model_id)
+
+
+def read_all(storage, model_id):
+    return b"".join(storage.iter_attachment(model_id))
+
+
+def test_second_download_is_served_from_local_cache(tmp_path):
+    backend = CountingBackend(tmp_path / "remote")
+    backend.put_attachment("mdl-1", "plate.3mf", b"a" * 5000, checksum_algorithm=tree_algorithm("blake2b", 1024))
+    storage = TieredStorage(backend, tmp_path / "cache", max_bytes=10_000)
+
+    assert storage.describe_attachment("mdl-1")[:2] == ("plate.3mf", 5000)
+    assert backend.reads == 0  # describing needs metadata only
+    assert read_all(storage, "mdl-1") == b"a" * 5000
+    assert read_all(storage, "mdl-1") == b"a" * 5000
+
+    assert backend.reads == 1
+    assert (tmp_path / "cache" / "mdl-1" / "plate.3mf").exists()
+    assert storage.stats()["hits"] == 1
+
+
+def test_concurrent_misses_share_one_backend_read(tmp_path):
+    release = threading.Event()
+    backend = CountingBackend(tmp_path / "remote", delay=release)
+    backend.put_attachment("mdl-1", "big.bin", b"x" * 4096)
+    storage = TieredStorage(backend, tmp_path / "cache", max_bytes=10_000)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = [pool.submit(read_all, storage, "mdl-1") for _ in range(8)]
+        release.set()
+        assert all(result.result() == b"x" * 4096 for result in results)
+
+    assert backend.reads == 1
+
+
+def test_eviction_by_bytes_lru_and_lfu(tmp_path):
+    backend = LocalDirectoryBackend(tmp_path / "remote")
+    for model_id in ("a", "b", "c"):
+        backend.put_attachment(model_id, f"{model_id}.bin", model_id.encode() * 400)
+
+    lru = TieredStorage(backend, tmp_path / "lru", max_bytes=1000)
+    read_all(lru, "a")
+    read_all(lru, "b")
+    read_all(lru, "a")
+    read_all(lru, "c")  # 1200 bytes do not fit: the least recent blob goes
+    assert not (tmp_path / "lru" / "b").exists()
+    assert lru.stats()["used_bytes"] == 800
+
+    lfu = TieredStorage(backend, tmp_path / "lfu", max_bytes=1000, policy="lfu")
+    for _ in range(3):
+        read_all(lfu, "b")
+    read_all(lfu, "a")
+    read_all(lfu, "c")  # "a" was used more recently but less often than "b"
+    assert not (tmp_path / "lfu" / "a").exists()
+    assert (tmp_path / "lfu" / "b").exists()
+
+
+def test_corrupted_fill_is_rejected_and_not_cached(tmp_path):
+    backend = LocalDirectoryBackend(tmp_path / "remote")
+    path = backend.put_attachment("mdl-1", "model.stl", b"solid good")
+    path.write_bytes(b"solid evil")
+    storage = TieredStorage(backend, tmp_path / "cache", max_bytes=10_000)
+
+    with pytest.raises(ChecksumMismatchError):
+        read_all(storage, "mdl-1")
+    assert storage.stats()["entries"] == 0
+    assert [child.name for child in (tmp_path / "cache").iterdir() if not child.name.startswith(".")] == []
+    assert not list((tmp_path / "cache").glob(".fill-*"))
+
+
+def test_oversized_blobs_bypass_the_cache_and_restart_keeps_entries(tmp_path):
+    backend = LocalDirectoryBackend(tmp_path / "remote")
+    backend.put_attachment("big", "big.bin", b"b" * 2000)
+    backend.put_attachment("small", "small.bin", b"s" * 100)
+    storage = TieredStorage(backend, tmp_path / "cache", max_bytes=1000)
+
+    assert read_all(storage, "big") == b"b" * 2000
+    read_all(storage, "small")
+    assert storage.stats()["bypassed"] == 1
+
+    restarted = TieredStorage(backend, tmp_path / "cache", max_bytes=1000)
+    assert restarted.stats()["entries"] == 1
+    assert restarted.get_attachment("small")[:2] == ("small.bin", b"s" * 100)
+    assert restarted.stats()["hits"] == 1
+
+
+def test_workers_sharing_a_cache_share_its_cap_and_fills(tmp_path):
+    backend = CountingBackend(tmp_path / "remote")
+    for name in "abc":
+        backend.put_attachment(name, f"{name}.bin", name.encode() * 400)
+    first = TieredStorage(backend, tmp_path / "cache", max_bytes=1000)
+    second = TieredStorage(backend, tmp_path / "cache", max_bytes=1000)
+
+    read_all(first, "a")
+    assert read_all(second, "a") == b"a" * 400
+    assert backend.reads == 1
+
+    read_all(second, "b")
+    read_all(first, "c")  # evicts "a" although "b" was filled by the other worker
+    assert first.stats()["used_bytes"] == second.stats()["used_bytes"] == 800
+    assert not (tmp_path / "cache" / "a").exists()
+
+
+def test_startup_keeps_live_fills_and_removes_stale_ones(tmp_path):
+    cache = tmp_path / "cache"
+    cache.mkdir()
+    live = cache / f".fill-{os.getpid()}-abc"
+    live.write_bytes(b"partial")
+    dead = cache / ".fill-999999999-abc"
+    dead.write_bytes(b"partial")
+    old = cache / f".fill-{os.getpid()}-old"
+    old.write_bytes(b"partial")
+    os.utime(old, (0, 0))
+
+    TieredStorage(LocalDirectoryBackend(tmp_path / "remote"), cache, max_bytes=1000)
+
+    assert live.exists()
+    assert not dead.exists()
+    assert not old.exists()
+
+
+def test_attachment_route_streams_through_tiered_storage(tmp_path):
+    backend = LocalDirectoryBackend(tmp_path / "remote")
+    backend.put_attachment("mdl-1", "plate.3mf", b"p" * 3000)
+    app = create_app()
+    app.config["STORAGE"] = TieredStorage(backend, tmp_path / "cache", max_bytes=10_000)
+    client = app.test_client()
+
+    response = client.get("/api/models/mdl-1/attachment")
+
+    assert response.status_code == 200
+    assert response.data == b"p" * 3000
+    assert response.headers["Content-Length"] == "3000"
+    assert client.get("/api/models/missing/attachment").status_code == 404
@@ -0,0 +1,205 @@
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+import os
+import random
+import sys
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import pytest  # noqa: E402
+
+from backend.app import create_app  # noqa: E402
+from backend.services.storage import compute_checksum, save_file  # noqa: E402
+from backend.services.uploads import (  # noqa: E402
+    IncompleteUploadError,
+    SessionClosedError,
+    UploadSessionManager,
+)
+
+ADMIN_TOKEN = "secret-token"
+CHUNK = 1024
+
+
+def make_payload(size=CHUNK * 7 + 300):
+    return bytes(random.Random(7).getrandbits(8) for _ in range(size))
+
+
+def chunks_of(payload):
+    return [payload[offset:offset + CHUNK] for offset in range(0, len(payload), CHUNK)]
+
+
+def test_commit_matches_save_file_metadata(tmp_path):
+    payload = make_payload()
+    manager = UploadSessionManager(tmp_path / "uploads", chunk_size=CHUNK)
+    session = manager.create_session("plate.3mf", len(payload))
+    assert session["chunk_count"] == 8
+
+    for index, chunk in enumerate(chunks_of(payload)):
+        manager.write_chunk(session["session_id"], index, chunk)
+    path, size, md5, sha256 = manager.commit(session["session_id"])[:4]
+
+    _, expected_size, expected_md5, expected_sha = save_file(BytesIO(payload), tmp_path / "direct", "plate.3mf")
+    assert (size, md5, sha256) == (expected_size, expected_md5, expected_sha)
+    assert path.name.endswith("_plate.3mf")
+    assert path.read_bytes() == payload
+    assert not (tmp_path / "uploads" / ".sessions" / session["session_id"]).exists()
+
+
+def test_parallel_out_of_order_chunks_and_missing_report(tmp_path):
+    payload = make_payload()
+    manager = UploadSessionManager(tmp_path, chunk_size=CHUNK)
+    session_id = manager.create_session("part.stl", len(payload))["session_id"]
+    chunks = list(enumerate(chunks_of(payload)))
+    random.Random(3).shuffle(chunks)
+    held_back = chunks.pop()
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda item: manager.write_chunk(session_id, *item), chunks))
+
+    assert manager.status(session_id)["missing"] == [held_back[0]]
+    with pytest.raises(IncompleteUploadError) as excinfo:
+        manager.commit(session_id)
+    assert excinfo.value.missing == [held_back[0]]
+
+    manager.write_chunk(session_id, *held_back)
+    manager.write_chunk(session_id, *held_back)  # retried request is a no-op
+    _, size, md5, _ = manager.commit(session_id)[:4]
+    assert size == len(payload)
+    assert md5 == save_file(BytesIO(payload), tmp_path / "direct", "part.stl")[2]
+
+
+def test_in_order_upload_hashes_without_rereading(tmp_path, monkeypatch):
+    payload = make_payload()
+    manager = UploadSessionManager(tmp_path, chunk_size=CHUNK)
+    session_id = manager.create_session("part.stl", len(payload))["session_id"]
+    reads = []
+    original_pread = os.pread
+    monkeypatch.setattr(os, "pread", lambda *args: reads.append(args) or original_pread(*args))
+
+    for index, chunk in enumerate(chunks_of(payload)):
+        manager.write_chunk(session_id, index, chunk)
+    manager.commit(session_id)
+
+    assert reads == []
+
+
+def test_filling_a_gap_hashes_a_bounded_number_of_chunks(tmp_path, monkeypatch):
+    payload = make_payload(CHUNK * 40)
+    manager = UploadSessionManager(tmp_path, chunk_size=CHUNK)
+    session_id = manager.create_session("part.stl", len(payload))["session_id"]
+    parts = chunks_of(payload)
+    for index in range(1, len(parts)):
+        manager.write_chunk(session_id, index, parts[index])
+    reads = []
+    original_pread = os.pread
+    monkeypatch.setattr(os, "pread", lambda *args: reads.append(args) or original_pread(*args))
+
+    manager.write_chunk(session_id, 0, parts[0])
+    assert len(reads) == 15
+
+    committed = manager.commit(session_id)
+    assert committed.md5 == save_file(BytesIO(payload), tmp_path / "direct", "part.stl")[2]
+
+
+def test_writes_racing_a_commit_are_rejected(tmp_path):
+    payload = make_payload()
+    first = UploadSessionManager(tmp_path, chunk_size=CHUNK)
+    other_worker = UploadSessionManager(tmp_path, chunk_size=CHUNK)
+    session_id = first.create_session("part.stl", len(payload))["session_id"]
+    parts = chunks_of(payload)
+    for index, chunk in enumerate(parts[:-1]):
+        first.write_chunk(session_id, index, chunk)
+    other_worker.status(session_id)
+    first.write_chunk(session_id, len(parts) - 1, parts[-1])
+    first.commit(session_id)
+
+    with pytest.raises(SessionClosedError):
+        other_worker.write_chunk(session_id, len(parts) - 1, parts[-1])
+    with pytest.raises(KeyError):
+        other_worker.write_chunk(session_id, 0, parts[0])
+    with pytest.raises(KeyError):
+        first.commit(session_id)
+
+
+def test_idle_sessions_are_swept(tmp_path):
+    clock = [1_000_000.0]
+    manager = UploadSessionManager(tmp_path, chunk_size=CHUNK, session_ttl=60, sweep_interval=30, clock=lambda: clock[0])
+    stale = manager.create_session("old.stl", CHUNK)["session_id"]
+    fresh = manager.create_session("new.stl", CHUNK)["session_id"]
+    staging = tmp_path / ".sessions"
+    os.utime(staging / stale / "received", (clock[0] - 120, clock[0] - 120))
+    os.utime(staging / fresh / "received", (clock[0] - 10, clock[0] - 10))
+
+    clock[0] += 31
+    manager.create_session("trigger.stl", CHUNK)
+
+    assert not (staging / stale).exists()
+    assert (staging / fresh).exists()
+    with pytest.raises(KeyError):
+        manager.status(stale)
+    assert manager.sweep_expired() == []
+
+
+def test_session_resumes_in_a_fresh_manager(tmp_path):
+    payload = make_payload()
+    first = UploadSessionManager(tmp_path, chunk_size=CHUNK)
+    session_id = first.create_session("part.stl", len(payload))["session_id"]
+    parts = chunks_of(payload)
+    for index in range(0, len(parts), 2):
+        first.write_chunk(session_id, index, parts[index])
+
+    second = UploadSessionManager(tmp_path, chunk_size=CHUNK)
+    missing = second.status(session_id)["missing"]
+    assert missing == list(range(1, len(parts), 2))
+    for index in missing:
+        second.write_chunk(session_id, index, parts[index])
+    committed = second.commit(session_id)
+    assert committed.sha256 == save_file(BytesIO(payload), tmp_path / "direct", "part.stl")[3]
+    # Leaves written by the first manager were read back from the markers.
+    assert committed.checksum == compute_checksum(BytesIO(payload), committed.checksum_algorithm)
+
+
+def test_invalid_chunks_are_rejected(tmp_path):
+    manager = UploadSessionManager(tmp_path, chunk_size=CHUNK)
+    session_id = manager.create_session("part.stl", CHUNK + 10)["session_id"]
+
+    with pytest.raises(ValueError):
+        manager.write_chunk(session_id, 2, b"x" * 10)
+    with pytest.raises(ValueError):
+        manager.write_chunk(session_id, 1, b"x" * 11)
+    with pytest.raises(KeyError):
+        manager.status("../../etc")
+
+
+def test_upload_api_flow(tmp_path):
+    app = create_app()
+    app.config["UPLOAD_MANAGER"] = UploadSessionManager(tmp_path, chunk_size=CHUNK)
+    client = app.test_client()
+    headers = {"X-Admin-Token": ADMIN_TOKEN}
+    payload = make_payload(CHUNK * 2 + 5)
+
+    assert client.post("/api/uploads", json={"filename": "a.stl", "total_size": 1}).status_code == 401
+    created = client.post("/api/uploads", headers=headers, json={"filename": "a.stl", "total_size": len(payload)})
+    assert created.status_code == 201
+    session_id = created.get_json()["session_id"]
+    base = f"/api/uploads/{session_id}"
+
+    parts = chunks_of(payload)
+    assert client.put(f"{base}/chunks/2", headers=headers, data=parts[2]).status_code == 200
+    assert client.put(f"{base}/chunks/0", headers=headers, data=parts[0]).get_json()["missing"] == [1]
+    assert client.put(f"{base}/chunks/x", headers=headers, data=b"").status_code == 400
+    incomplete = client.post(f"{base}/commit", headers=headers)
+    assert incomplete.status_code == 409
+    assert incomplete.get_json()["missing"] == [1]
+
+    client.put(f"{base}/chunks/1", headers=headers, data=parts[1])
+    committed = client.post(f"{base}/commit", headers=headers)
+    assert committed.status_code == 201
+    metadata = committed.get_json()
+    assert metadata["file_size"] == len(payload)
+    assert Path(metadata["file_path"]).read_bytes() == payload
+    assert metadata["checksum_sha256"] == save_file(BytesIO(payload), tmp_path / "direct", "a.stl")[3]
+    assert client.get(base, headers=headers).status_code == 404
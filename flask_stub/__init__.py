@@ -1,20 +1,24 @@
 from __future__ import annotations
 
+import inspect
 import json
 import re
 from contextvars import ContextVar
 from dataclasses import dataclass, field
 from io import BytesIO
-from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl
 
 __all__ = [
     "Flask",
     "Blueprint",
+    "Response",
     "abort",
     "current_app",
     "jsonify",
     "request",
     "send_file",
+    "stream_with_context",
 ]
 
 
@@ -42,10 +46,29 @@ class Headers(dict):
 
 @dataclass
 class Response:
-    data: bytes = b""
+    data: Any = b""
     status_code: int = 200
     mimetype: str = "text/plain"
     headers: Dict[str, str] = field(default_factory=dict)
+    _on_close: List[Callable[[], Any]] = field(default_factory=list, repr=False)
+
+    def call_on_close(self, func: Callable[[], Any]) -> Callable[[], Any]:
+        self._on_close.append(func)
+        return func
+
+    def close(self) -> None:
+        callbacks, self._on_close = self._on_close, []
+        for func in callbacks:
+            func()
+
+    @property
+    def is_streamed(self) -> bool:
+        return not isinstance(self.data, (bytes, bytearray))
+
+    def iter_encoded(self) -> Iterable[bytes]:
+        if not self.is_streamed:
+            return iter([bytes(self.data)])
+        return (bytes(chunk) for chunk in self.data)
 
     @property
     def content(self) -> bytes:
@@ -59,9 +82,52 @@ class Response:
         return json.loads(self.data.decode("utf-8"))
 
 
+class MultiDict(dict):
+    """Minimal stand-in for werkzeug's ``MultiDict`` used by ``request.args``."""
+
+    def __init__(self, pairs: Iterable[Tuple[str, str]] = ()) -> None:
+        super().__init__()
+        for key, value in pairs:
+            self.setdefault(key, []).append(value)
+
+    def get(self, key: str, default: Any = None, type: Optional[Callable[[str], Any]] = None) -> Any:  # type: ignore[override]
+        values = super().get(key)
+        if not values:
+            return default
+        if type is None:
+            return values[0]
+        try:
+            return type(values[0])
+        except ValueError:
+            return default
+
+    def getlist(self, key: str) -> List[str]:
+        return list(super().get(key, []))
+
+
 class Request:
-    def __init__(self, headers: Optional[Dict[str, str]] = None) -> None:
+    def __init__(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        query_string: str = "",
+        data: bytes = b"",
+        remote_addr: Optional[str] = None,
+    ) -> None:
         self.headers: Headers = Headers(headers or {})
+        self.remote_addr = remote_addr
+        self.args = MultiDict(parse_qsl(query_string, keep_blank_values=True))
+        self._data = data
+
+    def get_data(self, cache: bool = True) -> bytes:
+        return self._data
+
+    def get_json(self, silent: bool = False) -> Any:
+        try:
+            return json.loads(self._data.decode("utf-8"))
+        except ValueError:
+            if silent:
+                return None
+            raise HTTPException(400, "Failed to decode JSON object.")
 
 
 class _LocalProxy:
@@ -114,6 +180,12 @@ class Blueprint:
     def post(self, rule: str) -> Callable:
         return self.route(rule, methods=["POST"])
 
+    def put(self, rule: str) -> Callable:
+        return self.route(rule, methods=["PUT"])
+
+    def delete(self, rule: str) -> Callable:
+        return self.route(rule, methods=["DELETE"])
+
     def iter_routes(self) -> Iterable[Route]:
         return list(self._routes)
 
@@ -154,18 +226,32 @@ class Flask:
     def post(self, rule: str) -> Callable:
         return self.route(rule, methods=["POST"])
 
+    def put(self, rule: str) -> Callable:
+        return self.route(rule, methods=["PUT"])
+
+    def delete(self, rule: str) -> Callable:
+        return self.route(rule, methods=["DELETE"])
+
     def register_blueprint(self, blueprint: Blueprint) -> None:
         self._routes.extend(blueprint.iter_routes())
 
     def test_client(self) -> "TestClient":
         return TestClient(self)
 
-    def handle_request(self, method: str, path: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    def handle_request(
+        self,
+        method: str,
+        path: str,
+        headers: Optional[Dict[str, str]] = None,
+        data: bytes = b"",
+        remote_addr: Optional[str] = "127.0.0.1",
+    ) -> Response:
         headers = headers or {}
+        path, _, query_string = path.partition("?")
         normalized_path = path.rstrip("/") or "/"
         route, params = self._find_handler(method, normalized_path)
         app_token = _current_app.set(self)
-        request_obj = Request(headers)
+        request_obj = Request(headers, query_string, data, remote_addr)
         request_token = _request.set(request_obj)
         try:
             result = route.func(**params)
@@ -178,8 +264,71 @@ class Flask:
             _current_app.reset(app_token)
         return response
 
+    async def __call__(
+        self,
+        scope: Dict[str, Any],
+        receive: Callable[[], Awaitable[Dict[str, Any]]],
+        send: Callable[[Dict[str, Any]], Awaitable[None]],
+    ) -> None:
+        """Serve the registered routes as an ASGI application.
+
+        Handlers may be coroutines and response bodies may be async
+        iterables; each body chunk is awaited through ``send`` before the
+        next one is produced, so the server's flow control paces the handler.
+        """
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope.get("headers", [])}
+        query_string = scope.get("query_string", b"").decode("latin-1")
+        app_token = _current_app.set(self)
+        body = bytearray()
+        if scope["method"] not in ("GET", "HEAD"):
+            while True:
+                message = await receive()
+                body.extend(message.get("body", b""))
+                if not message.get("more_body", False):
+                    break
+        client = scope.get("client")
+        remote_addr = client[0] if client else None
+        request_token = _request.set(Request(headers, query_string, bytes(body), remote_addr))
+        try:
+            try:
+                route, params = self._find_handler(scope["method"], scope["path"].rstrip("/") or "/")
+                result = route.func(**params)
+                if inspect.isawaitable(result):
+                    result = await result
+                response = self._coerce_to_response(result)
+            except HTTPException as exc:
+                response = jsonify({"message": exc.description})
+                response.status_code = exc.status_code
+
+            raw_headers = [(b"content-type", response.mimetype.encode("latin-1"))]
+            raw_headers.extend(
+                (key.lower().encode("latin-1"), str(value).encode("latin-1")) for key, value in response.headers.items()
+            )
+            await send({"type": "http.response.start", "status": response.status_code, "headers": raw_headers})
+            try:
+                async for chunk in _aiter_body(response.data):
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+            finally:
+                response.close()
+        finally:
+            _request.reset(request_token)
+            _current_app.reset(app_token)
+
     def _find_handler(self, method: str, path: str) -> Tuple[Route, Dict[str, str]]:
-        for route in self._routes:
+        # Like werkzeug, static rules win over rules with variable parts.
+        for route in sorted(self._routes, key=lambda route: "<" in route.rule):
             if method.upper() not in route.methods:
                 continue
             match = route.pattern.match(path)
@@ -198,9 +347,11 @@ class Flask:
         if isinstance(result, Response):
             return result
         if isinstance(result, tuple):
-            body, status = result
+            body, status, *extra = result
             response = self._coerce_to_response(body)
             response.status_code = status
+            if extra:
+                response.headers.update(extra[0])
             return response
         if isinstance(result, (bytes, bytearray)):
             return Response(bytes(result))
@@ -209,22 +360,62 @@ class Flask:
         return jsonify(result)
 
 
+async def _aiter_body(body: Any) -> AsyncIterator[bytes]:
+    if isinstance(body, (bytes, bytearray)):
+        yield bytes(body)
+    elif hasattr(body, "__aiter__"):
+        async for chunk in body:
+            yield bytes(chunk)
+    else:
+        for chunk in body:
+            yield bytes(chunk)
+
+
+def _encode_json(payload: Any) -> bytes:
+    return json.dumps(payload).encode("utf-8")
+
+
 class TestClient:
     def __init__(self, app: Flask) -> None:
         self.app = app
 
-    def open(self, path: str, method: str = "GET", headers: Optional[Dict[str, str]] = None):
-        return self.app.handle_request(method, path, headers=headers)
-
-    def get(self, path: str, headers: Optional[Dict[str, str]] = None):
-        response = self.open(path, "GET", headers=headers)
+    def open(
+        self,
+        path: str,
+        method: str = "GET",
+        headers: Optional[Dict[str, str]] = None,
+        data: bytes = b"",
+        json: Any = None,
+        environ_base: Optional[Dict[str, str]] = None,
+    ):
+        if json is not None:
+            data = _encode_json(json)
+        remote_addr = (environ_base or {}).get("REMOTE_ADDR", "127.0.0.1")
+        response = self.app.handle_request(method, path, headers=headers, data=data, remote_addr=remote_addr)
+        try:
+            if response.is_streamed:
+                response.data = b"".join(response.iter_encoded())
+        finally:
+            response.close()
         response.mimetype = response.mimetype or "application/octet-stream"
         return response
 
-    def post(self, path: str, headers: Optional[Dict[str, str]] = None):
-        response = self.open(path, "POST", headers=headers)
-        response.mimetype = response.mimetype or "application/octet-stream"
-        return response
+    def get(
+        self,
+        path: str,
+        headers: Optional[Dict[str, str]] = None,
+        environ_base: Optional[Dict[str, str]] = None,
+    ):
+        return self.open(path, "GET", headers=headers, environ_base=environ_base)
+
+    def post(self, path: str, headers: Optional[Dict[str, str]] = None, data: bytes = b"", json: Any = None):
+        return self.open(path, "POST", headers=headers, data=data, json=json)
+
+    def put(self, path: str, headers: Optional[Dict[str, str]] = None, data: bytes = b"", json: Any = None):
+        return self.open(path, "PUT", headers=headers, data=data, json=json)
+
+    def delete(self, path: str, headers: Optional[Dict[str, str]] = None):
+        return self.open(path, "DELETE", headers=headers)
 
 
 def abort(status_code: int, description: str | None = None) -> None:
@@ -236,6 +427,12 @@ def jsonify(data: Any) -> Response:
     return Response(payload, mimetype="application/json")
 
 
+def stream_with_context(generator: Iterable[bytes]) -> Iterable[bytes]:
+    # The stub resolves everything a handler needs before returning, so the
+    # generator does not need the request context to be kept alive.
+    return generator
+
+
 def send_file(file_obj: BytesIO, mimetype: str, as_attachment: bool = False, download_name: str | None = None) -> Response:
     data = file_obj.read()
     headers: Dict[str, str] = {}
@@ -14,3 +14,8 @@ export async function fetchModelDetail(id) {
   const response = await api.get(`/models/${id}`);
   return response.data;
 }
+
+export async function fetchModelsByIds(ids) {
+  const response = await api.get('/models', { params: { ids: ids.join(',') } });
+  return response.data;
+}
@@ -0,0 +1,33 @@
+"""Gunicorn settings for the WSGI app in ``backend.main``."""
+
+import os
+
+bind = "0.0.0.0:8000"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+# Threaded workers so a download does not occupy a whole process. The app
+# sizes its download lane from the same WORKER_THREADS value.
+worker_class = "gthread"
+threads = int(os.environ.setdefault("WORKER_THREADS", "16"))
+# Build and warm the app once in the master; workers inherit it by forking.
+preload_app = True
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app is built and before any
+    # worker is forked, which is the only point where seeding once and
+    # freezing pay off.
+    if server.cfg.preload_app:
+        from backend.bootstrap import freeze_before_fork, seed_popularity
+        from backend.main import app
+
+        seed_popularity(app.config)
+        freeze_before_fork()
+
+
+def post_worker_init(worker):
+    # Without preloading every worker builds its own app and seeds it here.
+    if not worker.cfg.preload_app:
+        from backend.bootstrap import seed_popularity
+        from backend.main import app
+
+        seed_popularity(app.config)